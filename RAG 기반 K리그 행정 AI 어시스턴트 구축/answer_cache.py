@@ -0,0 +1,130 @@
+import copy
+import time
+import itertools
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from query_cache import register_cache
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 의미 기반 최종 답변 캐시 (QA 플로우)
+# - 주제(index alias)별로 (질의 벡터, result, 인용 청크 id, 색인 버전)을 저장
+# - 조회: 질의 벡터와 코사인 ≥ ANSWER_CACHE_MIN_SIM 인 가장 가까운 항목 → 요약/답변 LLM 호출 생략
+# - 색인 버전이 바뀐 항목은 인용 청크가 모두 남아 있을 때만 재사용(청크 id는 내용 기반이라 내용이 바뀌면 사라짐)
+# - 대화 히스토리가 있는 질의(후속 질문)는 조회/저장하지 않음 → 히스토리가 빈 단독 질문만 캐시
+#   ("그럼 외국인은?"처럼 같은 문장도 히스토리에 따라 답이 달라짐, graph_pipeline._answer_cacheable)
+# ──────────────────────────────────────────────────────────────────────────────
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MIN_SIM = 0.95          # 패러프레이즈로 볼 최소 코사인 유사도
+ANSWER_CACHE_TTL_SEC = 6 * 3600      # 답변에 실시간 뉴스가 섞이므로 하루보다 짧게
+ANSWER_CACHE_MAX_PER_TOPIC = 256
+
+def _unit(v) -> np.ndarray:
+    v = np.asarray(v, dtype=np.float32).ravel()
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+class SemanticAnswerCache:
+    def __init__(self, name: str = "answer", *, min_sim: float = ANSWER_CACHE_MIN_SIM,
+                 ttl: float = ANSWER_CACHE_TTL_SEC, max_per_topic: int = ANSWER_CACHE_MAX_PER_TOPIC):
+        self.name = name
+        self.min_sim = min_sim
+        self.ttl = ttl
+        self.max_per_topic = max_per_topic
+        self._lock = threading.Lock()
+        self._topics: Dict[str, List[Dict[str, Any]]] = {}
+        self._seq = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0   # 버전이 바뀌었지만 인용 청크가 그대로라 재사용
+        self.invalidated = 0   # 인용 청크가 바뀌어 버림
+        self.expired = 0
+        self.evictions = 0
+
+    def _best(self, topic: str, q: np.ndarray, now: float) -> Optional[Dict[str, Any]]:
+        entries = self._topics.get(topic) or []
+        live = [e for e in entries if e["expires"] > now]
+        self.expired += len(entries) - len(live)
+        self._topics[topic] = live
+        if not live:
+            return None
+        sims = np.stack([e["vec"] for e in live]) @ q
+        k = int(np.argmax(sims))
+        if sims[k] < self.min_sim:
+            return None
+        return dict(live[k], sim=float(sims[k]))
+
+    def _drop(self, topic: str, entry_id: int) -> None:
+        self._topics[topic] = [e for e in self._topics.get(topic, []) if e["id"] != entry_id]
+
+    def lookup(self, topic: str, query_vec, version: str, *,
+               still_valid: Callable[[List[str]], bool]) -> Optional[Dict[str, Any]]:
+        """가장 가까운 캐시 답변의 result 사본(+ from_cache, cache_similarity). 없으면 None."""
+        q = _unit(query_vec)
+        with self._lock:
+            best = self._best(topic, q, time.monotonic())
+        if best is not None and best["version"] != version:
+            try:
+                ok = still_valid(best["cited"])  # 색인 조회는 락 밖에서
+            except Exception:
+                ok = False
+            with self._lock:
+                if ok:
+                    self.revalidated += 1
+                    for e in self._topics.get(topic, []):
+                        if e["id"] == best["id"]:
+                            e["version"] = version
+                else:
+                    self.invalidated += 1
+                    self._drop(topic, best["id"])
+            if not ok:
+                best = None
+        with self._lock:
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            for e in self._topics.get(topic, []):
+                if e["id"] == best["id"]:
+                    e["last_used"] = time.monotonic()
+        result = copy.deepcopy(best["result"])
+        result["from_cache"] = True
+        result["cache_similarity"] = round(best["sim"], 4)
+        return result
+
+    def store(self, topic: str, query_vec, result: Dict[str, Any], cited_ids: List[str], version: str) -> None:
+        now = time.monotonic()
+        entry = {
+            "id": next(self._seq), "vec": _unit(query_vec), "result": copy.deepcopy(result),
+            "cited": [i for i in cited_ids if i], "version": version,
+            "expires": now + self.ttl, "last_used": now,
+        }
+        with self._lock:
+            entries = self._topics.setdefault(topic, [])
+            # 거의 같은 질문의 이전 답변은 교체
+            entries[:] = [e for e in entries if float(e["vec"] @ entry["vec"]) < self.min_sim]
+            entries.append(entry)
+            if len(entries) > self.max_per_topic:
+                entries.sort(key=lambda e: e["last_used"])
+                self.evictions += len(entries) - self.max_per_topic
+                del entries[:len(entries) - self.max_per_topic]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._topics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(v) for v in self._topics.values()),
+                "topics": {t: len(v) for t, v in self._topics.items()},
+                "min_sim": self.min_sim, "ttl_sec": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "revalidated": self.revalidated, "invalidated": self.invalidated,
+                "expired": self.expired, "evictions": self.evictions,
+            }
+
+answer_cache = register_cache(SemanticAnswerCache())
@@ -1,8 +1,9 @@
 from flask import Flask, request, render_template, jsonify
-from graph_pipeline import graph_generate_answer as generate_answer
+from graph_pipeline import graph_generate_answer as generate_answer, latency_stats
 
 from collections import defaultdict, deque
 from mcp_notion_sink import save_answer_to_notion
+from query_cache import cache_stats
 
 HISTORY_MAX = 8
 
@@ -27,6 +28,7 @@ def chat():
     user_message = request.form.get('message', '').strip()
     big_topic    = (request.form.get('big_topic') or 'qa').strip().lower()   # 'qa' | 'cases' | 'assistant'
     sub_topic    = (request.form.get('topic') or '').strip().lower()
+    summary_mode = (request.form.get('summary_mode') or 'llm').strip().lower()  # 'llm' | 'fast'(LLM 요약 생략)
     
     # 2) Q/A가 아니면 소주제는 무시
     if (big_topic != 'qa'):
@@ -40,9 +42,13 @@ def chat():
 
     # (B) 그래프 실행: history_summary 추가된 새 시그니처 사용
     ai_response = generate_answer(
-        user_message, big_topic, sub_topic, history_summary=history_block
+        user_message, big_topic, sub_topic, history_summary=history_block, summary_mode=summary_mode
     )
 
+    # 소주제를 고르지 않았으면 라우터가 고른 소주제로 면책 문구/Notion 메타 결정
+    if (big_topic == 'qa') and sub_topic in ('', 'auto'):
+        sub_topic = ai_response.get("sub_topic") or sub_topic
+
     # (C) 이번 턴을 요약해 저장 (사용자/AI 각각)
     push_turn("U", user_message)
     push_turn("A", ai_response["final_answer"])
@@ -60,6 +66,10 @@ def chat():
             disclaimer = "\n\n ⚠️ 정식 규정 PDF는 아시아축구연맹(AFC) 홈페이지에서도 확인하실 수 있습니다. \n 🌍 [AFC 홈페이지](https://www.the-afc.com/en/more/downloads.html?utm_source=chatgpt.com)"
         elif (sub_topic == 'team'):
             disclaimer = "\n\n ⚠️ 자세한 내용은 강원FC에 문의하세요. \n 🏟️ [강원FC 홈페이지](https://www.gangwon-fc.com/)"
+        elif (sub_topic == 'all'):
+            disclaimer = "\n\n ⚠️ K리그·대한축구협회·AFC·구단 규정을 함께 검색한 답변입니다. 근거 조항이 어느 규정에 속하는지 확인하세요."
+        else:
+            disclaimer = ""
     
         final_text = ai_response["final_answer"] + disclaimer
         info = None
@@ -78,7 +88,9 @@ def chat():
         # 응답 JSON에도 같이 내려주면 프런트에서 바로 확인 가능
         return jsonify({
             "ai_response": final_text,
-            "notion_info": info  # ← ok/url/reason/debug 가 들어있음
+            "notion_info": info,  # ← ok/url/reason/debug 가 들어있음
+            "summary_mode": ai_response.get("summary_mode"),
+            "timings": ai_response.get("timings")
         })
     
     final_text = ai_response["final_answer"]
@@ -102,5 +114,15 @@ def chat():
         "notion_info": info  # ← ok/url/reason/debug 가 들어있음
     })
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_view():
+    # 질의/검색/답변/뉴스 캐시 적중률 (항목 수, hit/miss, 버전 불일치·만료·용량 초과로 버린 수, 뉴스 임베딩 재사용률)
+    return jsonify(cache_stats())
+
+@app.route('/latency/stats', methods=['GET'])
+def latency_stats_view():
+    # 모드별(qa/llm, qa/fast, 캐시 적중 등) 최근 응답 시간 mean/p50/p95
+    return jsonify(latency_stats.stats())
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,136 @@
+import os
+import json
+import glob
+import shutil
+import hashlib
+import argparse
+from typing import Any, Dict, Optional
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 인제스트 벤치마크
+# - DATA_ROOT에서 폴더별로 고정된 샘플 파일을 골라 index_artifacts/bench/corpus에 복사(한 번만)
+# - 로컬 Weaviate 컨테이너(docker compose up -d weaviate)에 Bench_<폴더> alias로 매번 전체 재구축
+# - 리포트: index_artifacts/reports/bench_<timestamp>.json, 같은 코퍼스의 직전 결과와 비교 출력
+# ──────────────────────────────────────────────────────────────────────────────
+BENCH_DIR = os.path.join("index_artifacts", "bench")
+BENCH_CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+BENCH_MANIFEST_PATH = os.path.join(BENCH_DIR, "manifest.json")
+BENCH_ALIAS_PREFIX = "Bench_"
+BENCH_FILES_PER_CLASS = 20
+
+def build_sample_corpus(data_root: str, files_per_class: int = BENCH_FILES_PER_CLASS,
+                        out_dir: str = BENCH_CORPUS_DIR, refresh: bool = False) -> Dict[str, Any]:
+    """폴더별로 정렬된 파일 목록에서 등간격으로 files_per_class개를 골라 복사. 반환: 코퍼스 정보."""
+    info_path = os.path.join(out_dir, "corpus.json")
+    if os.path.exists(info_path) and not refresh:
+        with open(info_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    files, h = [], hashlib.sha256()
+    for folder in sorted(os.listdir(data_root)):
+        src_dir = os.path.join(data_root, folder)
+        if not os.path.isdir(src_dir):
+            continue
+        paths = sorted(glob.glob(os.path.join(src_dir, "**", "*.json"), recursive=True))
+        step = max(1, len(paths) // files_per_class) if files_per_class else 1
+        for path in paths[::step][:files_per_class]:
+            rel = os.path.relpath(path, src_dir)
+            dst = os.path.join(out_dir, BENCH_ALIAS_PREFIX + folder, rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(path, dst)
+            with open(dst, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            h.update(f"{folder}/{rel}:{digest}\n".encode("utf-8"))
+            files.append({"path": os.path.relpath(dst, out_dir), "bytes": os.path.getsize(dst)})
+
+    info = {
+        "signature": h.hexdigest()[:16],
+        "files": len(files),
+        "bytes": sum(f["bytes"] for f in files),
+        "file_list": files,
+    }
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+def _previous_report(report_dir: str, signature: str, exclude_started_at: str) -> Optional[Dict[str, Any]]:
+    for path in sorted(glob.glob(os.path.join(report_dir, "bench_*.json")), reverse=True):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rep = json.load(f)
+        except Exception:
+            continue
+        run = rep.get("run") or {}
+        if run.get("bench_corpus") == signature and rep.get("started_at") != exclude_started_at:
+            return rep
+    return None
+
+def _print_comparison(prev: Dict[str, Any], cur: Dict[str, Any]) -> None:
+    keys = ["wall_sec", "chunks_per_sec", "hash_ms", "parse_ms", "flatten_ms", "embed_ms", "insert_ms"]
+    print(f"\n🆚 vs previous bench run ({prev['started_at']})")
+    for k in keys:
+        a, b = prev["total"].get(k), cur["total"].get(k)
+        if not a or b is None:
+            continue
+        print(f"  {k}: {a} → {b} ({(b - a) / a:+.1%})")
+
+def _drop_bench_classes(aliases) -> None:
+    import make_DB
+    from index_alias import get_alias_target, delete_alias, table_class_name
+    for alias in aliases:
+        target = get_alias_target(make_DB.client, alias)
+        for cls in (target, table_class_name(target) if target else None):
+            if cls and cls in make_DB._existing_classes():
+                make_DB._delete_class(cls)
+        delete_alias(make_DB.client, alias)
+
+def run_bench(*, data_root: str, files_per_class: int = BENCH_FILES_PER_CLASS, refresh: bool = False,
+              warm_cache: bool = False, cleanup: bool = True, **build_kwargs) -> Dict[str, Any]:
+    import make_DB
+    from ingest_metrics import INGEST_REPORT_DIR
+    if not make_DB.client.is_ready():
+        raise SystemExit(f"❌ Weaviate not ready at {make_DB.WEAVIATE_URL} (docker compose up -d weaviate)")
+
+    corpus = build_sample_corpus(data_root, files_per_class, refresh=refresh)
+    print(f"📦 bench corpus {corpus['signature']}: {corpus['files']} files, {corpus['bytes'] / 1e6:.1f} MB")
+
+    # 매 실행 같은 조건(전체 재구축)으로 측정
+    if os.path.exists(BENCH_MANIFEST_PATH):
+        os.remove(BENCH_MANIFEST_PATH)
+    report = make_DB.build_index(
+        incremental=False, data_root=BENCH_CORPUS_DIR, gc_grace=0,
+        use_embed_cache=warm_cache, manifest_path=BENCH_MANIFEST_PATH, report_prefix="bench",
+        run_tags={"bench_corpus": corpus["signature"], "bench_files": corpus["files"]},
+        **build_kwargs
+    )
+
+    prev = _previous_report(INGEST_REPORT_DIR, corpus["signature"], report["started_at"])
+    if prev:
+        _print_comparison(prev, report)
+    if cleanup:
+        _drop_bench_classes(report["classes"].keys())
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="고정 샘플 코퍼스로 인제스트 처리량 측정")
+    parser.add_argument("--data-root", default=None, help="샘플을 뽑을 원본 폴더(기본: make_DB.DATA_ROOT)")
+    parser.add_argument("--files-per-class", type=int, default=BENCH_FILES_PER_CLASS)
+    parser.add_argument("--refresh", action="store_true", help="샘플 코퍼스를 다시 뽑음")
+    parser.add_argument("--warm-cache", action="store_true", help="임베딩 캐시 사용(기본은 매번 실제 encode)")
+    parser.add_argument("--keep", action="store_true", help="벤치 클래스를 지우지 않음")
+    parser.add_argument("--no-batch", action="store_true")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--parse-workers", type=int)
+    args = parser.parse_args()
+
+    import make_DB
+    kwargs = {"use_batch": not args.no_batch}
+    for name, key in (("batch_size", "batch_size"), ("workers", "num_workers"), ("parse_workers", "parse_workers")):
+        if getattr(args, name) is not None:
+            kwargs[key] = getattr(args, name)
+    run_bench(
+        data_root=args.data_root or make_DB.DATA_ROOT, files_per_class=args.files_per_class,
+        refresh=args.refresh, warm_cache=args.warm_cache, cleanup=not args.keep, **kwargs
+    )
@@ -0,0 +1,362 @@
+import json
+import re
+import os
+import time
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import ijson  # 대용량 JSON 스트리밍 파싱 (requirements.txt)
+from weaviate.util import generate_uuid5
+
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024  # 이보다 큰 파일은 스트리밍 경로로 처리
+
+CHUNK_MAX_CHARS = 1200       # 문자 기준 청킹(토크나이저 미설정 시)
+CHUNK_OVERLAP_CHARS = 200
+CHUNK_OVERLAP_TOKENS = 32    # 토큰 기준 청킹 시 같은 조문 안에서만 겹침
+
+# 토큰 기준 청킹 상태: make_DB가 configure_token_chunker로 임베딩 모델 토크나이저를 주입
+# (파싱 프로세스 풀은 fork로 뜨므로 자식 프로세스도 그대로 물려받음)
+_tokenizer = None
+_max_tokens = 0
+_overlap_tokens = CHUNK_OVERLAP_TOKENS
+
+# 조문 경계: 줄 맨 앞의 "제N조(의M)", "제N항", "부칙", 원문자 항 번호(①~⑳)
+# (문장 중간의 "제14조에 따라" 같은 인용은 경계로 보지 않음)
+_ARTICLE_BOUNDARY = re.compile(r"^[ \t]*(?:제\s*\d+\s*조(?:의\s*\d+)?|제\s*\d+\s*항|부\s*칙|[\u2460-\u2473])", re.M)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 규정 JSON → 청크 평탄화 (make_DB.build_index에서 분리)
+# ──────────────────────────────────────────────────────────────────────────────
+def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
+    if not text:
+        return []
+    sents = [s.strip() for s in re.split(r'(?<=[\.!?])\s+', text) if s.strip()]
+    chunks, buf, cur = [], [], 0
+    for s in sents:
+        if cur + len(s) + 1 > max_chars and buf:
+            whole = " ".join(buf)
+            chunks.append(whole)
+            tail = whole[-overlap:] if overlap > 0 else ""
+            buf, cur = ([tail] if tail else []), len(tail)
+        buf.append(s)
+        cur += len(s) + 1
+    if buf:
+        chunks.append(" ".join(buf))
+    return chunks or [text[:max_chars]]
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 토큰 기준 청킹 (임베딩 모델 max_seq_length에 맞춤)
+# ──────────────────────────────────────────────────────────────────────────────
+def configure_token_chunker(tokenizer, max_tokens: int, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> None:
+    """tokenizer=None이면 문자 기준 청킹으로 되돌림."""
+    global _tokenizer, _max_tokens, _overlap_tokens
+    _tokenizer, _max_tokens, _overlap_tokens = tokenizer, int(max_tokens), int(overlap_tokens)
+
+def chunker_signature() -> str:
+    """청킹 설정 식별자(바뀌면 청크 uuid가 전부 바뀌므로 매니페스트에 기록)."""
+    if _tokenizer is None:
+        return f"chars:{CHUNK_MAX_CHARS}:{CHUNK_OVERLAP_CHARS}"
+    return f"tokens:{getattr(_tokenizer, 'name_or_path', '')}:{_max_tokens}:{_overlap_tokens}"
+
+def count_tokens(text: str, tokenizer=None) -> int:
+    tok = tokenizer or _tokenizer
+    return len(tok(text, add_special_tokens=False)["input_ids"])
+
+def _split_articles(text: str) -> List[str]:
+    starts = [m.start() for m in _ARTICLE_BOUNDARY.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    bounds = starts + [len(text)]
+    return [text[a:b].strip() for a, b in zip(bounds, bounds[1:]) if text[a:b].strip()]
+
+def _token_windows(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """한 문장이 예산보다 길면 토큰 오프셋 기준으로 원문을 잘라 창(window)으로 분할."""
+    offsets = _tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    stride = max(1, max_tokens - overlap_tokens)
+    out = []
+    for i in range(0, len(offsets), stride):
+        window = offsets[i:i + max_tokens]
+        out.append(text[window[0][0]:window[-1][1]].strip())
+        if i + max_tokens >= len(offsets):
+            break
+    return [w for w in out if w]
+
+def _pack_units(units: List[str], max_tokens: int, overlap_tokens: int) -> List[str]:
+    """문장 단위를 예산 안에서 묶고, 다음 청크 앞에 직전 문장들을 overlap_tokens만큼 겹침."""
+    chunks, buf = [], []  # buf: [(문장, 토큰 수)]
+    def close():
+        if buf:
+            chunks.append(" ".join(u for u, _ in buf))
+    for unit in units:
+        n = count_tokens(unit)
+        if n > max_tokens:
+            close()
+            buf = []
+            chunks.extend(_token_windows(unit, max_tokens, overlap_tokens))
+            continue
+        if buf and sum(k for _, k in buf) + n > max_tokens:
+            close()
+            tail, tail_tok = [], 0
+            for u, k in reversed(buf):
+                if tail_tok + k > overlap_tokens:
+                    break
+                tail.insert(0, (u, k))
+                tail_tok += k
+            buf = tail if tail_tok + n <= max_tokens else []
+        buf.append((unit, n))
+    close()
+    return chunks
+
+def chunk_text_tokens(text: str, max_tokens: int, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    임베딩 모델 토크나이저로 길이를 재서 max_tokens 이내로 청킹.
+    조문(제N조/제N항/부칙/①…) 경계를 우선 보존: 조문 여러 개를 한 청크에 묶되 조문 중간에서는 자르지 않고,
+    한 조문이 예산을 넘을 때만 문장 단위로 나눔.
+    """
+    if not text:
+        return []
+    chunks, cur, cur_tok = [], [], 0
+    for seg in _split_articles(text):
+        n = count_tokens(seg)
+        if n > max_tokens:
+            if cur:
+                chunks.append("\n".join(cur))
+                cur, cur_tok = [], 0
+            sents = [s.strip() for s in re.split(r'(?<=[\.!?])\s+', seg) if s.strip()]
+            chunks.extend(_pack_units(sents, max_tokens, overlap_tokens))
+            continue
+        if cur and cur_tok + n > max_tokens:
+            chunks.append("\n".join(cur))
+            cur, cur_tok = [], 0
+        cur.append(seg)
+        cur_tok += n
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+def split_text(text: str) -> List[str]:
+    """설정된 방식으로 청킹(토크나이저가 주입돼 있으면 토큰 기준, 아니면 기존 문자 기준)."""
+    if _tokenizer is not None and _max_tokens > 0:
+        return chunk_text_tokens(text, _max_tokens, _overlap_tokens)
+    return chunk_text(text, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP_CHARS)
+
+def flatten_table(table_rows) -> str:
+    flat = []
+    for row in table_rows or []:
+        flat.append("; ".join([f"{k}:{v}" for k, v in row.items()]))
+    return "\n".join(flat)
+
+def flatten_section(title: str, chapter_title: str, section: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    section_heading = section.get("heading", "")
+
+    text_items = [item for item in section.get("contents", []) if isinstance(item, str)]
+    aggregated_content = "\n".join(text_items).strip()
+
+    table_items = [item["table"] for item in section.get("contents", [])
+                   if isinstance(item, dict) and "table" in item]
+    aggregated_table_json = json.dumps(table_items, ensure_ascii=False) if table_items else ""
+    table_texts = [flatten_table(rows) for rows in table_items]
+
+    embed_base = "\n".join([aggregated_content] + [t for t in table_texts if t]).strip()
+
+    # 표는 섹션당 1번만 저장: 청크에는 원문 대신 "_table"(섹션 표)을 달아 두고,
+    # uuid 계산 단계에서 table_id로 바꿔 표 객체를 따로 적재
+    for pi, chunk in enumerate(split_text(embed_base), start=1):
+        yield {
+            "title": title,
+            "chapter_title": chapter_title,
+            "section_heading": section_heading,
+            "content": chunk,
+            "_table": aggregated_table_json
+        }
+
+def flatten_document(doc: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    title = doc.get("title", "")
+    for chapter in doc.get("chapters", []):
+        chapter_title = chapter.get("title", "")
+        for section in chapter.get("sections", []):
+            yield from flatten_section(title, chapter_title, section)
+
+def _add_ms(timings: Optional[Dict[str, float]], key: str, t0: float) -> None:
+    if timings is not None:
+        timings[key] = timings.get(key, 0.0) + (time.perf_counter() - t0) * 1000.0
+
+def load_entries(path: str, timings: Optional[Dict[str, float]] = None) -> Optional[List[Dict[str, Any]]]:
+    """JSON 파일 1개를 로드해 청크 dict 리스트로 평탄화. 실패 시 None. timings에 parse_ms/flatten_ms 누적."""
+    t0 = time.perf_counter()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"  ⚠️ load fail: {path} ({e})")
+        return None
+    _add_ms(timings, "parse_ms", t0)
+
+    t0 = time.perf_counter()
+    try:
+        if isinstance(data, dict):
+            return list(flatten_document(data))
+        if isinstance(data, list):
+            entries = []
+            for d in data:
+                if isinstance(d, dict):
+                    entries.extend(list(flatten_document(d)))
+            return entries
+        return None
+    finally:
+        _add_ms(timings, "flatten_ms", t0)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 스트리밍 파싱: chapters → sections → contents를 섹션 1개씩만 메모리에 올림
+# ──────────────────────────────────────────────────────────────────────────────
+def _iter_sections_streaming(f) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    ijson 이벤트를 따라가며 (문서 title, chapter title, section dict)를 하나씩 반환.
+    루트가 문서 dict이든 문서 리스트이든 처리. title 키는 chapters/sections보다 앞에 있어야 반영됨
+    (PDF→JSON 변환 결과의 키 순서 기준).
+    """
+    base = None
+    doc_title, chapter_title = "", ""
+    builder, depth = None, 0
+    for prefix, event, value in ijson.parse(f):
+        if base is None:
+            if event == "start_map":
+                base = ""
+            elif event == "start_array":
+                base = "item."
+            else:
+                return
+            continue
+
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    yield doc_title, chapter_title, builder.value
+                    builder = None
+            continue
+
+        if prefix == f"{base}chapters.item.sections.item" and event == "start_map":
+            builder, depth = ijson.ObjectBuilder(), 1
+            builder.event(event, value)
+        elif prefix == base.rstrip(".") and event == "start_map":
+            doc_title, chapter_title = "", ""  # 리스트 루트: 다음 문서 시작
+        elif prefix == f"{base}chapters.item" and event == "start_map":
+            chapter_title = ""
+        elif prefix == f"{base}title" and event == "string":
+            doc_title = value
+        elif prefix == f"{base}chapters.item.title" and event == "string":
+            chapter_title = value
+
+def iter_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    파일을 스트리밍으로 읽어 청크 dict를 하나씩 반환(파일 크기와 무관하게 메모리 일정).
+    """
+    with open(path, "rb") as f:
+        for title, chapter_title, section in _iter_sections_streaming(f):
+            yield from flatten_section(title, chapter_title, section)
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """파일 내용 해시(매니페스트 변경 감지용)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 파일 준비 (인제스트 파이프라인 1단계, 프로세스 풀에서 실행)
+# ──────────────────────────────────────────────────────────────────────────────
+def chunk_uuid(class_name: str, doc_obj: Dict[str, Any], text_to_embed: str) -> str:
+    # 🔸 클래스명을 basis에 포함해 클래스 간 UUID 충돌 방지
+    basis = f"{class_name}|{doc_obj.get('title','')}|{doc_obj.get('chapter_title','')}|{doc_obj.get('section_heading','')}|{text_to_embed}"
+    return generate_uuid5(basis)
+
+def table_uuid(class_name: str, doc_obj: Dict[str, Any], table_json: str) -> str:
+    basis = f"{class_name}|table|{doc_obj.get('title','')}|{doc_obj.get('chapter_title','')}|{doc_obj.get('section_heading','')}|{table_json}"
+    return generate_uuid5(basis)
+
+def split_table(class_name: str, doc_obj: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    청크의 섹션 표를 떼어내 table_id로 바꿈. 반환: (table uuid, 표 객체) 또는 None.
+    같은 섹션의 청크들은 같은 표 uuid를 가리키므로 표는 한 번만 적재됨.
+    """
+    table_json = doc_obj.pop("_table", "")
+    if not table_json:
+        doc_obj["table_id"] = ""
+        return None
+    tid = table_uuid(class_name, doc_obj, table_json)
+    doc_obj["table_id"] = tid
+    return tid, {
+        "title": doc_obj.get("title", ""),
+        "chapter_title": doc_obj.get("chapter_title", ""),
+        "section_heading": doc_obj.get("section_heading", ""),
+        "table_json": table_json,
+    }
+
+Chunk = Tuple[str, Dict[str, Any], str, Optional[Tuple[str, Dict[str, Any]]]]
+
+def _to_chunk(class_name: str, doc_obj: Dict[str, Any]) -> Optional[Chunk]:
+    text_to_embed = (doc_obj.get("content") or "").strip()
+    if not text_to_embed:
+        return None
+    table = split_table(class_name, doc_obj)
+    return chunk_uuid(class_name, doc_obj, text_to_embed), doc_obj, text_to_embed, table
+
+def file_chunks(class_name: str, path: str, timings: Optional[Dict[str, float]] = None) -> Optional[List[Chunk]]:
+    """파일 → [(uuid, doc_obj, text_to_embed, table)]. 로드 실패 시 None."""
+    entries = load_entries(path, timings)
+    if entries is None:
+        return None
+    t0 = time.perf_counter()
+    chunks = [c for c in (_to_chunk(class_name, d) for d in entries) if c]
+    _add_ms(timings, "flatten_ms", t0)
+    return chunks
+
+def stream_file_chunks(class_name: str, path: str, timings: Optional[Dict[str, float]] = None) -> Iterator[Chunk]:
+    """
+    file_chunks의 스트리밍 버전: (uuid, doc_obj, text_to_embed, table)를 하나씩 반환.
+    파싱과 평탄화가 섞여 있어 timings에는 parse_ms로 합산(yield 후 소비자 쪽 시간은 제외).
+    """
+    t0 = time.perf_counter()
+    for doc_obj in iter_entries(path):
+        c = _to_chunk(class_name, doc_obj)
+        if c:
+            _add_ms(timings, "parse_ms", t0)
+            yield c
+            t0 = time.perf_counter()
+    _add_ms(timings, "parse_ms", t0)
+
+def is_large_file(path: str, threshold: int = STREAM_THRESHOLD_BYTES) -> bool:
+    try:
+        return os.path.getsize(path) > threshold
+    except OSError:
+        return False
+
+def prepare_file(class_name: str, path: str, prev_digest: Optional[str] = None, *, stream: bool = False,
+                 with_tokens: bool = False) -> Dict[str, Any]:
+    """
+    해시 계산 → (변경 시) 로드/평탄화/uuid 계산.
+    stream=True면 chunks를 리스트 대신 제너레이터로 반환(호출한 프로세스에서 소비해야 함).
+    반환: {"path", "sha256", "unchanged", "chunks", "timings"}  (해시 실패 시 sha256=None, 로드 실패 시 chunks=None)
+    timings: hash_ms/parse_ms/flatten_ms (+ with_tokens이고 토큰 청킹이면 tokens). 스트리밍은 소비가 끝나야 채워짐.
+    """
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    try:
+        digest = file_sha256(path)
+    except OSError as e:
+        print(f"  ⚠️ hash fail: {path} ({e})")
+        return {"path": path, "sha256": None, "unchanged": False, "chunks": None, "timings": timings}
+    _add_ms(timings, "hash_ms", t0)
+    if prev_digest == digest:
+        return {"path": path, "sha256": digest, "unchanged": True, "chunks": None, "timings": timings}
+    if stream:
+        chunks = stream_file_chunks(class_name, path, timings)
+    else:
+        chunks = file_chunks(class_name, path, timings)
+        if with_tokens and chunks and _tokenizer is not None:
+            timings["tokens"] = sum(count_tokens(text) for _, _, text, _ in chunks)
+    return {"path": path, "sha256": digest, "unchanged": False, "chunks": chunks, "timings": timings}
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import index_alias
+from local_index import iter_class_objects
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 청크별 조항 요약 (색인 시 미리 생성)
+# - 요약 프롬프트는 문서(title/chapter/section/본문)에만 의존 → 청크마다 1번만 만들어 "summary" 속성에 저장
+#   질의 시에는 저장된 요약을 그대로 쓰고, 요약이 없는 청크만 LLM 호출 (search_answer.summarize_documents)
+# - 배치 실행: 분당 SUMMARY_RPM 회로 제한, 실패 시 지수 백오프 재시도
+# - 저널 index_artifacts/summaries/<Alias>.jsonl ({id, digest, summary} 줄 단위, 생성 즉시 append)
+#   중단 후 재실행 시 이어서 진행 / 재적재(upsert·블루그린)로 summary가 비어도 같은 청크(id+프롬프트 해시)는 LLM 없이 복원
+# ──────────────────────────────────────────────────────────────────────────────
+SUMMARY_DIR = os.path.join("index_artifacts", "summaries")
+SUMMARY_MODEL = "gemini-1.5-flash"
+SUMMARY_MAX_OUTPUT_TOKENS = 200
+SUMMARY_TEMPERATURE = 0.4
+SUMMARY_RPM = 60              # 분당 최대 LLM 호출 수
+SUMMARY_MAX_RETRIES = 4       # 호출당 재시도 횟수 (1, 2, 4, 8초 백오프)
+SUMMARY_PROPS = ["title", "chapter_title", "section_heading", "content", "table_id", "summary"]
+
+def summary_prompt(doc: Dict[str, Any]) -> str:
+    doc_body = (doc.get("content") or doc.get("table_json") or "").strip()
+    return f"""
+다음은 축구 규정/지침 문서의 한 섹션입니다. 최종 답변에서 그대로 재사용할 수 있도록,
+**직접 명시된 조항 번호**를 찾아 간결 요약하세요.
+
+[문서 메타]
+- 문서명: {doc.get('title','').strip()}
+- 장/챕터: {doc.get('chapter_title','').strip()}
+- 섹션: {doc.get('section_heading','').strip()}
+
+[문서 본문]
+{doc_body}
+
+[작성 지침]
+1) 반드시 아래 "요약 형식"을 따르세요. 다른 형식/문구를 섞지 마세요.
+2) 요약은 **문서에 직접 나온 내용만** 사용하고, 없는 조항/수치/해석은 쓰지 마세요.
+3) **문서명**과 **조항 번호**는 반드시 포함하여 요약하세요.
+4) **조항 번호**는 원문 표기(예: "제14조", "제14조 제2항", "제14조의2", "부칙 제1조")를 그대로 사용하세요.
+5) 조항 번호가 여러 개면 **여러 줄**로 나누어 각각 요약하세요.
+6) 조항 번호가 본문에 **아예 없으면** `- (조항번호 없음): ...`으로 1줄 요약만 작성하세요.
+7) 각 줄은 **한 문장**으로 요약하고, 필요하면 괄호 안에 10~20자 이내의 짧은 원문 인용을 덧붙여 검증성을 높이세요(선택).
+
+[요약 형식]
+- [문서명][제oo조] 핵심 요지 한 문장. (선택: "짧은 원문 인용")
+- [상벌 규정][제oo조 제x항] 핵심 요지 한 문장.
+- (조항번호 없음): 문서 전체 요지 한 문장.
+
+""".strip()
+
+def prompt_digest(doc: Dict[str, Any]) -> str:
+    """요약 입력(프롬프트) 해시 — 내용이 같으면 저널의 요약을 재사용."""
+    return hashlib.sha256(summary_prompt(doc).encode("utf-8")).hexdigest()[:16]
+
+def generate_summary(genai_client, doc: Dict[str, Any], *, model_name: str = SUMMARY_MODEL,
+                     max_output_tokens: int = SUMMARY_MAX_OUTPUT_TOKENS,
+                     temperature: float = SUMMARY_TEMPERATURE) -> str:
+    from google.genai import types
+    out = genai_client.models.generate_content(
+        model=model_name,
+        contents=summary_prompt(doc),
+        config=types.GenerateContentConfig(
+            max_output_tokens=max_output_tokens,
+            temperature=temperature,
+        )
+    )
+    return (out.text or '').strip()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 배치 실행기 (레이트 리밋 + 재개용 저널)
+# ──────────────────────────────────────────────────────────────────────────────
+class RateLimiter:
+    """호출 간 최소 간격(60 / rpm 초) 보장."""
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+class SummaryJournal:
+    def __init__(self, alias: str, root: str = SUMMARY_DIR):
+        self.path = os.path.join(root, f"{index_alias.normalize_alias(alias)}.jsonl")
+        self.entries: Dict[str, Tuple[str, str]] = {}  # id → (digest, summary), 같은 id는 마지막 줄 우선
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue  # 중단으로 잘린 마지막 줄
+                    self.entries[e["id"]] = (e["digest"], e["summary"])
+
+    def get(self, uid: str, digest: str) -> Optional[str]:
+        hit = self.entries.get(uid)
+        return hit[1] if hit and hit[0] == digest else None
+
+    def append(self, uid: str, digest: str, summary: str) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": uid, "digest": digest, "summary": summary}, ensure_ascii=False) + "\n")
+        self.entries[uid] = (digest, summary)
+
+def ensure_summary_property(client, class_name: str) -> None:
+    """이전 스키마로 만든 클래스에 summary 속성 추가."""
+    props = [p["name"] for p in client.schema.get(class_name).get("properties", [])]
+    if "summary" not in props:
+        client.schema.property.create(class_name, {"name": "summary", "dataType": ["text"]})
+
+def _with_retry(fn, retries: int = SUMMARY_MAX_RETRIES):
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+def summarize_class(client, class_name: str, *, genai_client=None, rpm: float = SUMMARY_RPM,
+                    limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    class_name의 summary가 빈 청크를 채움. 저널에 있으면 복원, 없으면 생성(최대 limit건).
+    반환: {"stored": 이미 있음, "replayed": 저널 복원, "generated": 새로 생성, "failed": 실패, "pending": 남은 건수}
+    """
+    ensure_summary_property(client, class_name)
+    journal = SummaryJournal(index_alias.alias_of(class_name))
+    table_class = index_alias.table_class_name(class_name)
+    has_tables = table_class in [c["class"] for c in client.schema.get().get("classes", [])]
+    stats = {"stored": 0, "replayed": 0, "generated": 0, "failed": 0, "pending": 0}
+
+    todo = []
+    for obj in iter_class_objects(client, class_name, SUMMARY_PROPS, with_vector=False):
+        uid = obj.pop("_additional")["id"]
+        if (obj.get("summary") or "").strip():
+            stats["stored"] += 1
+            continue
+        if not (obj.get("content") or "").strip():
+            if not (has_tables and obj.get("table_id")):
+                continue
+            t = client.data_object.get_by_id(obj["table_id"], class_name=table_class) or {}
+            obj["table_json"] = (t.get("properties") or {}).get("table_json", "")
+        digest = prompt_digest(obj)
+        cached = journal.get(uid, digest)
+        if cached is not None:
+            client.data_object.update({"summary": cached}, class_name, uid)
+            stats["replayed"] += 1
+        else:
+            todo.append((uid, digest, obj))
+
+    if limit is not None:
+        stats["pending"] = max(0, len(todo) - limit)
+        todo = todo[:limit]
+    if todo and genai_client is None:
+        from search_answer import genai_client
+    limiter = RateLimiter(rpm)
+    print(f"📝 summaries '{class_name}': {stats['stored']} stored, {stats['replayed']} replayed, "
+          f"{len(todo)} to generate (~{len(todo) * limiter.interval / 60:.1f} min)", flush=True)
+
+    for k, (uid, digest, obj) in enumerate(todo, 1):
+        def call():
+            limiter.wait()
+            return generate_summary(genai_client, obj)
+        try:
+            summary = _with_retry(call)
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"⚠️ summary failed for {uid}: {e}", flush=True)
+            continue
+        journal.append(uid, digest, summary)
+        client.data_object.update({"summary": summary}, class_name, uid)
+        stats["generated"] += 1
+        if k % 50 == 0:
+            print(f"   … {k}/{len(todo)} summaries", flush=True)
+    print(f"✅ summaries '{class_name}': {stats}", flush=True)
+    return stats
+
+if __name__ == "__main__":
+    import weaviate
+    parser = argparse.ArgumentParser(description="청크별 조항 요약을 미리 생성해 summary 속성에 저장")
+    parser.add_argument("aliases", nargs="+", help="대상 alias (현재 가리키는 클래스에 저장)")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--rpm", type=float, default=SUMMARY_RPM)
+    parser.add_argument("--limit", type=int, default=None, help="이번 실행에서 생성할 최대 건수")
+    args = parser.parse_args()
+
+    wv = weaviate.Client(args.url)
+    for a in args.aliases:
+        summarize_class(wv, index_alias.get_alias_target(wv, a) or index_alias.normalize_alias(a),
+                        rpm=args.rpm, limit=args.limit)
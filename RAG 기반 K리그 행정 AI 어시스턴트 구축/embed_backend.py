@@ -0,0 +1,224 @@
+import os
+import re
+import time
+import random
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 임베딩 백엔드 (make_DB 인덱싱 / search_answer 질의 공용)
+# - "torch"     : 기존 SentenceTransformer (GPU 있으면 GPU, fp32)
+# - "torch-int8": Linear 레이어 int8 동적 양자화 (CPU, 추가 의존성 없음)
+# - "onnx-int8" : ONNX Runtime + int8 동적 양자화 (CPU, pip install onnx onnxruntime)
+# 모두 SentenceTransformer.encode와 같은 방식으로 호출.
+# 인덱스와 질의가 같은 백엔드를 쓰도록 설정은 여기 한 곳(EMBED_BACKEND)에서만 바꿈.
+# ──────────────────────────────────────────────────────────────────────────────
+EMBED_MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+EMBED_BACKEND = "torch"
+ONNX_CACHE_DIR = os.path.join("index_artifacts", "onnx")
+MIN_RECALL = 0.95  # evaluate_backend 자동 판정 기준(recall@k)
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, device: Optional[str] = None):
+        self.model_name = model_name
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.model = SentenceTransformer(model_name)
+        self.model.to(self.device)
+
+    @property
+    def cache_name(self) -> str:
+        """임베딩 캐시 키(백엔드마다 벡터가 조금씩 다르므로 분리)."""
+        return self.model_name if self.name == "torch" else f"{self.model_name}@{self.name}"
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               convert_to_tensor: bool = False, device=None, **kwargs):
+        return self.model.encode(
+            sentences, batch_size=batch_size, convert_to_numpy=convert_to_numpy,
+            convert_to_tensor=convert_to_tensor, device=device, **kwargs
+        )
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch-int8"
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, device: Optional[str] = None):
+        super().__init__(model_name, device="cpu")  # 동적 양자화 커널은 CPU 전용
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               convert_to_tensor: bool = False, device=None, **kwargs):
+        out = self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=True, **kwargs)
+        return torch.as_tensor(out, device=device) if convert_to_tensor else out
+
+class OnnxInt8Backend(TorchBackend):
+    """
+    SentenceTransformer의 Transformer 모듈을 ONNX로 내보낸 뒤 int8 동적 양자화.
+    변환 결과는 ONNX_CACHE_DIR에 저장해 두고 재사용. 풀링/정규화는 원 모델 설정을 그대로 따름.
+    """
+    name = "onnx-int8"
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, device: Optional[str] = None):
+        import onnxruntime as ort
+        super().__init__(model_name, device="cpu")
+        self._pooling = self.model[1]
+        self._normalize = any(type(m).__name__ == "Normalize" for m in self.model)
+        if not (self._pooling.pooling_mode_mean_tokens or self._pooling.pooling_mode_cls_token):
+            raise ValueError(f"unsupported pooling for onnx backend: {self._pooling.get_pooling_mode_str()}")
+        path = self._export_quantized()
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def _export_quantized(self) -> str:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        out_dir = os.path.join(ONNX_CACHE_DIR, re.sub(r"[^0-9A-Za-z._-]", "_", self.model_name))
+        fp32_path = os.path.join(out_dir, "model.onnx")
+        int8_path = os.path.join(out_dir, "model.int8.onnx")
+        if os.path.exists(int8_path):
+            return int8_path
+        os.makedirs(out_dir, exist_ok=True)
+
+        auto_model = self.model[0].auto_model.eval()
+        dummy = self.tokenizer(["임베딩 변환용 예시 문장"], return_tensors="pt")
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+        axes = {n: {0: "batch", 1: "seq"} for n in names}
+        axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+        with torch.no_grad():
+            torch.onnx.export(
+                auto_model, tuple(dummy[n] for n in names), fp32_path,
+                input_names=names, output_names=["last_hidden_state"],
+                dynamic_axes=axes, opset_version=14,
+            )
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        return int8_path
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self._pooling.pooling_mode_cls_token:
+            out = hidden[:, 0]
+        else:
+            m = mask[..., None].astype(np.float32)
+            out = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        if self._normalize:
+            out = out / np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               convert_to_tensor: bool = False, device=None, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        # 길이순으로 묶어 패딩 낭비를 줄이고, 결과는 원래 순서로 복원
+        order = np.argsort([-len(t) for t in texts])
+        out = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for i in range(0, len(texts), batch_size):
+            idx = order[i:i + batch_size]
+            enc = self.tokenizer(
+                [texts[j] for j in idx], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {n: enc[n].astype(np.int64) for n in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+            out[idx] = self._pool(hidden, enc["attention_mask"])
+        result = out[0] if single else out
+        return torch.as_tensor(result, device=device) if convert_to_tensor else result
+
+BACKENDS = {b.name: b for b in (TorchBackend, TorchInt8Backend, OnnxInt8Backend)}
+
+_loaded: Dict[str, TorchBackend] = {}
+_load_lock = threading.Lock()
+
+def load_embed_backend(name: str = EMBED_BACKEND, model_name: str = EMBED_MODEL_NAME):
+    """설정된 백엔드 인스턴스(프로세스당 1개)."""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown embed backend '{name}' (choose from {sorted(BACKENDS)})")
+    with _load_lock:
+        key = f"{name}|{model_name}"
+        if key not in _loaded:
+            _loaded[key] = BACKENDS[name](model_name)
+        return _loaded[key]
+
+# ──────────────────────────────────────────────────────────────────────────────
+# fp32 대비 정확도 자동 비교: recall@k(같은 말뭉치에서 top-k 겹침) + 벡터 코사인 + 처리량
+# ──────────────────────────────────────────────────────────────────────────────
+def _normalize(v: np.ndarray) -> np.ndarray:
+    return v / np.clip(np.linalg.norm(v, axis=1, keepdims=True), 1e-12, None)
+
+def _timed_encode(backend, texts: List[str], batch_size: int):
+    t0 = time.perf_counter()
+    vecs = np.asarray(backend.encode(texts, batch_size=batch_size, convert_to_numpy=True), dtype=np.float32)
+    return vecs, time.perf_counter() - t0
+
+def evaluate_backend(candidate: str, corpus: List[str], queries: List[str], *,
+                     reference: str = "torch", k: int = 10, batch_size: int = 64) -> Dict[str, float]:
+    ref, cand = load_embed_backend(reference), load_embed_backend(candidate)
+    ref_docs, t_ref = _timed_encode(ref, corpus, batch_size)
+    cand_docs, t_cand = _timed_encode(cand, corpus, batch_size)
+    ref_q, _ = _timed_encode(ref, queries, batch_size)
+    cand_q, _ = _timed_encode(cand, queries, batch_size)
+
+    k = min(k, len(corpus))
+    ref_top = np.argsort(-(_normalize(ref_q) @ _normalize(ref_docs).T), axis=1)[:, :k]
+    cand_top = np.argsort(-(_normalize(cand_q) @ _normalize(cand_docs).T), axis=1)[:, :k]
+    recall = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+    cos = float(np.mean(np.sum(_normalize(ref_docs) * _normalize(cand_docs), axis=1)))
+    return {
+        "recall_at_k": recall,
+        "k": k,
+        "mean_vector_cosine": cos,
+        "reference_texts_per_sec": len(corpus) / t_ref if t_ref else 0.0,
+        "candidate_texts_per_sec": len(corpus) / t_cand if t_cand else 0.0,
+        "speedup": (t_ref / t_cand) if t_cand else 0.0,
+    }
+
+def _sample_corpus(data_root: str, limit: int, seed: int = 42) -> List[str]:
+    import glob
+    from doc_parser import load_entries
+    texts = []
+    for path in sorted(glob.glob(os.path.join(data_root, "*", "**", "*.json"), recursive=True)):
+        for d in load_entries(path) or []:
+            t = (d.get("content") or "").strip()
+            if t:
+                texts.append(t)
+    random.Random(seed).shuffle(texts)
+    return texts[:limit]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 fp32 대비 recall 비교")
+    parser.add_argument("--backend", default="onnx-int8", choices=sorted(BACKENDS))
+    parser.add_argument("--data-root", required=True, help="make_DB.DATA_ROOT 형식의 규정 JSON 폴더")
+    parser.add_argument("--queries", help="질의 파일(한 줄에 1개). 없으면 말뭉치 청크 첫 문장을 질의로 사용")
+    parser.add_argument("--limit", type=int, default=2000, help="비교에 쓸 청크 수")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=MIN_RECALL)
+    args = parser.parse_args()
+
+    corpus = _sample_corpus(args.data_root, args.limit)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [q.strip() for q in f if q.strip()]
+    else:
+        queries = [re.split(r"(?<=[\.!?])\s+", t)[0][:200] for t in corpus[:200]]
+
+    res = evaluate_backend(args.backend, corpus, queries, k=args.k)
+    print(f"📏 {args.backend} vs torch: {res}")
+    if res["recall_at_k"] < args.min_recall:
+        print(f"❌ recall@{res['k']} {res['recall_at_k']:.3f} < {args.min_recall}")
+        raise SystemExit(1)
+    print(f"✅ recall@{res['k']} {res['recall_at_k']:.3f} ≥ {args.min_recall}")
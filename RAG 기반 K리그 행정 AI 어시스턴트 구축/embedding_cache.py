@@ -0,0 +1,188 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 디스크 임베딩 캐시 (make_DB 인덱싱 / search_answer 질의 공용)
+# - key = sha256(모델명 + 텍스트) → 같은 텍스트는 모델 추론 없이 재사용
+# - 벡터: <dir>/vectors.f32 (capacity x dim float32 memmap)
+# - 인덱스: <dir>/index.sqlite (key → slot, 마지막 사용 시각) → 용량 초과 시 LRU 슬롯 재사용
+# - 여러 프로세스(인덱서/웹앱)가 같은 디렉터리를 써도 되도록 조회/기록을 sqlite 트랜잭션으로 직렬화
+# - 질의 경로(웹앱)는 readonly=True: last_used 갱신/미스 기록 없이 조회만 → 요청마다 쓰기 잠금을 잡지 않음
+# ──────────────────────────────────────────────────────────────────────────────
+EMBED_CACHE_DIR = os.path.join("index_artifacts", "embed_cache")
+EMBED_CACHE_CAPACITY = 200_000   # 슬롯 수 (768차원 기준 약 600MB)
+
+def _safe_dirname(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._-]", "_", name)
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, dim: int, *, cache_dir: str = EMBED_CACHE_DIR,
+                 capacity: int = EMBED_CACHE_CAPACITY):
+        self.model_name = model_name
+        self.dir = os.path.join(cache_dir, _safe_dirname(model_name))
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.dir, "index.sqlite"), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, slot INTEGER UNIQUE, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used)")
+
+        # 기존 캐시가 있으면 생성 당시의 차원/용량을 따름
+        meta = dict(self._db.execute("SELECT k, v FROM meta").fetchall())
+        if meta:
+            if int(meta["dim"]) != dim:
+                raise ValueError(f"embedding cache dim mismatch: {meta['dim']} != {dim} ({self.dir})")
+            capacity = int(meta["capacity"])
+        else:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?), ('capacity', ?)",
+                             (str(dim), str(capacity)))
+        self.dim, self.capacity = dim, capacity
+
+        vec_path = os.path.join(self.dir, "vectors.f32")
+        mode = "r+" if os.path.exists(vec_path) else "w+"
+        self._vecs = np.memmap(vec_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # ── 조회/기록 ───────────────────────────────────────────────────────────
+    def _lookup_slots(self, keys: Sequence[str]) -> Dict[str, int]:
+        slots: Dict[str, int] = {}
+        uniq = list(dict.fromkeys(keys))
+        for i in range(0, len(uniq), 500):
+            part = uniq[i:i + 500]
+            slots.update(self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall())
+        return slots
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                found = {k: np.array(self._vecs[slot]) for k, slot in self._lookup_slots(keys).items()}
+                if found:
+                    now = time.time()
+                    self._db.executemany("UPDATE entries SET last_used=? WHERE key=?",
+                                         [(now, k) for k in found])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return found
+
+    def peek_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """get_many의 읽기 전용 버전: last_used를 갱신하지 않음(쓰기 트랜잭션 없음)."""
+        if not keys:
+            return {}
+        with self._lock:
+            return {k: np.array(self._vecs[slot]) for k, slot in self._lookup_slots(keys).items()}
+
+    def put_many(self, keys: Sequence[str], vecs: np.ndarray) -> None:
+        if not len(keys):
+            return
+        vecs = np.asarray(vecs, dtype=np.float32).reshape(len(keys), self.dim)
+        items = list(dict(zip(keys, vecs)).items())[:self.capacity]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._lookup_slots([k for k, _ in items])
+                new_items = [(k, v) for k, v in items if k not in existing]
+                slots = self._allocate(len(new_items))
+                now = time.time()
+                for (_, v), slot in zip(new_items, slots):
+                    self._vecs[slot] = v
+                self._vecs.flush()  # 벡터를 먼저 기록한 뒤 인덱스 커밋
+                self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                                     [(k, slot, now) for (k, _), slot in zip(new_items, slots)])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _allocate(self, n: int) -> List[int]:
+        """빈 슬롯을 먼저 쓰고, 모자라면 가장 오래 안 쓴 슬롯을 회수(트랜잭션 안에서 호출)."""
+        if n <= 0:
+            return []
+        # 슬롯은 회수 즉시 재사용되므로 항상 0..size-1이 채워져 있음
+        size = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        slots = list(range(size, min(self.capacity, size + n)))
+        need = n - len(slots)
+        if need > 0:
+            victims = self._db.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (need,)
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key=?", [(k,) for k, _ in victims])
+            slots += [slot for _, slot in victims]
+        return slots
+
+    # ── 모델 read-through ───────────────────────────────────────────────────
+    def encode(self, model, texts, *, readonly: bool = False, **encode_kwargs) -> np.ndarray:
+        """
+        model.encode의 캐시 버전. 단일 문자열이면 (dim,), 리스트면 (N, dim) float32 반환.
+        readonly=True면 조회만 하고 미스는 디스크에 기록하지 않음(질의 경로용).
+        encode_kwargs는 batch_size처럼 출력값에 영향이 없는 인자만 넘길 것.
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        keys = [self.key(self.model_name, t) for t in texts]
+        found = self.peek_many(keys) if readonly else self.get_many(keys)
+
+        miss_idx = [i for i, k in enumerate(keys) if k not in found]
+        with self._lock:
+            self.hits += len(texts) - len(miss_idx)
+            self.misses += len(miss_idx)
+        if miss_idx:
+            miss_texts = list(dict.fromkeys(texts[i] for i in miss_idx))
+            enc = np.asarray(model.encode(miss_texts, convert_to_numpy=True, **encode_kwargs), dtype=np.float32)
+            miss_keys = [self.key(self.model_name, t) for t in miss_texts]
+            if not readonly:
+                self.put_many(miss_keys, enc)
+            found.update(zip(miss_keys, enc))
+
+        out = np.stack([found[k] for k in keys]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        return out[0] if single else out
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total) if total else 0.0,
+            "size": size,
+            "capacity": self.capacity,
+        }
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model_name: str, model, **kwargs) -> EmbeddingCache:
+    """모델명별 캐시 싱글턴."""
+    with _caches_lock:
+        cache: Optional[EmbeddingCache] = _caches.get(model_name)
+        if cache is None:
+            cache = EmbeddingCache(model_name, model.get_sentence_embedding_dimension(), **kwargs)
+            _caches[model_name] = cache
+        return cache
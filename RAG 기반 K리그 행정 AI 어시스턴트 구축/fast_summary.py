@@ -0,0 +1,104 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 빠른 모드 요약 (LLM 호출 없음, 추출 요약)
+# - 본문을 줄/문장으로 나누고 줄 머리의 "제N조(의M)" / "①·제N항" / "부칙"으로 각 문장의 조항 번호를 추적
+# - 문장 임베딩(디스크 캐시 공유)과 이미 계산한 질의 벡터의 코사인으로 문서당 상위 문장 선택
+# - 출력은 LLM 요약과 같은 줄 형식: "- [문서명][제oo조 제x항] 문장" / "- (조항번호 없음): 문장"
+# - 색인 시 저장한 summary(doc_summary.py)가 있으면 그대로 사용
+# ──────────────────────────────────────────────────────────────────────────────
+FAST_SUMMARY_SENTENCES = 2        # 문서당 뽑는 문장 수
+FAST_SUMMARY_MAX_CANDIDATES = 24  # 문서당 점수 매길 최대 문장 수 (앞에서부터)
+FAST_SUMMARY_MAX_CHARS = 180      # 줄당 문장 길이 상한
+FAST_SUMMARY_MIN_CHARS = 8        # 이보다 짧은 조각(번호만 있는 줄 등)은 후보에서 제외
+
+_CIRCLED = {chr(0x2460 + i): i + 1 for i in range(20)}  # ①..⑳
+_ARTICLE_HEAD = re.compile(r"^\s*(부칙\s*)?제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+_PARA_HEAD = re.compile(r"^\s*(?:([①-⑳])|제\s*(\d+)\s*항)")
+_SUPPLEMENT_HEAD = re.compile(r"^\s*부\s*칙")
+_SENT_SPLIT = re.compile(r"(?<=[.?!。])\s+")
+
+def _article_label(supplement: bool, art: str, sub: Optional[str]) -> str:
+    label = f"제{int(art)}조의{int(sub)}" if sub else f"제{int(art)}조"
+    return f"부칙 {label}" if supplement else label
+
+def labeled_sentences(section_heading: str, content: str) -> List[Tuple[str, str]]:
+    """본문 → [(조항 라벨 또는 "", 문장)]. 라벨은 섹션 제목의 조문에서 시작해 줄 머리를 만날 때마다 갱신."""
+    supplement = bool(_SUPPLEMENT_HEAD.match(section_heading or ""))
+    m = _ARTICLE_HEAD.match(section_heading or "")
+    article = _article_label(supplement or bool(m.group(1)), m.group(2), m.group(3)) if m else ""
+    para = ""
+    out = []
+    for line in (content or "").splitlines():
+        if _SUPPLEMENT_HEAD.match(line) and not _ARTICLE_HEAD.match(line):
+            supplement, article, para = True, "", ""
+        a = _ARTICLE_HEAD.match(line)
+        if a:
+            article, para = _article_label(supplement or bool(a.group(1)), a.group(2), a.group(3)), ""
+        p = _PARA_HEAD.match(line)
+        if p and article:
+            para = f"제{_CIRCLED[p.group(1)] if p.group(1) else int(p.group(2))}항"
+        label = f"{article} {para}".strip()
+        for sent in _SENT_SPLIT.split(line):
+            sent = " ".join(sent.split())
+            if len(sent) >= FAST_SUMMARY_MIN_CHARS:
+                out.append((label, sent))
+    return out
+
+def _clip(text: str, n: int = FAST_SUMMARY_MAX_CHARS) -> str:
+    return text if len(text) <= n else text[:n - 1].rstrip() + "…"
+
+def _format_line(title: str, label: str, sent: str) -> str:
+    if label:
+        return f"- [{title}][{label}] {_clip(sent)}"
+    return f"- (조항번호 없음): {_clip(sent)}"
+
+def extractive_summarize(
+    docs: List[Dict[str, Any]],
+    query_vec=None,
+    *,
+    encode: Optional[Callable[[List[str]], np.ndarray]] = None,
+    per_doc: int = FAST_SUMMARY_SENTENCES
+) -> Tuple[List[str], str]:
+    """summarize_documents와 같은 (summaries, block) 반환. encode/질의 벡터가 없으면 문서 앞쪽 문장 사용."""
+    cands: List[List[Tuple[str, str]]] = []
+    for d in docs:
+        if (d.get("summary") or "").strip():
+            cands.append([])
+            continue
+        body = (d.get("content") or "").strip()
+        sents = labeled_sentences(d.get("section_heading") or "", body)[:FAST_SUMMARY_MAX_CANDIDATES]
+        if not sents and (d.get("table_json") or "").strip():
+            sents = [("", d["table_json"].strip())]
+        cands.append(sents)
+
+    # 전체 문서의 후보 문장을 한 번에 임베딩
+    flat = [s for sents in cands for _, s in sents]
+    scores = None
+    if flat and encode is not None and query_vec is not None:
+        try:
+            vecs = np.asarray(encode(flat), dtype=np.float32)
+            q = np.asarray(query_vec, dtype=np.float32).ravel()
+            scores = (vecs @ q) / (np.linalg.norm(vecs, axis=1) * max(float(np.linalg.norm(q)), 1e-12) + 1e-12)
+        except Exception as e:
+            print(f"⚠️ fast summary scoring failed ({e}) → leading sentences", flush=True)
+
+    texts, pos = [], 0
+    for d, sents in zip(docs, cands):
+        stored = (d.get("summary") or "").strip()
+        if stored:
+            texts.append(stored)
+            continue
+        if scores is not None and sents:
+            order = np.argsort(-scores[pos:pos + len(sents)], kind="stable")[:per_doc]
+            picked = sorted(int(i) for i in order)  # 원문 순서로 출력
+        else:
+            picked = list(range(min(per_doc, len(sents))))
+        pos += len(sents)
+        title = (d.get("title") or "").strip()
+        texts.append("\n".join(_format_line(title, *sents[i]) for i in picked))
+    summaries = [f"\n{t}" for t in texts]
+    return summaries, "\n\n".join(summaries)
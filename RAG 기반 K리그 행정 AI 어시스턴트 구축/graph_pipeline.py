@@ -1,14 +1,24 @@
+import time
+import threading
+import contextvars
+from collections import deque
 from typing import TypedDict, List, Dict, Any, Literal, Optional
 from langgraph.graph import StateGraph, END
 from search_answer import (
     normalize_query_for_stage1, stage1_retrieve, fetch_candidates_by_ids, rerank_with_late_fusion,
-    refine_near_vector_fallback, fetch_final_docs_in_order,
-    summarize_documents, build_final_prompt_qa, generate_final_answer_text_qa, get_filtered_news_for_docs,
+    refine_near_vector_fallback, fetch_final_docs_in_order, retrieve_single_pass,
+    summarize_documents, summarize_documents_fast, build_final_prompt_qa, generate_final_answer_text_qa, get_filtered_news_for_docs,
+    prefetch_news, join_news, resolve_index_class, attach_vectors, keyword_candidates, promote_ids,
+    index_version, retrieval_cache_key, get_cached_retrieval, put_cached_retrieval, encode_query, ids_exist,
+    retrieve_federated, fetch_final_docs_federated, ids_exist_federated, needs_translation,
     INDEX_CLASS, NEAR_CERTAINTY, TOPK_STAGE1, TOPK_FINAL,
-    LATE_FUSION_ALPHA, LOW_CONF_FALLBACK
+    LATE_FUSION_ALPHA, LOW_CONF_FALLBACK, RETRIEVAL_MODE
 )
 from case_search import get_creative_solutions, build_final_prompt_case, generate_final_answer_text_case
 from assistant_answer import build_final_prompt_assistant, generate_final_answer_text_assistant
+from answer_cache import answer_cache, ANSWER_CACHE_ENABLED
+from topic_router import get_router, rank_query, pick_topics
+from index_alias import normalize_alias
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 주제 라우팅 설정 (필요시 클래스명 교체)
@@ -32,6 +42,11 @@ TOPIC_CONFIG: Dict[str, Dict[str, str]] = {
     },
 }
 
+FEDERATED_TOPIC = "all"  # 이 소주제면 TOPIC_CONFIG의 모든 클래스를 동시에 검색해 병합
+AUTO_TOPIC = "auto"      # 이 소주제이거나 비어 있으면 질의 벡터로 라우팅(topic_router)
+SUMMARY_MODES = ("llm", "fast")  # llm = 저장 요약 + 없는 문서만 Gemini, fast = 로컬 추출 요약(LLM은 최종 답변 1회)
+DEFAULT_SUMMARY_MODE = "llm"
+
 DEFAULT_CONFIG: Dict[str, str] = {
     "index_class": INDEX_CLASS,  # 기존 기본값
     "system_hint": "당신은 축구 규정 어시스턴트입니다. 관련 규정과 절차를 근거와 함께 한국어로 답하세요."
@@ -46,21 +61,36 @@ class State(TypedDict, total=False):
     sub_topic: Optional[str]
     mode: Literal["qa", "cases", "assistant"]
 
-    index_class: str
+    index_alias: str   # TOPIC_CONFIG의 논리 클래스명
+    index_class: str   # alias가 가리키는 실제(버전) 클래스명 (통합 검색이면 클래스명을 '+'로 이은 캐시 키)
+    index_classes: List[str]  # 통합 검색(sub_topic="all") 대상 실제 클래스명들
+    auto_route: bool          # 소주제 자동 라우팅 대상
+    routed_topics: List[str]  # 라우터가 고른 소주제(1개, 근소하면 2개)
+    translation: Dict[str, Any]  # 라우팅 중 만든 번역문/벡터 {"query", "query_vec"} → pretranslate에서 재사용
     system_hint: str
 
     history_summary: str
+    summary_mode: Literal["llm", "fast"]
+    timings: Dict[str, float]   # 단계별 소요 시간(ms) → result["timings"]
 
     # 주제 1
+    cache_key: Any        # 검색 캐시 키 (index_class, 정규화 원문 질의)
+    cache_version: str    # 조회 시점의 색인 버전 스탬프
+    retrieval_cached: bool
+    answer_cached: bool   # 의미 캐시에서 최종 result를 그대로 가져옴
     query_vec: Any
     ids_stage1: List[Any]
     id_list: List[str]
+    stage1_vecs: Dict[str, Any]   # 1차 후보 id → 저장 벡터 (리랭킹/뉴스 비교에서 재임베딩 방지)
+    kw_scores: Dict[str, float]   # BM25 후보 id → 정규화 점수
+    article_ids: List[str]        # 조문 번호 정확 일치 청크 id (있으면 폴백 생략)
     cands: List[Dict[str, Any]]
     top_ids: List[str]
     top_score: float
     docs: List[Dict[str, Any]]
     summaries: List[str]
     summary_block: str
+    news_future: Any   # prefetch_news Future (답변 캐시를 놓친 시점에 시작, 최종 답변 직전에 합류)
     filtered_news: List[Dict[str, Any]]
     news_block: str
     final_answer: str
@@ -77,39 +107,249 @@ def node_init(s: State) -> State:
     # 1) 모드 라우팅
     mode = s.get('big_topic', "qa")
     s['mode'] = mode
+    sm = (s.get("summary_mode") or DEFAULT_SUMMARY_MODE).strip().lower()
+    s["summary_mode"] = sm if sm in SUMMARY_MODES else DEFAULT_SUMMARY_MODE
+    s["timings"] = {}
 
-    # 2) QA일 때만 소주제로 인덱스/힌트 결정
+    # 2) QA일 때만 소주제로 인덱스/힌트 결정 (비어 있거나 auto면 route_topic 노드에서)
     if (mode == "qa"):
-        t = (s.get("sub_topic") or "k_league").strip()
-        cfg = TOPIC_CONFIG.get(t, DEFAULT_CONFIG)
-        s["index_class"] = cfg["index_class"]
-        s["system_hint"] = cfg["system_hint"]
+        t = (s.get("sub_topic") or AUTO_TOPIC).strip()
+        if t == AUTO_TOPIC:
+            s["auto_route"] = True
+        elif t == FEDERATED_TOPIC:
+            _apply_topics(s, list(TOPIC_CONFIG), alias=FEDERATED_TOPIC, system_hint=DEFAULT_CONFIG["system_hint"])
+        else:
+            cfg = TOPIC_CONFIG.get(t, DEFAULT_CONFIG)
+            s["index_alias"] = cfg["index_class"]
+            s["index_class"] = resolve_index_class(cfg["index_class"])
+            s["system_hint"] = cfg["system_hint"]
     return s
 
+def _apply_topics(s: State, topics: List[str], *, alias: str = None, system_hint: str = None) -> None:
+    """여러 소주제를 통합 검색 대상으로 설정 (힌트는 첫 소주제 기준)."""
+    classes = [resolve_index_class(TOPIC_CONFIG[t]["index_class"]) for t in topics]
+    s.update({
+        "index_alias": alias or "+".join(normalize_alias(TOPIC_CONFIG[t]["index_class"]) for t in topics),
+        "index_classes": classes, "index_class": "+".join(classes),
+        "system_hint": system_hint or TOPIC_CONFIG[topics[0]]["system_hint"],
+    })
+
 def route_mode(s: State) -> str:
-    return s.get("mode", "qa")
+    mode = s.get("mode", "qa")
+    return "qa_auto" if mode == "qa" and s.get("auto_route") else mode
+
+def node_route_topic(s: State) -> State:
+    # 질의 벡터 ↔ 클래스 프로토타입으로 소주제 선택 (라우터 산출물이 없으면 기존 기본값)
+    # 번역 후 검색하는 주제는 번역문 벡터로 채점 → 검색과 같은 입력으로 라우팅 (topic_router.rank_query)
+    uq = s["user_query"]
+    qv = encode_query(uq)
+    by_alias = {normalize_alias(c["index_class"]): t for t, c in TOPIC_CONFIG.items()}
+    translated = [a for a in by_alias if needs_translation(a)]
+
+    def translate():
+        tq = normalize_query_for_stage1(uq, index_class=translated[0])
+        if tq == uq:
+            return None
+        s["translation"] = {"query": tq, "query_vec": encode_query(tq)}
+        return s["translation"]["query_vec"]
+
+    router = get_router()
+    ranked = rank_query(router, qv, list(by_alias), translated_aliases=translated, translate=translate) if router else []
+    topics = [by_alias[a] for a in pick_topics(ranked)]
+    s["query_vec"] = qv
+    if not topics:
+        cfg = DEFAULT_CONFIG
+        s.update({
+            "index_alias": cfg["index_class"], "index_class": resolve_index_class(cfg["index_class"]),
+            "system_hint": cfg["system_hint"],
+        })
+        return s
+    s.update({"routed_topics": topics, "sub_topic": topics[0]})
+    if len(topics) == 1:
+        cfg = TOPIC_CONFIG[topics[0]]
+        s.update({
+            "index_alias": cfg["index_class"], "index_class": resolve_index_class(cfg["index_class"]),
+            "system_hint": cfg["system_hint"],
+        })
+    else:
+        _apply_topics(s, topics)  # 1·2위가 근소 → 두 클래스 통합 검색
+    return s
 
 def node_router(s: State) -> State:
     return s
 
 # ── QA(Q/A) 플로우 ────────────────────────────────────────────────────
+def _index_version(s: State) -> str:
+    if s.get("index_classes"):
+        return "|".join(index_version(c) for c in s["index_classes"])
+    return index_version(s["index_class"])
+
+def node_cache_lookup(s: State) -> State:
+    # 같은 질문이면 번역/임베딩/검색을 건너뜀 (문서는 답변 캐시까지 놓친 경우에만 id로 조회)
+    s["retrieval_cached"] = False
+    try:
+        key = retrieval_cache_key(s["user_query"], s["index_class"])
+        version = _index_version(s)
+        s.update({"cache_key": key, "cache_version": version})
+        hit = get_cached_retrieval(key, version)
+        if hit:
+            s.update({
+                "user_query": hit["query"], "query_vec": hit["query_vec"],
+                "top_ids": hit["top_ids"], "top_score": hit["top_score"],
+                "stage1_vecs": hit["vectors"], "retrieval_cached": True,
+            })
+    except Exception:
+        pass  # 캐시 오류 시 일반 검색 경로
+    return s
+
+def route_cache(s: State) -> str:
+    return "hit" if s.get("retrieval_cached") else "miss"
+
+def node_embed_query(s: State) -> State:
+    # 답변 캐시 조회와 1차 검색이 같은 질의 벡터를 사용
+    if s.get("query_vec") is None:
+        s["query_vec"] = encode_query(s["user_query"])
+    return s
+
+def _answer_topic(s: State) -> str:
+    """답변 캐시 구역: 주제별, 빠른 모드 답변은 따로 (LLM 요약 답변과 섞이지 않게)."""
+    topic = s.get("index_alias") or s["index_class"]
+    return f"{topic}#fast" if s.get("summary_mode") == "fast" else topic
+
+def _answer_cacheable(s: State) -> bool:
+    """히스토리가 있으면 같은 문장이라도 가리키는 대상이 달라질 수 있어 캐시 조회/저장 생략."""
+    return ANSWER_CACHE_ENABLED and not (s.get("history_summary") or "").strip()
+
+def node_answer_lookup(s: State) -> State:
+    s["answer_cached"] = False
+    if not _answer_cacheable(s):
+        _start_news(s)
+        return s
+    try:
+        ix, classes = s["index_class"], s.get("index_classes")
+        hit = answer_cache.lookup(
+            _answer_topic(s), s["query_vec"], s.get("cache_version") or _index_version(s),
+            still_valid=lambda ids: ids_exist_federated(classes, ids) if classes else ids_exist(ix, ids)
+        )
+    except Exception:
+        hit = None
+    if hit:
+        hit["sub_topic"] = s.get("sub_topic")
+        hit["routed_topics"] = s.get("routed_topics")
+        hit["timings"] = {}
+        s.update({"result": hit, "answer_cached": True})
+    else:
+        _start_news(s)
+    return s
+
+# 요청(graph_generate_answer)마다 시작한 뉴스 Future 목록 → 오류로 중간에 끝나도 정리
+_news_futures: contextvars.ContextVar = contextvars.ContextVar("news_futures", default=None)
+
+def _start_news(s: State) -> None:
+    # 뉴스 조회는 질의에만 의존 → 답변을 새로 만들어야 할 때 검색/요약과 동시에 진행
+    if s.get("news_future") is None:
+        s["news_future"] = prefetch_news(s["user_query"], max_keep=5)
+        pending = _news_futures.get()
+        if pending is not None and s["news_future"] is not None:
+            pending.append(s["news_future"])
+
+def _discard_news(fut) -> None:
+    """떼어낸 뉴스 조회가 끝나면 결과/예외를 꺼내 버림 (요청은 이미 끝남)."""
+    if not fut.cancelled():
+        fut.exception()
+
+def _release_news(futures: List[Any]) -> None:
+    """합류하지 못한 뉴스 조회 정리: 시작 전이면 취소, 진행 중이면 기다리지 않고 떼어냄."""
+    for fut in futures:
+        if not fut.done() and not fut.cancel():
+            fut.add_done_callback(_discard_news)
+
+def route_answer(s: State) -> str:
+    if s.get("answer_cached"):
+        return "answer_hit"
+    if s.get("retrieval_cached"):
+        return "retrieval_hit"
+    return route_retrieval(s)
+
+def node_cached_fetch(s: State) -> State:
+    if s.get("index_classes"):
+        docs = fetch_final_docs_federated(s["top_ids"], index_classes=s["index_classes"])
+    else:
+        docs = fetch_final_docs_in_order(s["top_ids"], index_class=s["index_class"])
+    s["docs"] = attach_vectors(docs, s.get("stage1_vecs") or {})
+    return s
+
+def node_cache_store(s: State) -> State:
+    if s.get("cache_key") is not None:
+        put_cached_retrieval(
+            s["cache_key"], s.get("cache_version", ""),
+            query=s["user_query"], query_vec=s["query_vec"], docs=s.get("docs") or [],
+            top_score=s.get("top_score", 0.0), vectors=s.get("stage1_vecs")
+        )
+    return s
+
 def node_pretranslate(s: State) -> State:
     try:
         uq = s["user_query"]
-        ix = s["index_class"]
+        ix = s.get("index_alias") or s["index_class"]
+        t = s.get("translation")
+        if t and needs_translation(ix):  # 라우팅 때 번역한 결과 재사용 (번역 호출 1회)
+            s.update({"user_query": t["query"], "query_vec": t["query_vec"]})
+            return s
         new_q = normalize_query_for_stage1(uq, index_class=ix)
+        if new_q != uq:
+            s["query_vec"] = None  # 번역되면 라우팅에 쓴 원문 벡터 대신 번역문으로 다시 임베딩
         s["user_query"] = new_q
     except Exception:
         # 번역 실패 시 원문 유지 (안전 폴백)
         pass
     return s
 
+def route_retrieval(s: State) -> str:
+    if s.get("index_classes"):
+        return "federated"
+    return "single" if RETRIEVAL_MODE == "single" else "legacy"
+
+def node_federated(s: State) -> State:
+    # 모든 주제 클래스를 병렬 검색 → 전체 후보 기준으로 점수 정규화 후 하나의 순위로 병합
+    r = retrieve_federated(
+        s["user_query"],
+        index_classes=s["index_classes"], near_certainty=NEAR_CERTAINTY,
+        topk_stage1=TOPK_STAGE1, topk_final=TOPK_FINAL,
+        alpha=LATE_FUSION_ALPHA, low_conf=LOW_CONF_FALLBACK, query_vec=s.get("query_vec")
+    )
+    s.update({
+        "query_vec": r["query_vec"], "ids_stage1": r["ids_stage1"], "id_list": r["id_list"],
+        "stage1_vecs": r["vectors"], "top_ids": r["top_ids"], "top_score": r["top_score"], "docs": r["docs"],
+        "article_ids": r["article_ids"],
+    })
+    return s
+
+def node_retrieve(s: State) -> State:
+    # 검색+리랭킹+폴백을 near_vector 1회로 (stage1 → fetch → rerank → fallback/finalfetch 대체)
+    r = retrieve_single_pass(
+        s["user_query"],
+        index_class=s["index_class"], near_certainty=NEAR_CERTAINTY,
+        topk_stage1=TOPK_STAGE1, topk_final=TOPK_FINAL,
+        alpha=LATE_FUSION_ALPHA, low_conf=LOW_CONF_FALLBACK, query_vec=s.get("query_vec")
+    )
+    s.update({
+        "query_vec": r["query_vec"], "ids_stage1": r["ids_stage1"], "id_list": r["id_list"],
+        "stage1_vecs": r["vectors"], "top_ids": r["top_ids"], "top_score": r["top_score"], "docs": r["docs"],
+        "article_ids": r["article_ids"],
+    })
+    return s
+
 def node_stage1(s: State) -> State:
-    qv, ids, id_list = stage1_retrieve(
+    qv, ids, id_list, vecs = stage1_retrieve(
         s["user_query"],
-        index_class=s["index_class"], near_certainty=NEAR_CERTAINTY, topk=TOPK_STAGE1
+        index_class=s["index_class"], near_certainty=NEAR_CERTAINTY, topk=TOPK_STAGE1,
+        query_vec=s.get("query_vec")
     )
-    s.update({"query_vec": qv, "ids_stage1": ids, "id_list": id_list})
+    kw_scores, article_ids = keyword_candidates(s["user_query"], index_class=s["index_class"])
+    id_list = list(dict.fromkeys(id_list + article_ids + list(kw_scores)))  # 키워드 후보도 함께 fetch
+    s.update({"query_vec": qv, "ids_stage1": ids, "id_list": id_list, "stage1_vecs": vecs,
+              "kw_scores": kw_scores, "article_ids": article_ids})
     return s
 
 def node_fetch(s: State) -> State:
@@ -119,28 +359,40 @@ def node_fetch(s: State) -> State:
 def node_rerank(s: State) -> State:
     top_ids, top_score = rerank_with_late_fusion(
         s["query_vec"], s["ids_stage1"], s["cands"],
-        alpha=LATE_FUSION_ALPHA, topk=TOPK_FINAL
+        alpha=LATE_FUSION_ALPHA, topk=TOPK_FINAL, vectors=s.get("stage1_vecs"),
+        keyword_scores=s.get("kw_scores")
     )
+    if s.get("article_ids"):
+        top_ids = promote_ids(top_ids, s["article_ids"], TOPK_FINAL)
     s.update({"top_ids": top_ids, "top_score": top_score})
     return s
 
 def need_fallback(s: State) -> bool:
+    if s.get("article_ids"):
+        return False  # 조문 번호 정확 일치 → 조회 결과 그대로 사용
     return (not s.get("top_ids")) or (s.get("top_score", 0.0) < LOW_CONF_FALLBACK)
 
 def node_fallback(s: State) -> State:
-    s["docs"] = refine_near_vector_fallback(
+    docs = refine_near_vector_fallback(
         s["id_list"], s["query_vec"],
         index_class=s["index_class"], near_certainty=NEAR_CERTAINTY, topk=TOPK_FINAL
     )
+    s["docs"] = attach_vectors(docs, s.get("stage1_vecs") or {})
     return s
 
 def node_finalfetch(s: State) -> State:
-    s["docs"] = fetch_final_docs_in_order(s["top_ids"], index_class=s["index_class"])
+    docs = fetch_final_docs_in_order(s["top_ids"], index_class=s["index_class"])
+    s["docs"] = attach_vectors(docs, s.get("stage1_vecs") or {})
     return s
 
-def node_newsfilter(s: State) -> State:
+def _join_news(s: State) -> State:
+    # 합류 지점: 미리 받아 둔 뉴스(벡터 포함)와 문서의 유사도 매칭만
+    t0 = time.perf_counter()
+    fut = s.get("news_future")
+    prefetched = join_news(fut) if fut is not None else None
+    s.setdefault("timings", {})["news_wait_ms"] = round((time.perf_counter() - t0) * 1000, 1)
     filtered_news, _sim, news_block = get_filtered_news_for_docs(
-        s["user_query"], s["docs"], max_keep=5
+        s["user_query"], s["docs"], max_keep=5, prefetched=prefetched
     )
     s.update({
         "filtered_news": filtered_news,
@@ -149,12 +401,16 @@ def node_newsfilter(s: State) -> State:
     })
     return s
 
-def node_summarize(s: State) -> State:
-    summaries, sb = summarize_documents(s["docs"])
-    s.update({"summaries": summaries, "summary_block": sb})
-    return s
-
 def node_final_answer_qa(s: State) -> State:
+    # 요약은 색인 시 저장된 summary를 모으는 단계 → 별도 노드 없이 여기서 (summary 없는 문서만 LLM)
+    t0 = time.perf_counter()
+    if s.get("summary_mode") == "fast":
+        summaries, sb = summarize_documents_fast(s["docs"], s.get("query_vec"))
+    else:
+        summaries, sb = summarize_documents(s["docs"], query_vec=s.get("query_vec"))
+    s.update({"summaries": summaries, "summary_block": sb})
+    _join_news(s)  # 요약이 끝난 뒤 뉴스 합류 (요약 동안에도 뉴스 조회가 계속 진행되도록)
+    t1 = time.perf_counter()
     prompt = build_final_prompt_qa(
         s["user_query"], s["summary_block"],
         system_hint=s.get("system_hint"),
@@ -162,6 +418,10 @@ def node_final_answer_qa(s: State) -> State:
         history_summary=s.get("history_summary", "")
     )
     s["final_answer"] = generate_final_answer_text_qa(prompt)
+    s.setdefault("timings", {}).update({
+        "summary_ms": round((t1 - t0) * 1000, 1),
+        "answer_ms": round((time.perf_counter() - t1) * 1000, 1),
+    })
     return s
 
 def node_pack_qa(s: State) -> State:
@@ -189,10 +449,24 @@ def node_pack_qa(s: State) -> State:
         "contexts": doc_contexts,          # 기존 필드 유지 (문서만)
         "news_block": news_block,          # 뉴스 원문 블록 추가
         "all_contexts": all_contexts,      # ★ 평가용으로 합친 컨텍스트
-        "index_class": s.get("index_class"),
+        "index_class": s.get("index_alias") or s.get("index_class"),
         "top_score": s.get("top_score"),
-        "sub_topic": s.get("sub_topic")
+        "sub_topic": s.get("sub_topic"),
+        "routed_topics": s.get("routed_topics"),
+        "retrieval_cached": bool(s.get("retrieval_cached")),
+        "summary_mode": s.get("summary_mode"),
+        "timings": dict(s.get("timings") or {}),
+        "from_cache": False
     }
+    if _answer_cacheable(s) and s.get("query_vec") is not None and doc_contexts:
+        try:
+            answer_cache.store(
+                _answer_topic(s), s["query_vec"], s["result"],
+                [c["span_id"] for c in doc_contexts],
+                s.get("cache_version") or _index_version(s)
+            )
+        except Exception:
+            pass
     return s
 
 # ── CASE(사례 탐색) 플로우 ────────────────────────────────────────────────────
@@ -244,14 +518,20 @@ graph.add_node("init", node_init)
 graph.add_node("router", node_router)
 
 # 주제 1
+graph.add_node("route_topic", node_route_topic)
+graph.add_node("cache_lookup", node_cache_lookup)
+graph.add_node("cache_store", node_cache_store)
 graph.add_node("pretranslate", node_pretranslate)
+graph.add_node("embed_query", node_embed_query)
+graph.add_node("answer_lookup", node_answer_lookup)
+graph.add_node("cached_fetch", node_cached_fetch)
+graph.add_node("retrieve", node_retrieve)
+graph.add_node("federated", node_federated)
 graph.add_node("stage1", node_stage1)
 graph.add_node("fetch", node_fetch)
 graph.add_node("rerank", node_rerank)
 graph.add_node("fallback", node_fallback)
 graph.add_node("finalfetch", node_finalfetch)
-graph.add_node("summarize", node_summarize)
-graph.add_node("newsfilter", node_newsfilter)
 graph.add_node("final_answer", node_final_answer_qa)
 graph.add_node("pack", node_pack_qa)
 
@@ -269,20 +549,31 @@ graph.set_entry_point("init")
 graph.add_conditional_edges(
     "init",
     route_mode,
-    {"qa": "pretranslate",
+    {"qa": "cache_lookup",
+     "qa_auto": "route_topic",
      "cases": "case_generate",
      "assistant": "final_answer_assistant"}
 )
 
 # 주제 1
-graph.add_edge("pretranslate", "stage1")
+graph.add_edge("route_topic", "cache_lookup")
+graph.add_conditional_edges("cache_lookup", route_cache, {"hit": "answer_lookup", "miss": "pretranslate"})
+graph.add_edge("pretranslate", "embed_query")
+graph.add_edge("embed_query", "answer_lookup")
+graph.add_conditional_edges(
+    "answer_lookup", route_answer,
+    {"answer_hit": END, "retrieval_hit": "cached_fetch",
+     "single": "retrieve", "legacy": "stage1", "federated": "federated"}
+)
+graph.add_edge("cached_fetch", "final_answer")
+graph.add_edge("retrieve", "cache_store")
+graph.add_edge("federated", "cache_store")
 graph.add_edge("stage1", "fetch")
 graph.add_edge("fetch", "rerank")
 graph.add_conditional_edges("rerank", need_fallback, {True: "fallback", False: "finalfetch"})
-graph.add_edge("fallback", "summarize")
-graph.add_edge("finalfetch", "summarize")
-graph.add_edge("summarize", "newsfilter")
-graph.add_edge("newsfilter", "final_answer")
+graph.add_edge("fallback", "cache_store")
+graph.add_edge("finalfetch", "cache_store")
+graph.add_edge("cache_store", "final_answer")
 graph.add_edge("final_answer", "pack")
 graph.add_edge("pack", END)
 
@@ -301,6 +592,46 @@ app = graph.compile()
 # 공개 API
 # ──────────────────────────────────────────────────────────────────────────────
 
-def graph_generate_answer(user_query: str, big_topic: Literal["qa", "cases", "assistant"], sub_topic: Optional[str] = None, history_summary: str = ""):
-    s = app.invoke({"user_query": user_query, "big_topic": big_topic, "sub_topic": sub_topic, "history_summary": history_summary})
-    return s["result"]
+class LatencyStats:
+    """(big_topic, summary_mode)별 최근 응답 시간 분포."""
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self.window = window
+
+    def record(self, key: str, ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snap = {k: sorted(v) for k, v in self._samples.items()}
+        return {
+            k: {"count": len(v), "mean_ms": round(sum(v) / len(v), 1),
+                "p50_ms": v[len(v) // 2], "p95_ms": v[min(len(v) - 1, int(len(v) * 0.95))]}
+            for k, v in snap.items() if v
+        }
+
+latency_stats = LatencyStats()
+
+def graph_generate_answer(user_query: str, big_topic: Literal["qa", "cases", "assistant"], sub_topic: Optional[str] = None,
+                          history_summary: str = "", summary_mode: str = DEFAULT_SUMMARY_MODE):
+    t0 = time.perf_counter()
+    news_futures = []
+    token = _news_futures.set(news_futures)
+    try:
+        s = app.invoke({"user_query": user_query, "big_topic": big_topic, "sub_topic": sub_topic,
+                        "history_summary": history_summary, "summary_mode": summary_mode})
+    finally:
+        # 검색/요약/답변 중 오류로 끝나도 뉴스 작업을 남기지 않음 (정상 경로는 이미 합류해 done)
+        _news_futures.reset(token)
+        _release_news(news_futures)
+    result = s["result"]
+    total_ms = round((time.perf_counter() - t0) * 1000, 1)
+    if big_topic == "qa":
+        result.setdefault("timings", {})["total_ms"] = total_ms
+        key = f"qa/{s.get('summary_mode')}" + ("/cached" if result.get("from_cache") else "")
+    else:
+        key = big_topic
+    latency_stats.record(key, total_ms)
+    return result
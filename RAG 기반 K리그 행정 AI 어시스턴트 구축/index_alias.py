@@ -0,0 +1,180 @@
+import re
+import time
+import uuid
+import threading
+from typing import Dict, List, Optional, Tuple
+from weaviate.util import generate_uuid5
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 블루/그린 재색인용 클래스 포인터
+# - 논리 이름(alias, 예: K_league) → 실제 클래스(K_league_v20251018120000_1a2b3c4d, 시각 + 무작위 접미사)
+# - Weaviate 1.24에는 alias 기능이 없어서 포인터를 레지스트리 클래스의 객체로 저장
+# - 포인터 객체가 없으면 alias 이름 그대로를 실제 클래스로 사용(기존 인덱스 호환)
+# - version: 재색인(블루/그린 전환 + 증분 반영)마다 1씩 증가 → 질의 측 캐시 무효화 기준
+# ──────────────────────────────────────────────────────────────────────────────
+ALIAS_CLASS = "IndexAlias"
+ALIAS_RESOLVE_TTL_SEC = 30.0                       # 질의 측 포인터 캐시 유지 시간
+ALIAS_GC_GRACE_SEC = 2 * ALIAS_RESOLVE_TTL_SEC     # 전환 후 이전 버전을 지울 수 있기까지의 최소 시간
+_VERSION_SUFFIX = r"_v\d{14}(?:_[0-9a-f]{8})?"     # 접미사 없는 이름은 이전 형식(초 단위)
+
+_resolve_cache: Dict[str, Tuple[str, int, float]] = {}  # alias → (target, version, 만료 시각)
+_lock = threading.Lock()
+
+def normalize_alias(name: str) -> str:
+    """Weaviate 클래스명 규칙(첫 글자 대문자)에 맞춰 정규화."""
+    name = (name or "").strip()
+    return name[:1].upper() + name[1:]
+
+_CLASS_NAME = re.compile(r"^[A-Z][_0-9A-Za-z]*$")
+
+def is_valid_class_name(name: str) -> bool:
+    """Weaviate 클래스명 규칙: 영문 대문자로 시작, 영문/숫자/_만 사용."""
+    return bool(_CLASS_NAME.match(name or ""))
+
+def new_version_name(alias: str) -> str:
+    """같은 초에 재구축을 두 번 시작해도 겹치지 않도록 시각 뒤에 무작위 접미사."""
+    return f"{normalize_alias(alias)}_v{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+def _version_pattern(alias: str) -> re.Pattern:
+    return re.compile(rf"^{re.escape(normalize_alias(alias))}{_VERSION_SUFFIX}$")
+
+def alias_of(class_name: str) -> str:
+    """버전 클래스명 → alias (버전 형식이 아니면 그대로)."""
+    m = re.match(rf"^(.+?){_VERSION_SUFFIX}$", class_name or "")
+    return m.group(1) if m else normalize_alias(class_name)
+
+def table_class_name(class_name: str) -> str:
+    """청크 클래스에 딸린 섹션 표 클래스명(버전 클래스마다 1개)."""
+    return f"{class_name}_Table"
+
+def _alias_uuid(alias: str) -> str:
+    return generate_uuid5(f"{ALIAS_CLASS}|{normalize_alias(alias)}")
+
+def _ensure_alias_class(client) -> None:
+    classes = [c["class"] for c in client.schema.get().get("classes", [])]
+    if ALIAS_CLASS in classes:
+        return
+    try:
+        client.schema.create_class({
+            "class": ALIAS_CLASS,
+            "vectorizer": "none",
+            "properties": [
+                {"name": "alias", "dataType": ["text"]},
+                {"name": "target", "dataType": ["text"]},
+                {"name": "updated_at", "dataType": ["text"]},
+                {"name": "version", "dataType": ["int"]},
+            ],
+        })
+        return
+    except Exception as e:
+        if "already exists" not in str(e):
+            raise
+    _ensure_version_property(client)
+
+def _ensure_version_property(client) -> None:
+    """version 속성 도입 전에 만든 레지스트리 클래스에 속성 추가."""
+    props = [p["name"] for p in client.schema.get(ALIAS_CLASS).get("properties", [])]
+    if "version" not in props:
+        client.schema.property.create(ALIAS_CLASS, {"name": "version", "dataType": ["int"]})
+
+def _pointer_props(client, alias: str) -> Dict[str, object]:
+    try:
+        obj = client.data_object.get_by_id(_alias_uuid(alias), class_name=ALIAS_CLASS)
+    except Exception:
+        return {}
+    return (obj or {}).get("properties") or {}
+
+def _get_pointer(client, alias: str) -> Tuple[Optional[str], int]:
+    """포인터 객체를 직접 조회(캐시 없음) → (target 또는 None, version)."""
+    props = _pointer_props(client, alias)
+    return props.get("target") or None, int(props.get("version") or 0)
+
+def pointer_age(client, alias: str) -> Optional[float]:
+    """포인터를 마지막으로 바꾼 뒤 지난 초(updated_at 기준). 포인터가 없으면 None."""
+    updated = _pointer_props(client, alias).get("updated_at")
+    if not updated:
+        return None
+    try:
+        return time.time() - time.mktime(time.strptime(updated, "%Y-%m-%dT%H:%M:%S"))
+    except ValueError:
+        return None
+
+def get_alias_target(client, alias: str) -> Optional[str]:
+    """포인터 객체를 직접 조회(캐시 없음). 없으면 None."""
+    return _get_pointer(client, alias)[0]
+
+def _resolve(client, alias: str, ttl: float) -> Tuple[str, int]:
+    key = normalize_alias(alias)
+    now = time.monotonic()
+    with _lock:
+        hit = _resolve_cache.get(key)
+        if hit and hit[2] > now:
+            return hit[0], hit[1]
+    target, version = _get_pointer(client, key)
+    target = target or key
+    with _lock:
+        _resolve_cache[key] = (target, version, now + ttl)
+    return target, version
+
+def resolve_index_class(client, alias: str, *, ttl: float = ALIAS_RESOLVE_TTL_SEC) -> str:
+    """alias → 실제 클래스명 (TTL 캐시). 포인터가 없으면 alias 그대로."""
+    return _resolve(client, alias, ttl)[0]
+
+def resolve_index_version(client, alias: str, *, ttl: float = ALIAS_RESOLVE_TTL_SEC) -> str:
+    """alias의 현재 색인 버전 스탬프 '<실제 클래스>#<version>' (TTL 캐시)."""
+    target, version = _resolve(client, alias, ttl)
+    return f"{target}#{version}"
+
+def set_alias(client, alias: str, target: str) -> None:
+    """포인터를 target으로 전환하고 version 증가 (객체 1개 replace라 원자적)."""
+    _ensure_alias_class(client)
+    key = normalize_alias(alias)
+    version = _get_pointer(client, key)[1] + 1
+    props = {
+        "alias": key, "target": target, "version": version,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    uuid = _alias_uuid(key)
+    if client.data_object.exists(uuid, class_name=ALIAS_CLASS):
+        client.data_object.replace(data_object=props, class_name=ALIAS_CLASS, uuid=uuid)
+    else:
+        client.data_object.create(data_object=props, class_name=ALIAS_CLASS, uuid=uuid)
+    with _lock:
+        _resolve_cache.pop(key, None)
+
+def bump_version(client, alias: str) -> None:
+    """증분 반영처럼 대상 클래스는 그대로인 재색인 후 version만 증가."""
+    key = normalize_alias(alias)
+    set_alias(client, key, get_alias_target(client, key) or key)
+
+def list_aliases(client) -> List[str]:
+    """레지스트리에 등록된 alias 전체."""
+    try:
+        rows = client.query.get(ALIAS_CLASS, ["alias"]).with_limit(1000).do()["data"]["Get"][ALIAS_CLASS]
+    except Exception:
+        return []
+    return sorted(r["alias"] for r in rows if r.get("alias"))
+
+def delete_alias(client, alias: str) -> None:
+    """포인터 객체 삭제(벤치마크 등 임시 alias 정리용)."""
+    key = normalize_alias(alias)
+    try:
+        client.data_object.delete(_alias_uuid(key), class_name=ALIAS_CLASS)
+    except Exception:
+        pass
+    with _lock:
+        _resolve_cache.pop(key, None)
+
+def stale_versions(client, alias: str) -> List[str]:
+    """
+    현재 포인터가 가리키지 않는 이전 버전 클래스(+ 포인터 도입 전의 alias 이름 클래스).
+    어느 alias든 포인터가 아직 가리키는 클래스는 제외(다른 alias가 직접 쓰는 클래스를 지우지 않도록).
+    """
+    key = normalize_alias(alias)
+    target = get_alias_target(client, key)
+    if not target:
+        return []
+    live = {target} | {get_alias_target(client, a) for a in list_aliases(client)}
+    pat = _version_pattern(key)
+    classes = [c["class"] for c in client.schema.get().get("classes", [])]
+    return [c for c in classes if c not in live and (pat.match(c) or c == key)]
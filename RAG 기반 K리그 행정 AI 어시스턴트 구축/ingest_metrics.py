@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 인제스트 단계별 계측 (make_DB.build_index / bench_ingest 공용)
+# - 카운터: files, files_changed, files_failed, chunks, tables, tokens, objects_inserted, objects_deleted, objects_failed
+# - 타이머(ms, 단계별 누적): hash_ms, parse_ms, flatten_ms, embed_ms, insert_ms, delete_ms
+#   + 대기 시간: embed_idle_ms(임베딩 스레드가 입력 대기), write_idle_ms(쓰기 스레드 입력 대기 합)
+#   파싱/평탄화는 프로세스 풀에서 병렬, 쓰기는 스레드 N개 합이라 단계 ms 합 ≠ wall time
+# - 결과: index_artifacts/reports/ingest_<timestamp>.json
+# ──────────────────────────────────────────────────────────────────────────────
+INGEST_REPORT_DIR = os.path.join("index_artifacts", "reports")
+
+STAGE_TIMERS = ("hash_ms", "parse_ms", "flatten_ms", "embed_ms", "insert_ms", "delete_ms")
+
+class StageMetrics:
+    """클래스 1개의 누적 카운터/타이머 (파이프라인 스레드에서 동시에 기록)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: Dict[str, float] = {}
+
+    def add(self, **values: float) -> None:
+        with self._lock:
+            for k, v in values.items():
+                self.values[k] = self.values.get(k, 0) + (v or 0)
+
+    @contextmanager
+    def timer(self, key: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(**{key: (time.perf_counter() - t0) * 1000.0})
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.values)
+
+def _summarize(values: Dict[str, float], wall_sec: float) -> Dict[str, Any]:
+    out: Dict[str, Any] = {k: round(v, 3) if isinstance(v, float) else v for k, v in sorted(values.items())}
+    out["wall_sec"] = round(wall_sec, 3)
+    if wall_sec > 0:
+        out["chunks_per_sec"] = round(values.get("chunks", 0) / wall_sec, 1)
+        out["tokens_per_sec"] = round(values.get("tokens", 0) / wall_sec, 1)
+        out["objects_per_sec"] = round(values.get("objects_inserted", 0) / wall_sec, 1)
+    stage_total = sum(values.get(k, 0) for k in STAGE_TIMERS)
+    if stage_total > 0:
+        out["stage_share"] = {k: round(values.get(k, 0) / stage_total, 3) for k in STAGE_TIMERS}
+    return out
+
+class IngestMetrics:
+    """build_index 1회 실행의 클래스별/전체 계측."""
+    def __init__(self, run_info: Optional[Dict[str, Any]] = None):
+        self.run_info = dict(run_info or {})
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._t0 = time.perf_counter()
+        self._classes: Dict[str, StageMetrics] = {}
+        self._walls: Dict[str, float] = {}
+        self.wall_sec: Optional[float] = None
+
+    def for_class(self, name: str) -> StageMetrics:
+        return self._classes.setdefault(name, StageMetrics())
+
+    def finish_class(self, name: str, wall_sec: float) -> None:
+        self._walls[name] = wall_sec
+
+    def finish(self) -> None:
+        self.wall_sec = time.perf_counter() - self._t0
+
+    def report(self) -> Dict[str, Any]:
+        wall = self.wall_sec if self.wall_sec is not None else time.perf_counter() - self._t0
+        total: Dict[str, float] = {}
+        classes = {}
+        for name, m in self._classes.items():
+            values = m.snapshot()
+            for k, v in values.items():
+                total[k] = total.get(k, 0) + v
+            classes[name] = _summarize(values, self._walls.get(name, 0.0))
+        return {
+            "started_at": self.started_at,
+            "run": self.run_info,
+            "total": _summarize(total, wall),
+            "classes": classes,
+        }
+
+    def write(self, report_dir: str = INGEST_REPORT_DIR, prefix: str = "ingest") -> str:
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"{prefix}_{time.strftime('%Y%m%d%H%M%S')}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return path
+
+def print_report(report: Dict[str, Any]) -> None:
+    rows = list(report["classes"].items()) + [("ALL", report["total"])]
+    print("\n📊 ingest metrics")
+    for name, r in rows:
+        share = r.get("stage_share") or {}
+        stages = ", ".join(f"{k[:-3]} {share[k]:.0%}" for k in STAGE_TIMERS if share.get(k))
+        print(f"  {name}: files {int(r.get('files', 0))} (changed {int(r.get('files_changed', 0))}), "
+              f"chunks {int(r.get('chunks', 0))}, tokens {int(r.get('tokens', 0))}, "
+              f"{r.get('chunks_per_sec', 0)} chunks/s in {r['wall_sec']}s [{stages}]", flush=True)
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import math
+import argparse
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import index_alias
+from local_index import LOCAL_INDEX_DIR
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 키워드(BM25) 인덱스 + 조문 번호 조회표
+# - 토큰: 영문/숫자 단어 + 한글 어절(2자 이상) + 한글 2-gram (조사/어미가 붙어도 매칭)
+# - 필드: title(가중 TITLE_WEIGHT) / section_heading / content
+# - 조문표: "14" / "14의2" / "14:2"(제14조 제2항) → 청크 id
+#   청크 본문에서 줄 머리의 "제N조(의M)"와 그 아래 "①~⑳ / 제N항"을 읽어 기록(본문 속 인용은 제외)
+# - local_index 스냅샷(meta.jsonl)에서 빌드 → index_artifacts/keyword_index/<Alias>.json
+# ──────────────────────────────────────────────────────────────────────────────
+KEYWORD_INDEX_DIR = os.path.join("index_artifacts", "keyword_index")
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2
+ARTICLE_MIN_SCORE_RATIO = 0.5  # 조문 일치 청크 중 최고 BM25 대비 이 비율 미만은 버림
+
+_WORD = re.compile(r"[0-9a-z]+|[가-힣]+")
+_HANGUL = re.compile(r"^[가-힣]+$")
+_CIRCLED = {chr(0x2460 + i): i + 1 for i in range(20)}  # ①..⑳
+_ARTICLE_HEAD = re.compile(r"^[ \t]*제\s*(\d+)\s*조(?:\s*의\s*(\d+))?", re.M)
+_PARA_HEAD = re.compile(r"^[ \t]*(?:([①-⑳])|제\s*(\d+)\s*항)", re.M)
+_ARTICLE_REF = re.compile(r"(?:제\s*)?(\d+)\s*조(?:\s*의\s*(\d+))?(?:\s*(?:제\s*)?(\d+)\s*항|\s*([①-⑳]))?")
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    out = []
+    for w in _WORD.findall(text):
+        if _HANGUL.match(w):
+            if len(w) < 2:
+                continue  # '제', '조', '의' 같은 1자 어절은 잡음
+            out.append(w)
+            if len(w) > 2:
+                out.extend(w[i:i + 2] for i in range(len(w) - 1))
+        else:
+            out.append(w)
+    return out
+
+def _article_key(art: str, sub: Optional[str] = None, para: Optional[int] = None) -> str:
+    key = f"{int(art)}의{int(sub)}" if sub else f"{int(art)}"
+    return f"{key}:{int(para)}" if para else key
+
+def article_keys_in_chunk(section_heading: str, content: str) -> List[str]:
+    """청크가 '정의'하는 조문/항 키 (줄 머리 기준)."""
+    keys = []
+    m = _ARTICLE_HEAD.search(section_heading or "")
+    current = _article_key(m.group(1), m.group(2)) if m else None
+    if current:
+        keys.append(current)
+    heads = sorted(
+        [(a.start(), "art", a) for a in _ARTICLE_HEAD.finditer(content or "")]
+        + [(p.start(), "para", p) for p in _PARA_HEAD.finditer(content or "")],
+        key=lambda x: x[0]
+    )
+    for _, kind, m in heads:
+        if kind == "art":
+            current = _article_key(m.group(1), m.group(2))
+            keys.append(current)
+        elif current:
+            para = _CIRCLED[m.group(1)] if m.group(1) else int(m.group(2))
+            keys.append(f"{current.split(':')[0]}:{para}")
+    return list(dict.fromkeys(keys))
+
+def article_refs_in_query(query: str) -> List[Tuple[str, Optional[str]]]:
+    """질의의 조문 참조 → [(조 키, 항 키 또는 None)]  예: '제14조 제2항' → [('14', '14:2')]"""
+    refs = []
+    for m in _ARTICLE_REF.finditer(query or ""):  # NFKC는 ①을 1로 바꾸므로 원문 그대로
+        art = _article_key(m.group(1), m.group(2))
+        para = int(m.group(3)) if m.group(3) else (_CIRCLED[m.group(4)] if m.group(4) else None)
+        refs.append((art, f"{art}:{para}" if para else None))
+    return refs
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 빌드
+# ──────────────────────────────────────────────────────────────────────────────
+def _doc_tokens(meta: Dict[str, str]) -> List[str]:
+    return (tokenize(meta.get("title", "")) * TITLE_WEIGHT
+            + tokenize(meta.get("section_heading", ""))
+            + tokenize(meta.get("content", "")))
+
+def build_keyword_index(alias: str, *, snapshot_dir: str = LOCAL_INDEX_DIR, out_dir: str = KEYWORD_INDEX_DIR) -> str:
+    """local_index 스냅샷의 meta.jsonl로 BM25 포스팅/조문표를 만들어 저장."""
+    alias = index_alias.normalize_alias(alias)
+    src = os.path.join(snapshot_dir, alias)
+    with open(os.path.join(src, "info.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    with open(os.path.join(src, "meta.jsonl"), "r", encoding="utf-8") as f:
+        metas = [json.loads(line) for line in f if line.strip()]
+
+    postings: Dict[str, List[List[int]]] = {}
+    articles: Dict[str, List[int]] = {}
+    doc_len = []
+    for row, m in enumerate(metas):
+        toks = _doc_tokens(m)
+        doc_len.append(len(toks))
+        for tok, tf in Counter(toks).items():
+            postings.setdefault(tok, []).append([row, tf])
+        for key in article_keys_in_chunk(m.get("section_heading", ""), m.get("content", "")):
+            articles.setdefault(key, []).append(row)
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{alias}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "alias": alias, "class": info.get("class"),
+            "ids": [m["id"] for m in metas], "doc_len": doc_len,
+            "postings": postings, "articles": articles,
+        }, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    print(f"🔤 keyword index '{alias}': {len(metas)} docs, {len(postings)} terms, {len(articles)} article keys", flush=True)
+    return path
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 검색
+# ──────────────────────────────────────────────────────────────────────────────
+class KeywordIndex:
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.ids: List[str] = data["ids"]
+        self.doc_len: List[int] = data["doc_len"]
+        self.postings: Dict[str, List[List[int]]] = data["postings"]
+        self.articles: Dict[str, List[int]] = data["articles"]
+        n = len(self.ids)
+        self.avgdl = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def _scores(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for tok in set(tokenize(query)):
+            plist = self.postings.get(tok)
+            if not plist:
+                continue
+            idf = self.idf[tok]
+            for row, tf in plist:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[row] / (self.avgdl or 1.0))
+                scores[row] = scores.get(row, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, topk: int = 20) -> List[Tuple[str, float]]:
+        scores = self._scores(query)
+        best = sorted(scores.items(), key=lambda x: -x[1])[:topk]
+        return [(self.ids[row], s) for row, s in best]
+
+    def article_lookup(self, query: str, limit: int = 3) -> List[str]:
+        """질의의 조문 번호와 정확히 일치하는 청크 id(항까지 있으면 항 우선). BM25 점수(문서명 등)로 정렬."""
+        rows: List[int] = []
+        for art, para in article_refs_in_query(query):
+            hit = self.articles.get(para) if para else None
+            rows.extend(hit or self.articles.get(art) or [])
+        if not rows:
+            return []
+        scores = self._scores(query)
+        rows = sorted(dict.fromkeys(rows), key=lambda r: -scores.get(r, 0.0))
+        best = scores.get(rows[0], 0.0)
+        # 문서명까지 적힌 질의면 같은 번호의 다른 규정 조문은 제외
+        rows = [r for r in rows if scores.get(r, 0.0) >= ARTICLE_MIN_SCORE_RATIO * best]
+        return [self.ids[r] for r in rows[:limit]]
+
+_cache: Dict[str, Tuple[float, KeywordIndex]] = {}
+_cache_lock = threading.Lock()
+
+def get_keyword_index(class_or_alias: str, *, root: str = KEYWORD_INDEX_DIR) -> Optional[KeywordIndex]:
+    """실제 클래스명이나 alias로 키워드 인덱스 조회(파일이 바뀌면 다시 읽음). 없으면 None."""
+    alias = index_alias.alias_of(class_or_alias)
+    path = os.path.join(root, f"{alias}.json")
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _cache_lock:
+        hit = _cache.get(alias)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    idx = KeywordIndex(path)
+    with _cache_lock:
+        _cache[alias] = (mtime, idx)
+    return idx
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local_index 스냅샷 → BM25/조문 인덱스 빌드")
+    parser.add_argument("aliases", nargs="*", help="빌드할 alias (기본: 스냅샷이 있는 alias 전체)")
+    args = parser.parse_args()
+    aliases = args.aliases or sorted(
+        d for d in os.listdir(LOCAL_INDEX_DIR)
+        if os.path.exists(os.path.join(LOCAL_INDEX_DIR, d, "info.json"))
+    )
+    for a in aliases:
+        build_keyword_index(a)
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+import index_alias
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 프로세스 내 벡터 검색 (search_answer.SEARCH_BACKEND = "local")
+# - Weaviate 클래스 스냅샷을 export해서 index_artifacts/local_index/<Alias>/에 저장
+#     info.json   : alias, class, count, dim, dtype, exported_at
+#     vectors.npy : (count, dim) 정규화 벡터(float16/float32) → np.load(mmap_mode="r")
+#     meta.jsonl  : 행 순서대로 {"id", 속성...}
+#     tables.json : 섹션 표 {table_id: table_json}
+# - 질의: 전체 행렬과 내적(정확한 top-k, 근사 없음). 코퍼스가 작아 수 ms 이내
+# - 반환 형식은 Weaviate GraphQL Get 결과(속성 + _additional{id, distance, vector})와 동일
+# ──────────────────────────────────────────────────────────────────────────────
+LOCAL_INDEX_DIR = os.path.join("index_artifacts", "local_index")
+LOCAL_INDEX_DTYPE = "float16"   # "float16"(메모리 절반) | "float32"
+EXPORT_PAGE_SIZE = 500          # cursor export 1회 요청당 객체 수
+SEARCH_BLOCK_ROWS = 65536       # 내적 계산 블록(float16 → float32 변환 메모리 상한)
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    return v / np.clip(np.linalg.norm(v, axis=-1, keepdims=True), 1e-12, None)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 스냅샷 export (Weaviate → 디스크)
+# ──────────────────────────────────────────────────────────────────────────────
+def _class_properties(client, class_name: str) -> List[str]:
+    return [p["name"] for p in client.schema.get(class_name).get("properties", [])]
+
+def iter_class_objects(client, class_name: str, props: List[str], *, with_vector: bool = True,
+                       page_size: int = EXPORT_PAGE_SIZE) -> Iterable[Dict[str, Any]]:
+    """cursor(after) 페이지네이션으로 클래스 전체 객체를 순회."""
+    after = None
+    additional = ["id", "vector"] if with_vector else ["id"]
+    while True:
+        q = client.query.get(class_name, props).with_additional(additional).with_limit(page_size)
+        if after:
+            q = q.with_after(after)
+        rows = q.do()["data"]["Get"][class_name]
+        if not rows:
+            return
+        after = rows[-1]["_additional"]["id"]  # 호출 측이 _additional을 pop해도 커서가 유지되도록 먼저 기록
+        yield from rows
+
+def export_snapshot(client, alias: str, *, out_dir: str = LOCAL_INDEX_DIR, dtype: str = LOCAL_INDEX_DTYPE) -> str:
+    """alias가 가리키는 클래스(+ 표 클래스)를 스냅샷으로 저장. 완성 후 디렉터리를 통째로 교체."""
+    alias = index_alias.normalize_alias(alias)
+    class_name = index_alias.get_alias_target(client, alias) or alias
+    props = _class_properties(client, class_name)
+
+    ids, metas, vecs = [], [], []
+    for obj in iter_class_objects(client, class_name, props):
+        add = obj.pop("_additional")
+        if not add.get("vector"):
+            continue
+        ids.append(add["id"])
+        metas.append({"id": add["id"], **obj})
+        vecs.append(np.asarray(add["vector"], dtype=np.float32))
+    dim = len(vecs[0]) if vecs else 0
+    matrix = _normalize(np.stack(vecs)) if vecs else np.zeros((0, dim), dtype=np.float32)
+
+    tables = {}
+    table_class = index_alias.table_class_name(class_name)
+    if table_class in [c["class"] for c in client.schema.get().get("classes", [])]:
+        for obj in iter_class_objects(client, table_class, ["table_json"], with_vector=False):
+            tables[obj["_additional"]["id"]] = obj.get("table_json", "")
+
+    final_dir = os.path.join(out_dir, alias)
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "vectors.npy"), matrix.astype(dtype))
+    with open(os.path.join(tmp_dir, "meta.jsonl"), "w", encoding="utf-8") as f:
+        for m in metas:
+            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+    with open(os.path.join(tmp_dir, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump(tables, f, ensure_ascii=False)
+    with open(os.path.join(tmp_dir, "info.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "alias": alias, "class": class_name, "count": len(ids), "dim": dim, "dtype": dtype,
+            "properties": props, "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, f, ensure_ascii=False)
+
+    old_dir = f"{final_dir}.old-{os.getpid()}"
+    if os.path.exists(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"💾 local snapshot '{alias}' ({class_name}): {len(ids)} vectors, {len(tables)} tables → {final_dir}", flush=True)
+    return final_dir
+
+def export_all(client, aliases: Optional[List[str]] = None, **kwargs) -> List[str]:
+    """aliases가 없으면 포인터 레지스트리에 등록된 alias 전체."""
+    aliases = aliases or index_alias.list_aliases(client)
+    return [export_snapshot(client, a, **kwargs) for a in aliases]
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 검색
+# ──────────────────────────────────────────────────────────────────────────────
+class LocalIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "info.json"), "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "meta.jsonl"), "r", encoding="utf-8") as f:
+            self.meta = [json.loads(line) for line in f if line.strip()]
+        with open(os.path.join(path, "tables.json"), "r", encoding="utf-8") as f:
+            self.tables = json.load(f)
+        self.row_of = {m["id"]: i for i, m in enumerate(self.meta)}
+
+    @property
+    def class_name(self) -> str:
+        return self.info["class"]
+
+    def _scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """정규화된 q와의 코사인(저장 벡터는 정규화돼 있으므로 내적)."""
+        if rows is not None:
+            return np.asarray(self.vectors[rows], dtype=np.float32) @ q
+        out = np.empty(len(self.meta), dtype=np.float32)
+        for i in range(0, len(self.meta), SEARCH_BLOCK_ROWS):
+            out[i:i + SEARCH_BLOCK_ROWS] = np.asarray(self.vectors[i:i + SEARCH_BLOCK_ROWS], dtype=np.float32) @ q
+        return out
+
+    def _doc(self, row: int, props: List[str], *, distance: Optional[float] = None,
+             with_vector: bool = False) -> Dict[str, Any]:
+        m = self.meta[row]
+        add: Dict[str, Any] = {"id": m["id"]}
+        if distance is not None:
+            add["distance"] = distance
+        if with_vector:
+            add["vector"] = np.asarray(self.vectors[row], dtype=np.float32).tolist()  # Weaviate 응답과 같은 list
+        doc = {p: m.get(p) for p in props}
+        doc["_additional"] = add
+        return doc
+
+    def _filter_rows(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """속성 값 일치 행 (값끼리 Or, 속성끼리 And)."""
+        keep = np.ones(len(self.meta), dtype=bool)
+        for prop, values in filters.items():
+            allowed = set(values)
+            keep &= np.fromiter((m.get(prop) in allowed for m in self.meta), dtype=bool, count=len(self.meta))
+        return np.flatnonzero(keep)
+
+    def near_vector(self, vec, *, certainty: Optional[float] = None, limit: int = 10,
+                    props: List[str] = (), ids: Optional[List[str]] = None,
+                    filters: Optional[Dict[str, List[str]]] = None,
+                    with_vector: bool = False) -> List[Dict[str, Any]]:
+        """Weaviate near_vector(+ id/속성 where)와 같은 의미: cosine distance = 1 - cos, certainty = (1 + cos) / 2."""
+        if not self.meta:
+            return []
+        q = _normalize(np.asarray(vec, dtype=np.float32))
+        rows = None
+        if ids is not None:
+            rows = np.array([self.row_of[i] for i in ids if i in self.row_of], dtype=np.int64)
+        if filters:
+            frows = self._filter_rows(filters)
+            rows = frows if rows is None else np.intersect1d(rows, frows)
+        if rows is not None and not len(rows):
+            return []
+        sims = self._scores(q, rows)
+        cand = np.arange(len(sims))
+        if certainty is not None:
+            cand = cand[sims >= 2.0 * certainty - 1.0]
+        if len(cand) > limit:
+            cand = cand[np.argpartition(-sims[cand], limit - 1)[:limit]]
+        cand = cand[np.argsort(-sims[cand])]
+        return [
+            self._doc(int(rows[c] if rows is not None else c), list(props),
+                      distance=float(1.0 - sims[c]), with_vector=with_vector)
+            for c in cand
+        ]
+
+    def get(self, ids: List[str], props: List[str] = (), *, with_vector: bool = False) -> List[Dict[str, Any]]:
+        return [self._doc(self.row_of[i], list(props), with_vector=with_vector) for i in ids if i in self.row_of]
+
+    def get_tables(self, table_ids: List[str]) -> Dict[str, str]:
+        return {t: self.tables[t] for t in table_ids if t in self.tables}
+
+class LocalStore:
+    """alias별 LocalIndex 캐시. info.json이 바뀌면(재export) 다시 읽음."""
+    def __init__(self, root: str = LOCAL_INDEX_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, LocalIndex] = {}
+        self._mtimes: Dict[str, float] = {}
+
+    def _load(self, alias: str) -> Optional[LocalIndex]:
+        alias = index_alias.normalize_alias(alias)
+        path = os.path.join(self.root, alias)
+        try:
+            mtime = os.stat(os.path.join(path, "info.json")).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            if self._mtimes.get(alias) != mtime:
+                self._indexes[alias] = LocalIndex(path)
+                self._mtimes[alias] = mtime
+            return self._indexes[alias]
+
+    def resolve(self, alias: str) -> str:
+        """alias → 스냅샷 당시 실제 클래스명(없으면 alias 그대로)."""
+        idx = self._load(alias)
+        return idx.class_name if idx else index_alias.normalize_alias(alias)
+
+    def version(self, alias: str) -> str:
+        """스냅샷 버전 스탬프 '<실제 클래스>#<export 시각>' (재export마다 바뀜)."""
+        idx = self._load(alias)
+        return f"{idx.class_name}#{idx.info.get('exported_at', '')}" if idx else ""
+
+    def index_for(self, class_name: str) -> LocalIndex:
+        """실제 클래스명(K_league_v2025...) 또는 alias로 스냅샷 조회."""
+        idx = self._load(index_alias.alias_of(class_name))
+        if idx is None:
+            raise FileNotFoundError(f"no local snapshot for '{class_name}' under {self.root} (run local_index.py --export)")
+        return idx
+
+_store: Optional[LocalStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> LocalStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LocalStore()
+        return _store
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weaviate 클래스 → 로컬 NumPy 스냅샷 export")
+    parser.add_argument("aliases", nargs="*", help="export할 alias (기본: 레지스트리 전체)")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--dtype", default=LOCAL_INDEX_DTYPE, choices=["float16", "float32"])
+    args = parser.parse_args()
+
+    import weaviate
+    export_all(weaviate.Client(args.url), args.aliases or None, dtype=args.dtype)
@@ -1,201 +1,819 @@
 import json
 import glob
-import re
 import os
 import time
-from sentence_transformers import SentenceTransformer
+import queue
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import weaviate
-from weaviate.util import generate_uuid5
 from weaviate.exceptions import UnexpectedStatusCodeException, ObjectAlreadyExistsException
-import torch
 from tqdm import tqdm  # ✅ 이걸로 수정반
+from doc_parser import (
+    prepare_file, is_large_file, load_entries, configure_token_chunker, chunker_signature, count_tokens
+)
+from embedding_cache import get_embedding_cache
+from ingest_metrics import IngestMetrics, StageMetrics, print_report
+from local_index import export_snapshot
+from keyword_index import build_keyword_index
+from outline_index import build_outline_index
+from title_filter import build_title_dict
+from topic_router import build_router
+from doc_summary import summarize_class
+from embed_backend import load_embed_backend, EMBED_BACKEND
+from index_alias import (
+    normalize_alias, is_valid_class_name, new_version_name, get_alias_target, set_alias, bump_version, stale_versions, table_class_name,
+    list_aliases, pointer_age, ALIAS_GC_GRACE_SEC
+)
 
 # ✅ Weaviate 클라이언트 연결
-client = weaviate.Client("http://localhost:8080")
+WEAVIATE_URL = "http://localhost:8080"
+client = weaviate.Client(WEAVIATE_URL)
 
-# ✅ 임베딩 모델 (고정도 한국어)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-embed_model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
-embed_model.to(device) 
+# ✅ 임베딩 모델 (고정도 한국어) — 백엔드(torch / torch-int8 / onnx-int8)는 embed_backend.EMBED_BACKEND
+embed_model = load_embed_backend(EMBED_BACKEND)
+device = embed_model.device
+embed_cache = get_embedding_cache(embed_model.cache_name, embed_model)  # 재색인 시 같은 청크는 추론 생략
 
-#################################################################################################
+# ✅ 청킹 방식: "tokens" = 모델 토크나이저로 max_seq_length 이내(조문 경계 보존), "chars" = 기존 1200자
+CHUNK_MODE = "tokens"
 
-def build_index():
-    DATA_ROOT = "/home/tako/LIMJAEEUN/SW융합 해커톤/version1/data"
-
-    # ===== 헬퍼: 청킹/표 평탄화 (기존 그대로) =====
-    def chunk_text(text, max_chars=1200, overlap=200):
-        if not text:
-            return []
-        sents = [s.strip() for s in re.split(r'(?<=[\.!?])\s+', text) if s.strip()]
-        chunks, buf, cur = [], [], 0
-        for s in sents:
-            if cur + len(s) + 1 > max_chars and buf:
-                whole = " ".join(buf)
-                chunks.append(whole)
-                tail = whole[-overlap:] if overlap > 0 else ""
-                buf, cur = ([tail] if tail else []), len(tail)
-            buf.append(s)
-            cur += len(s) + 1
-        if buf:
-            chunks.append(" ".join(buf))
-        return chunks or [text[:max_chars]]
-
-    def flatten_table(table_rows):
-        flat = []
-        for row in table_rows or []:
-            flat.append("; ".join([f"{k}:{v}" for k, v in row.items()]))
-        return "\n".join(flat)
-
-    def flatten_document(doc):
-        title = doc.get("title", "")
-        for chapter in doc.get("chapters", []):
-            chapter_title = chapter.get("title", "")
-            for section in chapter.get("sections", []):
-                section_heading = section.get("heading", "")
-
-                text_items = [item for item in section.get("contents", []) if isinstance(item, str)]
-                aggregated_content = "\n".join(text_items).strip()
-
-                table_items = [item["table"] for item in section.get("contents", [])
-                               if isinstance(item, dict) and "table" in item]
-                aggregated_table_json = json.dumps(table_items, ensure_ascii=False) if table_items else ""
-                table_texts = [flatten_table(rows) for rows in table_items]
-
-                embed_base = "\n".join([aggregated_content] + [t for t in table_texts if t]).strip()
-
-                for pi, chunk in enumerate(chunk_text(embed_base, max_chars=1200, overlap=200), start=1):
-                    yield {
-                        "title": title,
-                        "chapter_title": chapter_title,
-                        "section_heading": section_heading,
-                        "content": chunk,
-                        "table_json": aggregated_table_json
-                    }
+def _configure_chunker(mode=CHUNK_MODE):
+    if mode == "tokens":
+        # [CLS]/[SEP] 2개를 뺀 만큼이 실제 본문 예산
+        configure_token_chunker(embed_model.tokenizer, embed_model.max_seq_length - 2)
+    else:
+        configure_token_chunker(None, 0)
 
-    # ===== data 하위 폴더(=클래스) 반복 =====
-    subdirs = [d for d in sorted(os.listdir(DATA_ROOT))
-               if os.path.isdir(os.path.join(DATA_ROOT, d))]
+_configure_chunker()
 
-    for folder in subdirs:
-        class_name = folder  # 최소 변경: 폴더명 그대로 사용
-        # 필요 시 1줄 정규화(주석 해제해서 사용): 클래스 규칙 위반 폴더명 대비
-        # class_name = re.sub(r'[^0-9A-Za-z_]', '', class_name).strip() or "Class"
-        # if not class_name[0].isalpha(): class_name = "C" + class_name
+DATA_ROOT = "/home/tako/LIMJAEEUN/SW융합 해커톤/version1/data"
 
-        print(f"\n📚 Building class '{class_name}' from folder '{folder}'")
+# ✅ 배치 인제스트 설정
+EMBED_BATCH_SIZE = 64        # encode() 1회에 넣는 청크 수
+WEAVIATE_BATCH_SIZE = 200    # batch import 1회 요청당 객체 수
+WEAVIATE_NUM_WORKERS = 4     # 쓰기 스레드 수(스레드별 batch import)
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # 로드/평탄화 프로세스 수(임베딩용 코어 1개 남김)
+PIPELINE_QUEUE_SIZE = 8      # 단계 간 큐 크기(임베딩 배치 단위)
+METRICS_COUNT_TOKENS = True  # 리포트용 토큰 수 집계(토큰 청킹일 때만, 파싱 워커에서 토크나이저 1회 추가 실행)
 
-        # 1) 기존 클래스 삭제 후 생성
-        schema_now = client.schema.get()
-        existing = [c["class"] for c in schema_now.get("classes", [])]
-        if class_name in existing:
-            try:
-                client.schema.delete_class(class_name)
-            except UnexpectedStatusCodeException as e:
-                print(f"⚠️ delete failed for {class_name}: {e}", flush=True)
-            else:
-                # 삭제가 반영될 때까지 짧게 대기(최대 ~5초)
-                for _ in range(20):
-                    now = client.schema.get()
-                    if class_name not in [c["class"] for c in now.get("classes", [])]:
-                        break
-                    time.sleep(0.25)
-
-        schema = {
-            "class": class_name,
-            "vectorizer": "none",
-            "moduleConfig": {},
-            "properties": [
-                {"name": "title", "dataType": ["text"]},
-                {"name": "chapter_title", "dataType": ["text"]},
-                {"name": "section_heading", "dataType": ["text"]},
-                {"name": "content", "dataType": ["text"]},
-                {"name": "table_json", "dataType": ["text"]},
-            ],
-            "vectorIndexConfig": {
-                "distance": "cosine",
-                "efConstruction": 200,
-                "maxConnections": 64
-            }
+# ✅ 증분 인덱싱 설정
+INDEX_ARTIFACT_DIR = "index_artifacts"
+MANIFEST_PATH = os.path.join(INDEX_ARTIFACT_DIR, "manifest.json")  # {alias: {class, files: {relpath: {sha256, chunks, tables}}}}
+DELETE_BATCH_SIZE = 100      # id ContainsAny 삭제 1회당 id 수
+WATCH_INTERVAL_SEC = 2.0     # watch 모드 폴링 주기
+WATCH_DEBOUNCE_SEC = 1.0     # 변경 감지 후 쓰기 완료 대기
+EXPORT_LOCAL_SNAPSHOT = True # 적재 후 local_index 스냅샷 갱신(search_answer.SEARCH_BACKEND="local"용)
+GENERATE_SUMMARIES = False   # 적재 후 청크별 조항 요약을 summary 속성에 저장(doc_summary.py, Gemini 호출·레이트 리밋)
+
+#################################################################################################
+
+def _class_schema(class_name):
+    return {
+        "class": class_name,
+        "vectorizer": "none",
+        "moduleConfig": {},
+        "properties": [
+            {"name": "title", "dataType": ["text"]},
+            {"name": "chapter_title", "dataType": ["text"]},
+            {"name": "section_heading", "dataType": ["text"]},
+            {"name": "content", "dataType": ["text"]},
+            {"name": "table_id", "dataType": ["text"]},   # 섹션 표 객체 uuid (<class>_Table)
+            {"name": "summary", "dataType": ["text"]},    # 조항 요약 (GENERATE_SUMMARIES, 질의 시 LLM 요약 생략)
+        ],
+        "vectorIndexConfig": {
+            "distance": "cosine",
+            "efConstruction": 200,
+            "maxConnections": 64
         }
-        current = client.schema.get()
-        current_classes = [c["class"] for c in current.get("classes", [])]
+    }
+
+def _table_schema(class_name):
+    """섹션 표 저장용(섹션당 1객체, 벡터 검색 안 함)."""
+    return {
+        "class": table_class_name(class_name),
+        "vectorizer": "none",
+        "moduleConfig": {},
+        "properties": [
+            {"name": "title", "dataType": ["text"]},
+            {"name": "chapter_title", "dataType": ["text"]},
+            {"name": "section_heading", "dataType": ["text"]},
+            {"name": "table_json", "dataType": ["text"]},
+        ],
+        "vectorIndexConfig": {"skip": True}
+    }
+
+def _existing_classes():
+    return [c["class"] for c in client.schema.get().get("classes", [])]
 
-        if class_name in current_classes:
-            # 여기로 오면 이미 클래스가 존재 -> 생성 스킵하고 바로 인서트로 진행
-            print(f"ℹ️ class '{class_name}' already exists → skip create", flush=True)
+def _delete_class(class_name):
+    """클래스 삭제 후 반영될 때까지 짧게 대기(최대 ~5초)."""
+    try:
+        client.schema.delete_class(class_name)
+    except UnexpectedStatusCodeException as e:
+        print(f"⚠️ delete failed for {class_name}: {e}", flush=True)
+        return
+    for _ in range(20):
+        if class_name not in _existing_classes():
+            break
+        time.sleep(0.25)
+
+def _create_class(schema):
+    try:
+        client.schema.create_class(schema)
+    except UnexpectedStatusCodeException as e:
+        # race로 인해 생성 순간에 이미 생겨버린 경우를 무시
+        if "already exists" in str(e):
+            print(f"ℹ️ class '{schema['class']}' already exists (race) → continue", flush=True)
         else:
+            raise
+
+def _ensure_class(class_name):
+    """청크 클래스와 표 클래스가 없으면 생성."""
+    existing = _existing_classes()
+    if class_name not in existing:
+        _create_class(_class_schema(class_name))
+    if table_class_name(class_name) not in existing:
+        _create_class(_table_schema(class_name))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 매니페스트 (파일 해시 + 청크 uuid)
+# ──────────────────────────────────────────────────────────────────────────────
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ manifest load fail ({e}) → full diff", flush=True)
+        return {}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, path)  # 중단돼도 이전 매니페스트가 깨지지 않도록 원자적 교체
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 적재 파이프라인
+#   [1] 프로세스 풀: 해시/로드/평탄화/uuid  ─(결과 in-flight 제한)→  메인 스레드: 매니페스트 diff
+#   → embed_q(bounded) → [2] 임베딩 스레드 1개: embed_batch_size 단위 encode
+#   → write_q(bounded) → [3] 쓰기 스레드 N개: 스레드별 클라이언트로 batch import(upsert)
+#   큐가 가득 차면 앞 단계가 대기(backpressure) → 파일 수/크기와 무관하게 메모리 일정
+# ──────────────────────────────────────────────────────────────────────────────
+_SENTINEL = None
+
+def _count_batch_errors(results, counter, lock, failed_ids=None):
+    """batch import 콜백: 객체별 에러를 출력하고 실패 수/실패 uuid를 누적."""
+    for r in results or []:
+        errors = ((r.get("result") or {}).get("errors") or {}).get("error")
+        if errors:
+            with lock:
+                counter["failed"] += 1
+                if failed_ids is not None and r.get("id"):
+                    failed_ids.add(r["id"])
+            print(f"  ⚠️ batch insert fail: {errors[0].get('message', errors)}", flush=True)
+
+def _report_throughput(label, n_objects, elapsed):
+    rate = n_objects / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {label}: inserted {n_objects} objects in {elapsed:.1f}s ({rate:.1f} obj/s)", flush=True)
+
+class _Upserter:
+    """
+    청크를 받아 임베딩 후 적재.
+    - use_batch=True : 임베딩 스레드 + 쓰기 스레드(num_workers개) 파이프라인, Weaviate batch import(upsert)
+    - use_batch=False: 청크 1개씩 encode + create, 충돌 시 replace (호출 스레드에서 동기 실행)
+    임베딩/적재에 실패한 uuid는 failed_ids에 모음 → 매니페스트에서 빼서 다음 실행에 재시도
+    """
+    def __init__(self, class_name, *, use_batch, embed_batch_size, batch_size, num_workers,
+                 queue_size=PIPELINE_QUEUE_SIZE, use_embed_cache=True, metrics=None):
+        self.class_name = class_name
+        self.use_embed_cache = use_embed_cache
+        self.metrics = metrics or StageMetrics()
+        self.use_batch = use_batch
+        self.embed_batch_size = embed_batch_size
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers)
+        self.table_class = table_class_name(class_name)
+        self.counter = {"failed": 0, "queued": 0}
+        self.failed_ids = set()
+        self._lock = threading.Lock()
+        self._embed_q = queue.Queue(maxsize=queue_size * embed_batch_size)  # 청크 단위
+        self._write_q = queue.Queue(maxsize=queue_size)                     # 임베딩 배치 단위
+        self._threads = []
+
+    def __enter__(self):
+        if self.use_batch:
+            self._threads.append(threading.Thread(target=self._embed_loop, daemon=True))
+            for _ in range(self.num_workers):
+                self._threads.append(threading.Thread(target=self._write_loop, daemon=True))
+            for t in self._threads:
+                t.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.use_batch:
+            self._embed_q.put(_SENTINEL)
+            for t in self._threads:
+                t.join()
+        if self.failed_ids:
+            print(f"  ⚠️ {self.class_name}: {len(self.failed_ids)} objects failed (will retry on next run)",
+                  flush=True)
+        return False
+
+    @property
+    def inserted(self):
+        return self.counter["queued"] - self.counter["failed"]
+
+    def _fail(self, *uuids):
+        with self._lock:
+            self.failed_ids.update(uuids)
+
+    def add(self, uuid, doc_obj, text_to_embed):
+        if self.use_batch:
+            self._embed_q.put((uuid, doc_obj, text_to_embed))  # 가득 차면 대기
+        else:
+            self._insert_one(uuid, doc_obj, text_to_embed)
+
+    def add_table(self, table_id, table_obj):
+        """섹션 표 객체(벡터 없음)는 임베딩 단계를 건너뛰고 바로 쓰기 단계로."""
+        self.metrics.add(tables=1)
+        if self.use_batch:
+            self._write_q.put([(self.table_class, table_id, table_obj, None)])
+        else:
+            with self.metrics.timer("insert_ms"):
+                if not self._upsert_object(self.table_class, table_id, table_obj, None):
+                    self._fail(table_id)
+
+    # ── [2] 임베딩 단계 ──────────────────────────────────────────────────────
+    def _embed_loop(self):
+        done = False
+        while not done:
+            pending = []
+            while len(pending) < self.embed_batch_size:
+                t0 = time.perf_counter()
+                item = self._embed_q.get()
+                self.metrics.add(embed_idle_ms=(time.perf_counter() - t0) * 1000.0)
+                if item is _SENTINEL:
+                    done = True
+                    break
+                pending.append(item)
+            if pending:
+                self._embed_batch(pending)
+        for _ in range(self.num_workers):
+            self._write_q.put(_SENTINEL)
+
+    def _encode(self, texts, **kwargs):
+        with self.metrics.timer("embed_ms"):
+            if self.use_embed_cache:
+                return embed_cache.encode(embed_model, texts, **kwargs)
+            return embed_model.encode(texts, convert_to_numpy=True, **kwargs)
+
+    def _embed_batch(self, pending):
+        texts = [t for _, _, t in pending]
+        try:
+            vecs = self._encode(texts, batch_size=self.embed_batch_size)
+        except Exception as e:
+            print(f"  ⚠️ embed fail: {e}")
+            self._fail(*(uuid for uuid, _, _ in pending))
+            return
+        self._write_q.put([
+            (self.class_name, uuid, doc_obj, vec) for (uuid, doc_obj, _), vec in zip(pending, vecs)
+        ])
+
+    # ── [3] 쓰기 단계 (스레드별 클라이언트/배치) ───────────────────────────
+    def _write_loop(self):
+        wclient = weaviate.Client(WEAVIATE_URL)
+        wclient.batch.configure(
+            batch_size=self.batch_size,
+            num_workers=1,
+            dynamic=False,
+            callback=lambda results: _count_batch_errors(results, self.counter, self._lock, self.failed_ids),
+        )
+        with wclient.batch as batch:
+            while True:
+                t0 = time.perf_counter()
+                items = self._write_q.get()
+                self.metrics.add(write_idle_ms=(time.perf_counter() - t0) * 1000.0)
+                if items is _SENTINEL:
+                    break
+                with self.metrics.timer("insert_ms"):  # 배치가 차면 add_data_object 안에서 전송
+                    for class_name, uuid, obj, vec in items:
+                        try:
+                            batch.add_data_object(
+                                data_object=obj,
+                                class_name=class_name,
+                                uuid=uuid,
+                                vector=vec
+                            )
+                        except Exception as e:
+                            print(f"  ⚠️ insert fail: {e}")
+                            self._fail(uuid)
+                            continue
+                        with self._lock:
+                            self.counter["queued"] += 1
+            t_flush = time.perf_counter()
+        self.metrics.add(insert_ms=(time.perf_counter() - t_flush) * 1000.0)  # 마지막 배치 flush
+
+    def _insert_one(self, uuid, doc_obj, text_to_embed):
+        try:
+            vec = self._encode(text_to_embed)
+        except Exception as e:
+            print(f"  ⚠️ embed fail: {e}")
+            self._fail(uuid)
+            return
+        with self.metrics.timer("insert_ms"):
+            ok = self._upsert_object(self.class_name, uuid, doc_obj, vec)
+        if ok:
+            self.counter["queued"] += 1
+        else:
+            self._fail(uuid)
+
+    def _upsert_object(self, class_name, uuid, obj, vec):
+        """create, 충돌 시 replace. 성공 여부 반환."""
+        try:
             try:
-                client.schema.create_class(schema)
-            except UnexpectedStatusCodeException as e:
-                # race로 인해 생성 순간에 이미 생겨버린 경우를 무시
-                if "already exists" in str(e):
-                    print(f"ℹ️ class '{class_name}' already exists (race) → continue", flush=True)
-                else:
-                    raise
-
-        # 2) 폴더 내 모든 JSON 재귀 수집
-        json_files = glob.glob(os.path.join(DATA_ROOT, folder, "**", "*.json"), recursive=True)
-        if not json_files:
-            print("  ⚠️ no json files, skip")
+                client.data_object.create(
+                    data_object=obj,
+                    class_name=class_name,
+                    uuid=uuid,
+                    vector=vec
+                )
+            except ObjectAlreadyExistsException:
+                # 이미 있으면 교체(업데이트)
+                client.data_object.replace(
+                    data_object=obj,
+                    class_name=class_name,
+                    uuid=uuid,
+                    vector=vec
+                )
+            return True
+        except Exception as e:
+            print(f"  ⚠️ insert fail: {e}")
+            return False
+
+def _delete_ids(class_name, ids):
+    """uuid 목록 삭제 (id ContainsAny where로 묶어서 요청)."""
+    ids = list(ids)
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        part = ids[i:i + DELETE_BATCH_SIZE]
+        try:
+            client.batch.delete_objects(
+                class_name=class_name,
+                where={"path": ["id"], "operator": "ContainsAny", "valueTextArray": part},
+            )
+        except Exception as e:
+            print(f"  ⚠️ delete fail ({len(part)} ids): {e}", flush=True)
+
+def _parse_pool(parse_workers):
+    """
+    [1] 로드/평탄화용 프로세스 풀.
+    fork로 띄워 자식이 make_DB를 다시 import(모델/클라이언트 로드)하지 않게 하고,
+    파이프라인 스레드가 뜨기 전에 워커를 미리 띄워 둠(스레드 보유 상태 fork 방지).
+    """
+    if parse_workers <= 1:
+        return nullcontext(None)
+    pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("fork"))
+    pool.submit(os.getpid).result()
+    return pool
+
+def _prepared_files(pool, alias, json_files, prev_digests, max_inflight, with_tokens=False):
+    """
+    파일 준비 결과를 순서대로 반환. 대기 중인 결과 수를 제한해 앞 단계가 앞서 나가지 않도록 함.
+    대용량 파일은 풀로 보내지 않고 스트리밍 제너레이터로 반환 → 청크가 바로 embed_q로 흘러감.
+    """
+    inflight = deque()
+    for path in json_files:
+        if pool is None or is_large_file(path):
+            while inflight:
+                yield inflight.popleft().result()
+            yield prepare_file(alias, path, prev_digests.get(path), stream=is_large_file(path), with_tokens=with_tokens)
             continue
+        inflight.append(pool.submit(prepare_file, alias, path, prev_digests.get(path), with_tokens=with_tokens))
+        if len(inflight) >= max_inflight:
+            yield inflight.popleft().result()
+    while inflight:
+        yield inflight.popleft().result()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 클래스 단위 동기화 (전체 재구축 = 빈 매니페스트에서의 증분)
+# ──────────────────────────────────────────────────────────────────────────────
+class _RefCounter:
+    """여러 파일이 같은 uuid(동일 청크/표)를 가질 수 있으므로, 어느 파일도 참조하지 않게 된 uuid만 삭제."""
+    def __init__(self, id_lists):
+        self.count = {}
+        self.released = set()
+        for ids in id_lists:
+            for i in ids:
+                self.count[i] = self.count.get(i, 0) + 1
+
+    def acquire(self, i):
+        """참조 추가. 처음 참조되는 uuid면 True(적재 필요)."""
+        first = self.count.get(i, 0) <= 0
+        self.count[i] = self.count.get(i, 0) + 1
+        self.released.discard(i)
+        return first
+
+    def release(self, ids):
+        for i in ids:
+            self.count[i] = self.count.get(i, 1) - 1
+            if self.count[i] <= 0:
+                self.released.add(i)
+
+    def garbage(self):
+        return {i for i in self.released if self.count.get(i, 0) <= 0}
+
+def _sync_class(alias, class_name, folder, prev_files, *, data_root, upserter_kwargs, parse_workers=PARSE_WORKERS,
+                metrics=None):
+    """
+    폴더의 JSON과 이전 매니페스트(prev_files)를 비교해 바뀐 청크만 class_name에 upsert, 사라진 청크는 삭제.
+    청크 uuid는 alias 기준으로 만들어 버전 클래스가 바뀌어도 동일하게 유지.
+    metrics(StageMetrics)에 파일/청크/토큰 수와 단계별 ms를 누적.
+    적재 실패 uuid는 파일 엔트리에서 빼고 sha256을 비워 다음 실행에서 그 파일을 다시 처리.
+    반환: (새 매니페스트 엔트리, upsert 수, 삭제 수, 실패 수)
+    """
+    metrics = metrics or StageMetrics()
+    with_tokens = METRICS_COUNT_TOKENS
+    folder_path = os.path.join(data_root, folder)
+    json_files = sorted(glob.glob(os.path.join(folder_path, "**", "*.json"), recursive=True))
+    new_files = {}
+
+    chunk_refs = _RefCounter(entry.get("chunks", []) for entry in prev_files.values())
+    table_refs = _RefCounter(entry.get("tables", []) for entry in prev_files.values())
 
-        # 3) 파일별 로드 → 플랫 → 인서트
-        inserted = 0
-        for path in tqdm(json_files, desc=f"[{class_name}] files", unit="file"):
+    prev_digests = {
+        os.path.join(folder_path, rel): entry.get("sha256") for rel, entry in prev_files.items()
+    }
+    with _parse_pool(parse_workers) as pool, _Upserter(class_name, metrics=metrics, **upserter_kwargs) as up:
+        prepared = _prepared_files(pool, alias, json_files, prev_digests, max_inflight=parse_workers * 2,
+                                   with_tokens=with_tokens)
+        for res in tqdm(prepared, total=len(json_files), desc=f"[{class_name}] files", unit="file"):
+            rel = os.path.relpath(res["path"], folder_path)
+            prev = prev_files.get(rel)
+            metrics.add(files=1)
+            if res["unchanged"] or res["chunks"] is None:
+                metrics.add(files_failed=0 if res["unchanged"] else 1, **res["timings"])
+                if prev:
+                    new_files[rel] = prev  # 변경 없음 / 읽기 실패 시 기존 인덱스 유지
+                continue
+
+            old_ids = set((prev or {}).get("chunks", []))
+            old_tables = set((prev or {}).get("tables", []))
+            new_ids, new_tables = {}, {}
+            streamed = not isinstance(res["chunks"], list)
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                for uuid, doc_obj, text_to_embed, table in res["chunks"]:
+                    if streamed and with_tokens and CHUNK_MODE == "tokens":
+                        metrics.add(tokens=count_tokens(text_to_embed))  # 풀 경로는 워커가 timings로 반환
+                    if table and table[0] not in new_tables:
+                        new_tables[table[0]] = None
+                        if table[0] not in old_tables and table_refs.acquire(table[0]):
+                            up.add_table(*table)  # 섹션 표는 청크 수와 무관하게 1번만 적재
+                    if uuid in new_ids:
+                        continue
+                    new_ids[uuid] = None
+                    if uuid in old_ids:
+                        continue  # uuid가 내용 기반이므로 같은 uuid = 같은 청크
+                    if not chunk_refs.acquire(uuid):
+                        continue  # 다른 파일이 이미 적재했거나 이번 실행에서 넣은 청크
+                    metrics.add(chunks_embedded=1)
+                    up.add(uuid, doc_obj, text_to_embed)
             except Exception as e:
-                print(f"  ⚠️ load fail: {path} ({e})")
+                # 스트리밍 파싱 도중 실패: 이미 넣은 청크는 두고, 기존 매니페스트 엔트리를 유지
+                print(f"  ⚠️ stream fail: {res['path']} ({e})")
+                metrics.add(files_failed=1, **res["timings"])
+                if prev:
+                    new_files[rel] = prev
                 continue
+            metrics.add(files_changed=1, chunks=len(new_ids), **res["timings"])
+            chunk_refs.release(old_ids - set(new_ids))
+            table_refs.release(old_tables - set(new_tables))
+            new_files[rel] = {"sha256": res["sha256"], "chunks": list(new_ids), "tables": list(new_tables)}
 
-            if isinstance(data, dict):
-                entries = list(flatten_document(data))
-            elif isinstance(data, list):
-                entries = []
-                for d in data:
-                    if isinstance(d, dict):
-                        entries.extend(list(flatten_document(d)))
-            else:
-                continue
+        # 폴더에서 사라진 파일
+        for rel in set(prev_files) - set(new_files):
+            chunk_refs.release(prev_files[rel].get("chunks", []))
+            table_refs.release(prev_files[rel].get("tables", []))
 
-            for doc_obj in tqdm(entries, desc=f"[{class_name}] insert", leave=False):
-                text_to_embed = (doc_obj.get("content") or "").strip()
-                if not text_to_embed:
-                    continue
-                try:
-                    vec = embed_model.encode(text_to_embed, convert_to_numpy=True)
-                except Exception as e:
-                    print(f"  ⚠️ embed fail: {e}")
-                    continue
-
-                # 🔸 최소 변경 1줄: 클래스명을 basis에 포함해 클래스 간 UUID 충돌 방지
-                basis = f"{class_name}|{doc_obj.get('title','')}|{doc_obj.get('chapter_title','')}|{doc_obj.get('section_heading','')}|{text_to_embed}"
-                uuid = generate_uuid5(basis)
-
-                try:
-                    client.data_object.create(
-                        data_object=doc_obj,
-                        class_name=class_name,
-                        uuid=uuid,
-                        vector=vec
-                    )
-                    inserted += 1
-                except ObjectAlreadyExistsException:
-                    # 이미 있으면 교체(업데이트)
-                    client.data_object.replace(
-                        data_object=doc_obj,
-                        class_name=class_name,
-                        uuid=uuid,
-                        vector=vec
-                    )
-                except Exception as e:
-                    print(f"  ⚠️ insert fail: {e}")
-
-        print(f"✅ {class_name}: inserted {inserted} objects")
+    # 적재 실패분은 매니페스트에 남기지 않음 (쓰기 스레드 종료 후라 failed_ids가 확정됨)
+    failed = up.failed_ids
+    if failed:
+        for rel, entry in new_files.items():
+            if failed.intersection(entry.get("chunks", [])) or failed.intersection(entry.get("tables", [])):
+                new_files[rel] = {
+                    "sha256": None,
+                    "chunks": [i for i in entry.get("chunks", []) if i not in failed],
+                    "tables": [i for i in entry.get("tables", []) if i not in failed],
+                }
 
+    stale_chunks, stale_tables = chunk_refs.garbage(), table_refs.garbage()
+    with metrics.timer("delete_ms"):
+        if stale_chunks:
+            _delete_ids(class_name, stale_chunks)
+        if stale_tables:
+            _delete_ids(table_class_name(class_name), stale_tables)
+    metrics.add(objects_inserted=up.inserted, objects_deleted=len(stale_chunks) + len(stale_tables),
+                objects_failed=len(failed))
+    return new_files, up.inserted, len(stale_chunks), len(failed)
+
+def _drop_version(class_name):
+    _delete_class(class_name)
+    if table_class_name(class_name) in _existing_classes():
+        _delete_class(table_class_name(class_name))
+
+def drop_old_versions(aliases=None, *, grace: float = ALIAS_GC_GRACE_SEC):
+    """
+    포인터를 바꾼 지 grace초가 지난 alias의 이전 버전 클래스 삭제 (기본: 등록된 alias 전체).
+    질의 측 포인터 캐시(ALIAS_RESOLVE_TTL_SEC)가 이전 버전을 가리킬 수 있는 동안은 남겨 둠 → 다음 실행/--gc에서 삭제.
+    반환: 삭제한 클래스 목록
+    """
+    dropped = []
+    for alias in list_aliases(client) if aliases is None else aliases:
+        age = pointer_age(client, alias)
+        if age is None or age < grace:
+            continue
+        for old in stale_versions(client, alias):
+            print(f"🧹 drop old version '{old}'", flush=True)
+            _drop_version(old)
+            dropped.append(old)
+    return dropped
+
+def _manifest_files(manifest, alias, class_name):
+    """매니페스트가 같은 실제 클래스를 기록하고 있을 때만 이전 파일 목록을 신뢰."""
+    entry = manifest.get(alias) or {}
+    if entry.get("class") != class_name:
+        return {}
+    return entry.get("files", {})
+
+def build_index(
+    *,
+    incremental: bool = False,
+    data_root: str = DATA_ROOT,
+    use_batch: bool = True,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    batch_size: int = WEAVIATE_BATCH_SIZE,
+    num_workers: int = WEAVIATE_NUM_WORKERS,
+    parse_workers: int = PARSE_WORKERS,
+    gc_grace: float = ALIAS_GC_GRACE_SEC,
+    use_embed_cache: bool = True,
+    manifest_path: str = MANIFEST_PATH,
+    report_prefix: str = "ingest",
+    run_tags: dict = None,
+    summarize: bool = GENERATE_SUMMARIES
+):
+    """
+    data 하위 폴더(=클래스)별로 JSON을 청킹·임베딩해 Weaviate에 적재.
+    - incremental=False: 새 버전 클래스(<alias>_v<timestamp>_<suffix>)에 전체 적재 후 alias 포인터를 전환(블루/그린)
+                         → 재색인 중에도 질의는 기존 클래스로 응답. 적재 실패가 있으면 전환하지 않고 새 버전을 버림
+                         (이전 버전이 없을 때만 전환). 이전 버전은 전환 후 gc_grace초가 지난 뒤
+                         다음 실행 시작 시(또는 --gc) 삭제 → 실행 중에 기다리지 않음
+    - incremental=True : alias가 가리키는 클래스에 매니페스트 기준 바뀐 청크만 upsert, 사라진 청크만 삭제
+    - use_batch=True   : 청크를 embed_batch_size 단위로 묶어 임베딩하고 Weaviate batch API로 적재
+                         (uuid 지정 batch import는 upsert라 create/replace 2회 왕복이 1회로 줄어듦)
+    - use_batch=False  : 기존 방식(청크 1개씩 encode + create, 충돌 시 replace)
+    - parse_workers    : 로드/평탄화 프로세스 수, num_workers: 동시 쓰기 스레드 수
+    - use_embed_cache=False: 임베딩 캐시를 건너뜀(벤치마크에서 실제 encode 시간 측정용)
+    - summarize=True   : 포인터 전환 전에 summary가 빈 청크의 조항 요약 생성(저널에 있으면 LLM 없이 복원)
+    단계별 계측은 index_artifacts/reports/<report_prefix>_<timestamp>.json에 기록하고 리포트 dict를 반환.
+    적재 실패 수는 report["total"]["objects_failed"] (실패한 파일은 매니페스트상 변경으로 남아 다음 실행에서 재처리).
+    """
+    upserter_kwargs = dict(
+        use_batch=use_batch, embed_batch_size=embed_batch_size,
+        batch_size=batch_size, num_workers=num_workers, use_embed_cache=use_embed_cache
+    )
+    manifest = load_manifest(manifest_path)
+    total_objects, total_failed, t_start = 0, 0, time.perf_counter()
+    switched, touched = [], []
+    metrics = IngestMetrics(run_info={
+        "incremental": incremental, "data_root": data_root, "embedder": embed_model.cache_name,
+        "chunker": chunker_signature(), "use_batch": use_batch, "use_embed_cache": use_embed_cache,
+        "embed_batch_size": embed_batch_size, "batch_size": batch_size,
+        "num_workers": num_workers, "parse_workers": parse_workers, **(run_tags or {}),
+    })
+
+    drop_old_versions(grace=gc_grace)  # 지난 실행에서 전환한 alias의 이전 버전 정리
+
+    # ===== data 하위 폴더(=클래스) 반복 =====
+    subdirs = [d for d in sorted(os.listdir(data_root))
+               if os.path.isdir(os.path.join(data_root, d))]
+
+    for folder in subdirs:
+        alias = normalize_alias(folder)  # 최소 변경: 폴더명 그대로 사용(첫 글자만 Weaviate 규칙대로)
+        if not is_valid_class_name(alias):
+            # 한글/공백 등이 든 폴더명은 클래스를 만들 수 없음 → 임의로 바꾸지 않고 건너뜀(폴더명 변경 필요)
+            print(f"⚠️ skip folder '{folder}': '{alias}' is not a valid class name ([A-Z][_0-9A-Za-z]*)", flush=True)
+            continue
+
+        # 1) 적재 대상 클래스 결정
+        target = get_alias_target(client, alias) if incremental else None
+        if target is None and incremental and alias in _existing_classes():
+            target = alias  # 포인터 도입 전 클래스는 그대로 증분 반영
+        prev_entry = manifest.get(alias) or {}
+        if target is not None and prev_entry.get("chunker") != chunker_signature():
+            # 청킹 설정이 바뀌면 모든 청크 uuid가 바뀌므로 증분 대신 새 버전으로 재구축
+            print(f"ℹ️ chunker changed for '{alias}' → full blue/green rebuild", flush=True)
+            target = None
+        if target is not None and prev_entry.get("embedder", embed_model.model_name) != embed_model.cache_name:
+            # 임베딩 백엔드가 바뀌면 기존 벡터와 섞이지 않도록 전체 재구축
+            print(f"ℹ️ embed backend changed for '{alias}' → full blue/green rebuild", flush=True)
+            target = None
+        if target is None or target not in _existing_classes():
+            target, blue_green = new_version_name(alias), True
+        else:
+            blue_green = False
+        _ensure_class(target)
+        prev_files = {} if blue_green else _manifest_files(manifest, alias, target)
+
+        mode = "blue/green" if blue_green else "incremental"
+        print(f"\n📚 Building class '{target}' (alias '{alias}') from folder '{folder}' ({mode})")
+
+        # 2) 변경분 적재
+        t_class = time.perf_counter()
+        new_files, inserted, deleted, failed = _sync_class(
+            alias, target, folder, prev_files,
+            data_root=data_root, upserter_kwargs=upserter_kwargs, parse_workers=parse_workers,
+            metrics=metrics.for_class(alias)
+        )
+
+        # 2-1) 조항 요약: 전환 전에 채워 새 버전도 처음부터 요약을 가짐 (실패해도 적재는 유지)
+        summarized = 0
+        if summarize:
+            try:
+                st = summarize_class(client, target)
+                summarized = st["replayed"] + st["generated"]
+            except Exception as e:
+                print(f"⚠️ summary generation failed for '{target}': {e}", flush=True)
+
+        # 3) 블루/그린: 적재 완료 후 포인터 전환 (실패가 있으면 서비스 중인 이전 버전 유지)
+        live = get_alias_target(client, alias) or (alias if alias in _existing_classes() else None)
+        if blue_green and failed and live:
+            print(f"⚠️ {failed} objects failed in '{target}' → keep alias '{alias}' on '{live}', drop new version",
+                  flush=True)
+            _drop_version(target)
+            total_failed += failed
+            metrics.finish_class(alias, time.perf_counter() - t_class)
+            continue
+        if blue_green:
+            set_alias(client, alias, target)
+            switched.append(alias)
+            print(f"🔀 alias '{alias}' → '{target}'", flush=True)
+        manifest[alias] = {
+            "class": target, "chunker": chunker_signature(), "embedder": embed_model.cache_name,
+            "files": new_files,
+        }
+        save_manifest(manifest, manifest_path)
+
+        total_objects += inserted
+        total_failed += failed
+        if inserted or deleted or blue_green or summarized:
+            touched.append(alias)
+        if (inserted or deleted) and not blue_green:
+            bump_version(client, alias)  # 증분 반영도 질의 캐시를 무효화하도록 버전 증가
+        if deleted:
+            print(f"🗑️ {target}: deleted {deleted} stale objects", flush=True)
+        _report_throughput(target, inserted, time.perf_counter() - t_class)
+        metrics.finish_class(alias, time.perf_counter() - t_class)
+
+    _report_throughput("ALL", total_objects, time.perf_counter() - t_start)
+    print(f"🧠 embed cache: {embed_cache.stats()}", flush=True)
+    metrics.finish()
+    metrics.run_info["embed_cache"] = embed_cache.stats()
+    report = metrics.report()
+    print_report(report)
+    if total_failed:
+        print(f"⚠️ {total_failed} objects failed to load → their files will be reprocessed on the next run",
+              flush=True)
+    print(f"📝 ingest report → {metrics.write(prefix=report_prefix)}", flush=True)
+
+    # 4) 이전 버전 정리: 질의 측 포인터 캐시가 만료된 뒤라야 안전 → grace가 지나지 않았으면 다음 실행에서
+    if switched and not drop_old_versions(switched, grace=gc_grace):
+        print(f"ℹ️ old versions of {switched} are dropped by the next build after {gc_grace:.0f}s "
+              f"(or python make_DB.py --gc)", flush=True)
+
+    # 5) 로컬 검색용 스냅샷 + 키워드(BM25/조문) + 문서/장/절 계층 인덱스 + 규정명 사전 갱신 (변경된 alias만)
+    if EXPORT_LOCAL_SNAPSHOT:
+        for alias in touched:
+            try:
+                export_snapshot(client, alias)
+                build_keyword_index(alias)
+                build_outline_index(alias)
+                build_title_dict(alias)
+            except Exception as e:
+                print(f"⚠️ local snapshot export failed for '{alias}': {e}", flush=True)
+        if touched:
+            try:
+                build_router()  # 소주제 자동 라우팅용 클래스 프로토타입
+            except Exception as e:
+                print(f"⚠️ topic router build failed: {e}", flush=True)
     print("\n🎉 모든 폴더 인덱싱 완료")
+    return report
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 잘림(truncation) 리포트: 현재 청킹 설정에서 모델 max_seq_length를 넘어 임베딩되지 않는 비율
+# ──────────────────────────────────────────────────────────────────────────────
+def truncation_report(*, data_root: str = DATA_ROOT, mode: str = CHUNK_MODE):
+    max_len = embed_model.max_seq_length
+    tokenizer = embed_model.tokenizer
+    _configure_chunker(mode)
+    overall = {"chunks": 0, "truncated_chunks": 0, "tokens": 0, "truncated_tokens": 0}
+    report = {}
+    try:
+        for folder in sorted(os.listdir(data_root)):
+            folder_path = os.path.join(data_root, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            stats = {"chunks": 0, "truncated_chunks": 0, "tokens": 0, "truncated_tokens": 0}
+            for path in glob.glob(os.path.join(folder_path, "**", "*.json"), recursive=True):
+                for doc_obj in load_entries(path) or []:
+                    text = (doc_obj.get("content") or "").strip()
+                    if not text:
+                        continue
+                    n = count_tokens(text, tokenizer) + 2  # [CLS]/[SEP]
+                    stats["chunks"] += 1
+                    stats["tokens"] += n
+                    if n > max_len:
+                        stats["truncated_chunks"] += 1
+                        stats["truncated_tokens"] += n - max_len
+            for k in overall:
+                overall[k] += stats[k]
+            report[folder] = stats
+    finally:
+        _configure_chunker()  # 인덱싱용 설정 복구
+
+    report["ALL"] = overall
+    print(f"\n✂️ truncation report (mode={mode}, max_seq_length={max_len})")
+    for name, st in report.items():
+        ratio = st["truncated_tokens"] / st["tokens"] if st["tokens"] else 0.0
+        print(f"  {name}: {st['truncated_chunks']}/{st['chunks']} chunks truncated, "
+              f"{st['truncated_tokens']}/{st['tokens']} tokens not embedded ({ratio:.1%})")
+    return report
+
+# ──────────────────────────────────────────────────────────────────────────────
+# watch 모드 (폴링으로 변경 감지 → 증분 반영)
+# ──────────────────────────────────────────────────────────────────────────────
+def _tree_signature(data_root):
+    sig = {}
+    for path in glob.glob(os.path.join(data_root, "*", "**", "*.json"), recursive=True):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sig[path] = (st.st_mtime_ns, st.st_size)
+    return sig
+
+def watch_index(*, data_root: str = DATA_ROOT, interval: float = WATCH_INTERVAL_SEC, **build_kwargs):
+    """data 폴더를 주기적으로 확인하다가 JSON 추가/수정/삭제가 생기면 증분 인덱싱 실행."""
+    report = build_index(incremental=True, data_root=data_root, **build_kwargs)
+    last = {} if report["total"].get("objects_failed") else _tree_signature(data_root)
+    print(f"👀 watching '{data_root}' (every {interval}s, Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(interval)
+            now = _tree_signature(data_root)
+            if now == last:
+                continue
+            time.sleep(WATCH_DEBOUNCE_SEC)  # 파일 쓰기 도중 반영 방지
+            last = _tree_signature(data_root)
+            report = build_index(incremental=True, data_root=data_root, **build_kwargs)
+            if report["total"].get("objects_failed"):
+                last = {}  # 실패분이 있으면 파일 변경이 없어도 다음 주기에 재시도
+    except KeyboardInterrupt:
+        print("\n👋 watch stopped")
 
 if __name__ == "__main__":
-    build_index()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="규정 JSON → Weaviate 인덱싱")
+    parser.add_argument("--incremental", action="store_true", help="매니페스트 기준 변경분만 반영")
+    parser.add_argument("--watch", action="store_true", help="변경 감지 시 증분 반영을 계속 수행")
+    parser.add_argument("--no-batch", action="store_true", help="기존 객체 단위 create/replace 사용")
+    parser.add_argument("--batch-size", type=int, default=WEAVIATE_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WEAVIATE_NUM_WORKERS, help="쓰기 스레드 수")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="로드/평탄화 프로세스 수")
+    parser.add_argument("--summarize", action="store_true", help="청크별 조항 요약 생성/복원(summary 속성)")
+    parser.add_argument("--gc", action="store_true", help="전환 후 유예 시간이 지난 이전 버전 클래스만 삭제")
+    parser.add_argument("--truncation-report", choices=["tokens", "chars"],
+                        help="해당 청킹 방식에서 max_seq_length로 잘리는 비율만 출력")
+    args = parser.parse_args()
+
+    if args.gc:
+        drop_old_versions()
+        raise SystemExit(0)
+    if args.truncation_report:
+        truncation_report(mode=args.truncation_report)
+        raise SystemExit(0)
+
+    kwargs = dict(
+        use_batch=not args.no_batch, batch_size=args.batch_size,
+        num_workers=args.workers, parse_workers=args.parse_workers,
+        summarize=args.summarize or GENERATE_SUMMARIES
+    )
+    if args.watch:
+        watch_index(**kwargs)
+    else:
+        report = build_index(incremental=args.incremental, **kwargs)
+        if report["total"].get("objects_failed"):
+            raise SystemExit(1)  # 일부 객체 적재 실패 → 스케줄러가 실패로 인식하도록
@@ -1,22 +1,160 @@
+import os
+import time
 import openai
 import json
+import sqlite3
+import hashlib
 import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional
 
-def search_realtime_news(user_question: str) -> list:
-    """
-    사용자의 질문을 받아 Perplexity API로 실시간 웹 검색을 수행하고,
-    관련 뉴스 기사 목록을 반환합니다.
-    """
+import numpy as np
 
-    try:
-        client = openai.OpenAI(
-            api_key="pplx-XXXXXXXXXXXXXXXX",
-            base_url="https://api.perplexity.ai"
+from query_cache import get_cache, normalize_query, register_cache
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 실시간 뉴스 캐시
+# - 질의 결과: 정규화 질의 → 기사 목록, NEWS_CACHE_TTL_SEC 동안 재사용 (인기 주제 재조회 방지)
+# - 기사 저장소: index_artifacts/news/news.sqlite, URL 기준 중복 제거(URL이 없으면 제목+본문 해시)
+#   제목·본문과 그 임베딩(모델명 + 텍스트 해시 함께 저장)을 보관 → 이미 본 기사는 다시 인코딩하지 않음
+# - 적중률: cache_stats()의 "news"(질의 캐시) / "news_store"(기사·임베딩) → app.py /cache/stats
+# ──────────────────────────────────────────────────────────────────────────────
+NEWS_CACHE_TTL_SEC = 30 * 60
+NEWS_CACHE_MAX_ENTRIES = 256
+NEWS_STORE_PATH = os.path.join("index_artifacts", "news", "news.sqlite")
+
+PERPLEXITY_API_KEY = "pplx-XXXXXXXXXXXXXXXX"
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Perplexity(OpenAI 호환) 클라이언트 1개를 재사용 (연결 풀 공유)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = openai.OpenAI(api_key=PERPLEXITY_API_KEY, base_url=PERPLEXITY_BASE_URL)
+        return _client
+
+news_cache = get_cache("news", max_entries=NEWS_CACHE_MAX_ENTRIES, ttl=NEWS_CACHE_TTL_SEC)
+
+def _article_text(n: Dict[str, Any]) -> str:
+    return ((n.get("title") or "").strip() + "\n" + (n.get("contents") or "").strip()).strip()
+
+def _article_key(n: Dict[str, Any]) -> str:
+    url = (n.get("url") or "").strip()
+    return url or "sha1:" + hashlib.sha1(_article_text(n).encode("utf-8")).hexdigest()
+
+class NewsStore:
+    def __init__(self, path: str = NEWS_STORE_PATH, name: str = "news_store"):
+        self.name = name
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "key TEXT PRIMARY KEY, url TEXT, title TEXT, contents TEXT, text_hash TEXT, "
+            "model TEXT, embedding BLOB, first_seen REAL, last_seen REAL)"
         )
+        self.new_articles = 0
+        self.seen_articles = 0
+        self.embed_hits = 0
+        self.embed_misses = 0
+
+    def upsert(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """기사 저장(URL 기준 중복 제거) 후 응답 순서대로 중복 없는 목록 반환."""
+        out, seen, now = [], set(), time.time()
+        with self._lock:
+            for n in articles:
+                if not isinstance(n, dict):
+                    continue
+                key = _article_key(n)
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.append(n)
+                th = hashlib.sha1(_article_text(n).encode("utf-8")).hexdigest()
+                row = self._db.execute("SELECT text_hash FROM articles WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.new_articles += 1
+                    self._db.execute(
+                        "INSERT INTO articles (key, url, title, contents, text_hash, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, n.get("url") or "", n.get("title") or "", n.get("contents") or "", th, now, now)
+                    )
+                else:
+                    self.seen_articles += 1
+                    if row[0] != th:  # 같은 URL의 요약이 바뀌면 임베딩을 다시 계산하도록 비움
+                        self._db.execute(
+                            "UPDATE articles SET title = ?, contents = ?, text_hash = ?, model = NULL, "
+                            "embedding = NULL, last_seen = ? WHERE key = ?",
+                            (n.get("title") or "", n.get("contents") or "", th, now, key)
+                        )
+                    else:
+                        self._db.execute("UPDATE articles SET last_seen = ? WHERE key = ?", (now, key))
+        return out
+
+    def vectors(self, articles: List[Dict[str, Any]], *, model: str,
+                encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """기사별 제목+본문 임베딩 [N, dim]. 저장된 것은 재사용, 없는 것만 encode 후 저장."""
+        keys = [_article_key(n) for n in articles]
+        texts = [_article_text(n) for n in articles]
+        hashes = [hashlib.sha1(t.encode("utf-8")).hexdigest() for t in texts]
+        vecs: List[Optional[np.ndarray]] = [None] * len(articles)
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._db.execute(
+                    "SELECT embedding FROM articles WHERE key = ? AND model = ? AND text_hash = ?",
+                    (key, model, hashes[i])
+                ).fetchone()
+                if row and row[0] is not None:
+                    vecs[i] = np.frombuffer(row[0], dtype=np.float32)
+        miss = [i for i, v in enumerate(vecs) if v is None]
+        with self._lock:
+            self.embed_hits += len(articles) - len(miss)
+            self.embed_misses += len(miss)
+        if miss:
+            enc = np.asarray(encode([texts[i] for i in miss]), dtype=np.float32)
+            now = time.time()
+            with self._lock:
+                for i, v in zip(miss, enc):
+                    vecs[i] = v
+                    self._db.execute(
+                        "INSERT INTO articles (key, url, title, contents, text_hash, model, embedding, "
+                        "first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET text_hash = excluded.text_hash, "
+                        "model = excluded.model, embedding = excluded.embedding, last_seen = excluded.last_seen",
+                        (keys[i], articles[i].get("url") or "", articles[i].get("title") or "",
+                         articles[i].get("contents") or "", hashes[i], model, v.tobytes(), now, now)
+                    )
+        return np.stack(vecs) if vecs else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            lookups = self.embed_hits + self.embed_misses
+            return {
+                "articles": total, "new_articles": self.new_articles, "seen_articles": self.seen_articles,
+                "embed_hits": self.embed_hits, "embed_misses": self.embed_misses,
+                "embed_hit_rate": round(self.embed_hits / lookups, 3) if lookups else 0.0,
+            }
+
+_store = None
+_store_lock = threading.Lock()
 
-        current_date_str = datetime.datetime.now().strftime('%Y년 %m월 %d일')
+def get_news_store() -> NewsStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = register_cache(NewsStore())
+        return _store
 
-        prompt = f"""
+def _fetch_news(user_question: str) -> list:
+    current_date_str = datetime.datetime.now().strftime('%Y년 %m월 %d일')
+
+    prompt = f"""
         # [역할 및 목표 정의]
         당신은 대한민국 K리그의 정책, 운영, 상벌 규정에 대해 깊이 있는 분석을 제공하는 'K리그 전문 뉴스 분석가'입니다. 당신의 목표는 단순 사실 전달을 넘어, 사용자의 질문 의도에 맞는 심층적인 분석이나 평가가 담긴 기사를 찾아내는 것입니다.
 
@@ -51,20 +189,44 @@ def search_realtime_news(user_question: str) -> list:
           ]
         """
 
-        # ▼▼▼ 오타 수정된 부분 ▼▼▼
-        response = client.chat.completions.create(
-            model="sonar",
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        response_content = response.choices[0].message.content
-        news_articles = json.loads(response_content)
-        
-        return news_articles
+    # ▼▼▼ 오타 수정된 부분 ▼▼▼
+    response = get_client().chat.completions.create(
+        model="sonar",
+        messages=[{"role": "user", "content": prompt}],
+    )
 
+    response_content = response.choices[0].message.content
+    try:
+        return json.loads(response_content)
     except json.JSONDecodeError:
         print(f"❌ 오류: API가 유효한 JSON을 반환하지 않았습니다. 응답: {response_content}")
+        raise
+
+def search_realtime_news(user_question: str) -> list:
+    """
+    사용자의 질문을 받아 Perplexity API로 실시간 웹 검색을 수행하고,
+    관련 뉴스 기사 목록을 반환합니다.
+    - 같은 (정규화) 질문은 NEWS_CACHE_TTL_SEC 동안 캐시 결과 사용, 기사는 URL 기준 중복 제거
+    - 실패 결과는 캐시하지 않음
+    """
+    key = normalize_query(user_question)
+    cached = news_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    try:
+        news_articles = _fetch_news(user_question)
+    except json.JSONDecodeError:
         return []
     except Exception as e:
         print(f"❌ Perplexity API 요청 중 오류 발생: {e}")
-        return []
\ No newline at end of file
+        return []
+    if not isinstance(news_articles, list):
+        news_articles = []
+    try:
+        news_articles = get_news_store().upsert(news_articles)
+    except Exception as e:
+        print(f"⚠️ news store write failed: {e}", flush=True)  # 저장 실패해도 이번 결과는 사용
+
+    news_cache.put(key, news_articles)
+    return list(news_articles)
@@ -0,0 +1,149 @@
+import os
+import json
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import index_alias
+from local_index import LOCAL_INDEX_DIR
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 문서 → 장 → 절 계층 인덱스 (coarse-to-fine 검색)
+# - local_index 스냅샷에서 빌드: 같은 title / (title, chapter_title) / (title, chapter_title, section_heading)
+#   청크 벡터의 평균(정규화)을 문서·장·절 벡터로 사용 → 추가 임베딩 없음
+#     index_artifacts/outline/<Alias>.npz  : doc/chapter/section 벡터 + 부모 인덱스
+#     index_artifacts/outline/<Alias>.json : 라벨 + 절별 청크 id
+# - 질의: 상위 문서 → 그 안의 상위 장 → 그 안의 상위 절 → 해당 절의 청크 id만 near_vector 후보로 사용
+#   규정이 늘어도 후보 수는 (절 수 × 절당 청크 수)로 고정
+# - 청크가 OUTLINE_MIN_CHUNKS(2000)개 미만인 클래스는 기본적으로 사용하지 않음 (평면 검색, search_answer)
+# ──────────────────────────────────────────────────────────────────────────────
+OUTLINE_INDEX_DIR = os.path.join("index_artifacts", "outline")
+OUTLINE_TOP_DOCS = 4
+OUTLINE_TOP_CHAPTERS = 8
+OUTLINE_TOP_SECTIONS = 16
+OUTLINE_MIN_CHUNKS = 2000   # 청크가 이보다 적은 클래스는 평면 검색이 더 쌈 → 계층 검색 생략
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    return v / np.clip(np.linalg.norm(v, axis=-1, keepdims=True), 1e-12, None)
+
+def _group_means(vectors: np.ndarray, groups: np.ndarray, n: int) -> np.ndarray:
+    sums = np.zeros((n, vectors.shape[1]), dtype=np.float32)
+    np.add.at(sums, groups, vectors)
+    return _normalize(sums)
+
+def build_outline_index(alias: str, *, snapshot_dir: str = LOCAL_INDEX_DIR, out_dir: str = OUTLINE_INDEX_DIR) -> str:
+    alias = index_alias.normalize_alias(alias)
+    src = os.path.join(snapshot_dir, alias)
+    vectors = np.asarray(np.load(os.path.join(src, "vectors.npy"), mmap_mode="r"), dtype=np.float32)
+    with open(os.path.join(src, "meta.jsonl"), "r", encoding="utf-8") as f:
+        metas = [json.loads(line) for line in f if line.strip()]
+
+    docs, chapters, sections = {}, {}, {}
+    chap_parent, sec_parent, sec_chunks = [], [], []
+    row_doc, row_chap, row_sec = [], [], []
+    for m in metas:
+        t, c, h = m.get("title") or "", m.get("chapter_title") or "", m.get("section_heading") or ""
+        d = docs.setdefault(t, len(docs))
+        if (t, c) not in chapters:
+            chapters[(t, c)] = len(chapters)
+            chap_parent.append(d)
+        ch = chapters[(t, c)]
+        if (t, c, h) not in sections:
+            sections[(t, c, h)] = len(sections)
+            sec_parent.append(ch)
+            sec_chunks.append([])
+        sc = sections[(t, c, h)]
+        sec_chunks[sc].append(m["id"])
+        row_doc.append(d)
+        row_chap.append(ch)
+        row_sec.append(sc)
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, f"{alias}.tmp.npz")
+    np.savez(
+        tmp,
+        doc_vecs=_group_means(vectors, np.asarray(row_doc, dtype=np.int64), len(docs)),
+        chap_vecs=_group_means(vectors, np.asarray(row_chap, dtype=np.int64), len(chapters)),
+        sec_vecs=_group_means(vectors, np.asarray(row_sec, dtype=np.int64), len(sections)),
+        chap_parent=np.asarray(chap_parent, dtype=np.int64),
+        sec_parent=np.asarray(sec_parent, dtype=np.int64),
+    )
+    with open(os.path.join(out_dir, f"{alias}.json.tmp"), "w", encoding="utf-8") as f:
+        json.dump({
+            "alias": alias, "chunks": len(metas),
+            "docs": list(docs), "chapters": [list(k) for k in chapters], "sections": [list(k) for k in sections],
+            "section_chunks": sec_chunks,
+        }, f, ensure_ascii=False)
+    os.replace(os.path.join(out_dir, f"{alias}.json.tmp"), os.path.join(out_dir, f"{alias}.json"))
+    os.replace(tmp, os.path.join(out_dir, f"{alias}.npz"))
+    print(f"🗂️ outline '{alias}': {len(docs)} docs, {len(chapters)} chapters, {len(sections)} sections", flush=True)
+    return os.path.join(out_dir, f"{alias}.npz")
+
+def _top(scores: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+    """rows 중 점수 상위 k개 (점수 내림차순)."""
+    if len(rows) > k:
+        rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+    return rows[np.argsort(-scores[rows])]
+
+class OutlineIndex:
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.doc_vecs = data["doc_vecs"]
+            self.chap_vecs = data["chap_vecs"]
+            self.sec_vecs = data["sec_vecs"]
+            self.chap_parent = data["chap_parent"]
+            self.sec_parent = data["sec_parent"]
+        with open(path[:-len(".npz")] + ".json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        self.chunks: int = info["chunks"]
+        self.sections: List[List[str]] = info["sections"]
+        self.section_chunks: List[List[str]] = info["section_chunks"]
+
+    def select_sections(self, query_vec, *, top_docs: int = OUTLINE_TOP_DOCS,
+                        top_chapters: int = OUTLINE_TOP_CHAPTERS,
+                        top_sections: int = OUTLINE_TOP_SECTIONS) -> List[int]:
+        """문서 → 장 → 절 순으로 좁혀 상위 절 인덱스 반환."""
+        if not len(self.sec_vecs):
+            return []
+        q = _normalize(np.asarray(query_vec, dtype=np.float32).ravel())
+        docs = _top(self.doc_vecs @ q, np.arange(len(self.doc_vecs)), top_docs)
+        chaps = np.flatnonzero(np.isin(self.chap_parent, docs))
+        chaps = _top(self.chap_vecs @ q, chaps, top_chapters)
+        secs = np.flatnonzero(np.isin(self.sec_parent, chaps))
+        return [int(i) for i in _top(self.sec_vecs @ q, secs, top_sections)]
+
+    def candidate_ids(self, query_vec, **kwargs) -> List[str]:
+        return [cid for sec in self.select_sections(query_vec, **kwargs) for cid in self.section_chunks[sec]]
+
+_cache: Dict[str, Tuple[float, OutlineIndex]] = {}
+_cache_lock = threading.Lock()
+
+def get_outline_index(class_or_alias: str, *, root: str = OUTLINE_INDEX_DIR) -> Optional[OutlineIndex]:
+    """실제 클래스명이나 alias로 계층 인덱스 조회(파일이 바뀌면 다시 읽음). 없으면 None."""
+    alias = index_alias.alias_of(class_or_alias)
+    path = os.path.join(root, f"{alias}.npz")
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _cache_lock:
+        hit = _cache.get(alias)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    idx = OutlineIndex(path)
+    with _cache_lock:
+        _cache[alias] = (mtime, idx)
+    return idx
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local_index 스냅샷 → 문서/장/절 계층 인덱스 빌드")
+    parser.add_argument("aliases", nargs="*", help="빌드할 alias (기본: 스냅샷이 있는 alias 전체)")
+    args = parser.parse_args()
+    aliases = args.aliases or sorted(
+        d for d in os.listdir(LOCAL_INDEX_DIR)
+        if os.path.exists(os.path.join(LOCAL_INDEX_DIR, d, "info.json"))
+    )
+    for a in aliases:
+        build_outline_index(a)
@@ -0,0 +1,99 @@
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 프로세스 내 LRU + TTL 캐시 (질의/검색 결과 등)
+# - 항목마다 색인 버전 스탬프를 같이 저장 → 조회 시 버전이 다르면 버림(재색인 자동 무효화)
+# - 이름별 레지스트리: cache_stats()로 전체 적중률 조회 (app.py /cache/stats)
+# ──────────────────────────────────────────────────────────────────────────────
+QUERY_CACHE_ENABLED = True
+QUERY_CACHE_MAX_ENTRIES = 512
+QUERY_CACHE_TTL_SEC = 6 * 3600
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?？.!。]+$")
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 질의 정규화: NFKC + 소문자 + 공백 정리 + 끝 문장부호 제거."""
+    q = unicodedata.normalize("NFKC", query or "").lower()
+    q = _SPACES.sub(" ", q).strip()
+    return _TRAILING_PUNCT.sub("", q)
+
+class VersionedLRUCache:
+    def __init__(self, name: str, *, max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 ttl: float = QUERY_CACHE_TTL_SEC):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key → (version, 만료 시각, value)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0       # 버전 불일치로 버린 항목
+        self.expired = 0     # TTL 만료로 버린 항목
+        self.evictions = 0   # 용량 초과로 밀려난 항목
+
+    def get(self, key: Hashable, version: str = "") -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                if item[0] != version:
+                    self.stale += 1
+                    del self._items[key]
+                elif item[1] <= now:
+                    self.expired += 1
+                    del self._items[key]
+                else:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return item[2]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, version: str = "") -> None:
+        with self._lock:
+            self._items[key] = (version, time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items), "max_entries": self.max_entries, "ttl_sec": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stale": self.stale, "expired": self.expired, "evictions": self.evictions,
+            }
+
+_registry: Dict[str, Any] = {}  # 이름 → stats()를 가진 캐시 객체
+_registry_lock = threading.Lock()
+
+def register_cache(cache: Any) -> Any:
+    """다른 모듈의 캐시(name, stats() 필요)도 cache_stats()에 포함."""
+    with _registry_lock:
+        _registry[cache.name] = cache
+    return cache
+
+def get_cache(name: str, **kwargs) -> VersionedLRUCache:
+    """이름별 싱글톤 캐시 (처음 만들 때만 kwargs 적용)."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = VersionedLRUCache(name, **kwargs)
+        return _registry[name]
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {c.name: c.stats() for c in caches}
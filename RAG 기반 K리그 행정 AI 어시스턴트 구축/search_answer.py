@@ -1,22 +1,45 @@
 import time
-from typing import List, Tuple, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from typing import List, Tuple, Dict, Any, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 import weaviate
-import torch
 from tqdm import tqdm  # ✅ 이걸로 수정반
-from news_search import search_realtime_news
+from news_search import search_realtime_news, get_news_store
+import index_alias
+import local_index
+import keyword_index
+from outline_index import get_outline_index, OUTLINE_MIN_CHUNKS
+from title_filter import get_title_dict
+from doc_summary import generate_summary, SUMMARY_MODEL, SUMMARY_MAX_OUTPUT_TOKENS, SUMMARY_TEMPERATURE
+from fast_summary import extractive_summarize
+from query_cache import get_cache, normalize_query, QUERY_CACHE_ENABLED
+from embedding_cache import get_embedding_cache
+from embed_backend import load_embed_backend, EMBED_BACKEND
 
 from google import genai
 from google.genai import types
 
-# ✅ Weaviate 클라이언트 연결
-client = weaviate.Client("http://localhost:8080")
+# ✅ 검색 백엔드: "weaviate" = Weaviate 서버, "local" = index_artifacts/local_index 스냅샷(프로세스 내 NumPy, 오프라인)
+SEARCH_BACKEND = "weaviate"
 
-# ✅ 임베딩 모델 (고정도 한국어)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-embed_model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
-embed_model.to(device) 
+# ✅ Weaviate 클라이언트 연결 (첫 사용 시 연결 → 컨테이너 없이도 앱 기동 가능)
+WEAVIATE_URL = "http://localhost:8080"
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = weaviate.Client(WEAVIATE_URL)
+        return _client
+
+# ✅ 임베딩 모델 (고정도 한국어) — make_DB와 같은 백엔드를 써야 인덱스 벡터와 질의 벡터가 맞음
+embed_model = load_embed_backend(EMBED_BACKEND)
+device = embed_model.device
+embed_cache = get_embedding_cache(embed_model.cache_name, embed_model)  # make_DB와 같은 디스크 캐시 공유(조회만)
+query_vec_cache = get_cache("query_vec")  # 질의 벡터는 프로세스 메모리에만 (질문 원문을 디스크에 남기지 않음)
 
 # ✅ google gemini 활용
 genai_client = genai.Client(api_key="XXXXXXXXXXXXX")
@@ -24,13 +47,69 @@ genai_client = genai.Client(api_key="XXXXXXXXXXXXX")
 #################################################################################################
 
 def _build_where_ids(id_list):
-    return {
-        "operator": "Or",
-        "operands": [
-            {"path": ["id"], "operator": "Equal", "valueString": _id}
-            for _id in id_list
-        ]
-    }
+    # id 개수만큼 Or(Equal) 피연산자를 늘리는 대신 ContainsAny 1개로 묶음
+    return {"path": ["id"], "operator": "ContainsAny", "valueTextArray": list(id_list)}
+
+def _build_where(ids=None, filters=None):
+    """id 제한 + 속성 필터({속성: [허용 값...]}, 값끼리 Or / 속성끼리 And)."""
+    operands = [_build_where_ids(ids)] if ids is not None else []
+    for prop, values in (filters or {}).items():
+        eq = [{"path": [prop], "operator": "Equal", "valueText": v} for v in values]
+        operands.append(eq[0] if len(eq) == 1 else {"operator": "Or", "operands": eq})
+    if not operands:
+        return None
+    return operands[0] if len(operands) == 1 else {"operator": "And", "operands": operands}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 검색 백엔드 공통 기본 연산 (SEARCH_BACKEND에 따라 Weaviate / 로컬 스냅샷)
+# 반환 형식은 둘 다 Weaviate Get 결과: [{속성..., "_additional": {id, distance?, vector?}}]
+# ──────────────────────────────────────────────────────────────────────────────
+SCHEMA_PROPS_TTL_SEC = 60.0   # 클래스별 속성 목록 캐시 (재색인으로 속성이 추가되면 이 시간 안에 반영)
+_schema_props: Dict[str, Tuple[set, float]] = {}
+_schema_props_lock = threading.Lock()
+
+def _existing_props(index_class, props):
+    """클래스에 없는 선택 속성(예: 이전 스키마의 summary)은 빼고 조회 → GraphQL 오류 방지."""
+    now = time.monotonic()
+    with _schema_props_lock:
+        hit = _schema_props.get(index_class)
+    if hit is None or hit[1] <= now:
+        names = {p["name"] for p in get_client().schema.get(index_class).get("properties", [])}
+        hit = (names, now + SCHEMA_PROPS_TTL_SEC)
+        with _schema_props_lock:
+            _schema_props[index_class] = hit
+    return [p for p in props if p in hit[0]]
+
+def _near_vector(index_class, vec, *, certainty, limit, props=(), ids=None, filters=None, with_vector=False):
+    if SEARCH_BACKEND == "local":
+        return local_index.get_store().index_for(index_class).near_vector(
+            vec, certainty=certainty, limit=limit, props=list(props), ids=ids, filters=filters,
+            with_vector=with_vector
+        )
+    additional = "_additional { id distance vector }" if with_vector else "_additional { id distance }"
+    q = get_client().query.get(index_class, _existing_props(index_class, props) + [additional]) \
+        .with_near_vector({"vector": vec, "certainty": certainty})
+    where = _build_where(ids, filters)
+    if where is not None:
+        q = q.with_where(where)
+    return q.with_limit(limit).do()["data"]["Get"][index_class]
+
+def _get_by_ids(index_class, ids, props, *, with_vector=False):
+    if not ids:
+        return []
+    if SEARCH_BACKEND == "local":
+        return local_index.get_store().index_for(index_class).get(list(ids), list(props), with_vector=with_vector)
+    additional = "_additional { id vector }" if with_vector else "_additional { id }"
+    return get_client().query.get(
+        index_class, _existing_props(index_class, props) + [additional]
+    ).with_where(_build_where_ids(ids)).with_limit(len(ids)).do()["data"]["Get"][index_class]
+
+def _get_tables(index_class, table_ids) -> Dict[str, str]:
+    if SEARCH_BACKEND == "local":
+        return local_index.get_store().index_for(index_class).get_tables(list(table_ids))
+    table_class = index_alias.table_class_name(index_class)
+    rows = _get_by_ids(table_class, table_ids, ["table_json"])
+    return {(r.get("_additional") or {}).get("id", ""): r.get("table_json", "") for r in rows}
 
 INDEX_CLASS = "k_league"
 NEAR_CERTAINTY = 0.7
@@ -38,6 +117,14 @@ TOPK_STAGE1 = 20   # 1차 검색
 TOPK_FINAL = 7     # 최종 검색 문서 개수
 LATE_FUSION_ALPHA = 0.6
 LOW_CONF_FALLBACK = 0.25  # top_score < 0.25면 리파인 폴백
+RETRIEVAL_MODE = "single"  # "single" = near_vector 1회로 검색+로컬 리랭킹, "legacy" = stage1/fetch/finalfetch 다단계
+DISPLAY_PROPS = ["title", "chapter_title", "section_heading", "content", "table_id", "summary"]  # 요약/답변에 쓰는 최소 속성
+TOPK_KEYWORD = 10           # BM25 후보 수 (벡터 후보에 없는 것만 추가 조회)
+KEYWORD_FUSION_BETA = 0.3   # 최종 점수 = (1-β)·벡터 late-fusion + β·BM25(최고점=1 정규화)
+ARTICLE_EXACT_MAX = 3       # 조문 번호 정확 일치로 맨 앞에 올리는 최대 청크 수
+FEDERATED_MAX_WORKERS = 4   # 통합 검색 시 클래스별 동시 조회 수
+HIERARCHICAL_RETRIEVAL = True  # 문서→장→절로 좁힌 청크만 1차 검색 (outline_index, 큰 클래스만)
+METADATA_PREFILTER = True      # 질의에 규정명/장 제목이 있으면 where 필터로 검색 범위 제한 (title_filter)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # (공용) 유틸
@@ -48,9 +135,95 @@ def _extract_doc_text(doc: Dict[str, Any]) -> str:
 
 def _by_id(docs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     return {(d.get("_additional") or {}).get("id", ""): d for d in docs}
+
+def _doc_vector(doc: Dict[str, Any]):
+    """문서에 실려 온 저장 벡터('vector' 또는 _additional.vector). 없으면 None."""
+    v = doc.get("vector")
+    if v is None:
+        v = (doc.get("_additional") or {}).get("vector")
+    return v
+
+def _cos_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """행 단위 코사인 유사도 [len(a) x len(b)]."""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    return a @ b.T
+
+def attach_vectors(docs: List[Dict[str, Any]], vectors: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """1차 검색에서 받은 저장 벡터를 최종 문서에 'vector'로 실어 줌(뉴스 비교 시 재임베딩 방지)."""
+    for d in docs:
+        v = vectors.get((d.get("_additional") or {}).get("id", ""))
+        if v is not None and d.get("vector") is None:
+            d["vector"] = v
+    return docs
+
+def attach_tables(docs: List[Dict[str, Any]], *, index_class: str = INDEX_CLASS) -> List[Dict[str, Any]]:
+    """
+    최종 문서의 table_id로 섹션 표(<class>_Table)를 한 번에 조회해 table_json을 채움.
+    표는 섹션당 1개만 저장되므로 같은 섹션 청크가 여러 개여도 1번만 가져옴.
+    """
+    table_ids = list(dict.fromkeys(d.get("table_id") for d in docs if d.get("table_id")))
+    if not table_ids:
+        return docs
+    try:
+        tables = _get_tables(index_class, table_ids)
+    except Exception:
+        return docs  # 표 조회 실패 시에도 본문(content, 표 평탄화 텍스트 포함)으로 답변 진행
+    for d in docs:
+        if d.get("table_id") in tables:
+            d["table_json"] = tables[d["table_id"]]
+    return docs
+
+def resolve_index_class(alias: str) -> str:
+    """논리 클래스명(TOPIC_CONFIG의 index_class) → 현재 서비스 중인 실제 클래스명."""
+    if SEARCH_BACKEND == "local":
+        return local_index.get_store().resolve(alias)
+    return index_alias.resolve_index_class(get_client(), alias)
+
+def index_version(index_class: str) -> str:
+    """실제 클래스의 색인 버전 스탬프 (재색인마다 바뀜 → 검색 캐시 무효화 기준)."""
+    alias = index_alias.alias_of(index_class)
+    if SEARCH_BACKEND == "local":
+        return local_index.get_store().version(alias)
+    return index_alias.resolve_index_version(get_client(), alias)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 검색 결과 캐시: (index_class, 정규화 원문 질의) → 번역 질의 + 질의 벡터 + 최종 문서 id/점수
+# 적중 시 번역·임베딩·검색을 건너뛰고 문서만 id로 조회
+# ──────────────────────────────────────────────────────────────────────────────
+retrieval_cache = get_cache("retrieval")
+
+def retrieval_cache_key(user_query: str, index_class: str) -> Tuple[str, str]:
+    return (index_class, normalize_query(user_query))
+
+def get_cached_retrieval(key: Tuple[str, str], version: str) -> Dict[str, Any]:
+    """반환: {query, query_vec, top_ids, top_score, vectors} 또는 None."""
+    if not QUERY_CACHE_ENABLED:
+        return None
+    return retrieval_cache.get(key, version)
+
+def put_cached_retrieval(key: Tuple[str, str], version: str, *, query: str, query_vec, docs: List[Dict[str, Any]],
+                         top_score: float, vectors: Dict[str, Any] = None) -> None:
+    if not QUERY_CACHE_ENABLED or not docs:
+        return
+    top_ids = [(d.get("_additional") or {}).get("id", "") for d in docs]
+    vectors = vectors or {}
+    retrieval_cache.put(key, {
+        "query": query,
+        "query_vec": np.asarray(query_vec, dtype=np.float32),
+        "top_ids": top_ids,
+        "top_score": top_score,
+        "vectors": {i: vectors[i] for i in top_ids if i in vectors},  # 뉴스 비교용 저장 벡터
+    }, version)
 # ──────────────────────────────────────────────────────────────────────────────
 # 0) 질문 번역 (국제대회 주제 선택 시)
 # ──────────────────────────────────────────────────────────────────────────────
+def needs_translation(index_class: str) -> bool:
+    """1차 검색 전에 영어로 번역하는 주제인지 (라우팅도 이 기준으로 번역문 벡터 사용)."""
+    return (index_class or "").lower() == "international"
+
 def normalize_query_for_stage1(user_query: str, *, index_class: str = INDEX_CLASS) -> str:
     """
     1차 검색 전에 쿼리를 정규화:
@@ -59,9 +232,8 @@ def normalize_query_for_stage1(user_query: str, *, index_class: str = INDEX_CLAS
     - 이미 영어면 번역을 건너뜀
     - 번역 호출 실패 시에도 원문으로 안전 폴백
     """
-    cls = (index_class or "").lower()  # 주제 문자열을 소문자로 정규화(예: 'International' → 'international')
-    if cls != "international":         # 국제 규정이 아닌 경우에는
-        return user_query              # 원문 그대로 1차 검색으로 넘김
+    if not needs_translation(index_class):  # 국제 규정이 아닌 경우에는
+        return user_query                   # 원문 그대로 1차 검색으로 넘김
 
     try:
         prompt = (
@@ -87,31 +259,111 @@ def normalize_query_for_stage1(user_query: str, *, index_class: str = INDEX_CLAS
     except Exception:
         return user_query
 # ──────────────────────────────────────────────────────────────────────────────
-# 1) 1차 검색 (HNSW Top-20 + distance)
+# 키워드(BM25) 후보 + 조문 번호 정확 일치 (keyword_index, 인덱스가 없으면 벡터 검색만)
+# ──────────────────────────────────────────────────────────────────────────────
+def keyword_candidates(
+    user_query: str,
+    *,
+    index_class: str = INDEX_CLASS,
+    topk: int = TOPK_KEYWORD
+) -> Tuple[Dict[str, float], List[str]]:
+    """반환: (BM25 점수{id: 0~1}, 조문 번호가 정확히 일치하는 id 목록)"""
+    kw = keyword_index.get_keyword_index(index_class)
+    if kw is None:
+        return {}, []
+    hits = kw.search(user_query, topk)
+    best = hits[0][1] if hits else 0.0
+    scores = {i: sc / best for i, sc in hits} if best > 0 else {}
+    return scores, kw.article_lookup(user_query, limit=ARTICLE_EXACT_MAX)
+
+def promote_ids(top_ids: List[str], first_ids: List[str], topk: int = TOPK_FINAL) -> List[str]:
+    """first_ids(조문 정확 일치)를 맨 앞에 두고 나머지는 기존 순서 유지."""
+    return list(dict.fromkeys(list(first_ids) + list(top_ids)))[:topk]
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1) 1차 검색 (HNSW Top-20 + distance + 저장 벡터)
 # ──────────────────────────────────────────────────────────────────────────────
 def stage1_retrieve(
     user_query: str,
     *,
     index_class: str = INDEX_CLASS,
     near_certainty: float = NEAR_CERTAINTY,
-    topk: int = TOPK_STAGE1
-) -> Tuple[np.ndarray, List[Tuple[str, float]], List[str]]:
+    topk: int = TOPK_STAGE1,
+    query_vec: np.ndarray = None
+) -> Tuple[np.ndarray, List[Tuple[str, float]], List[str], Dict[str, np.ndarray]]:
     """
-    쿼리 임베딩 생성 후 HNSW 1차 검색을 수행.
-    반환: (query_vec, ids_stage1[(id, distance)], id_list)
+    쿼리 임베딩 생성 후 HNSW 1차 검색을 수행 (query_vec을 넘기면 임베딩 생략).
+    인덱싱 때 저장한 후보 벡터도 함께 받아 리랭킹/뉴스 비교에서 재임베딩하지 않음.
+    반환: (query_vec, ids_stage1[(id, distance)], id_list, vectors{id: vec})
     """
-    query_vec = embed_model.encode(user_query, convert_to_numpy=True)
-
-    res = client.query.get(
-        index_class,
-        ["_additional { id distance }"]
-    ).with_near_vector({"vector": query_vec, "certainty": near_certainty}) \
-        .with_limit(topk).do()
-
-    items = res["data"]["Get"][index_class]
+    if query_vec is None:
+        query_vec = encode_query(user_query)
+    items = _stage1_near_vector(index_class, query_vec, certainty=near_certainty, limit=topk, user_query=user_query)
+    ids_stage1, id_list, vectors = _parse_hits(items)
+    return query_vec, ids_stage1, id_list, vectors
+
+def hierarchical_candidate_ids(index_class: str, query_vec) -> Optional[List[str]]:
+    """계층 인덱스로 고른 상위 절들의 청크 id. 인덱스가 없거나 작은 클래스면 None(평면 검색)."""
+    if not HIERARCHICAL_RETRIEVAL:
+        return None
+    ox = get_outline_index(index_class)
+    if ox is None or ox.chunks < OUTLINE_MIN_CHUNKS:
+        return None
+    return ox.candidate_ids(query_vec) or None
+
+def query_metadata_filters(index_class: str, user_query: str) -> Dict[str, List[str]]:
+    """질의에 적힌 규정명/장 제목 → {title: [...], chapter_title: [...]} (사전이 없거나 일치 없으면 {})."""
+    if not METADATA_PREFILTER or not user_query:
+        return {}
+    td = get_title_dict(index_class)
+    return td.parse(user_query) if td else {}
+
+def _stage1_near_vector(index_class: str, query_vec, *, certainty: float, limit: int, props=(), user_query: str = ""):
+    """
+    1차 near_vector (저장 벡터 포함).
+    ① 질의에 규정명/장 제목이 있으면 where 사전 필터(규정명+장 → 규정명만 순으로 완화)
+    ② 없으면 계층 후보로 좁혀 찾고 ③ 결과가 너무 적으면 전체에서 다시 검색
+    """
+    enough = min(limit, TOPK_FINAL)
+    filters = query_metadata_filters(index_class, user_query)
+    tries = [filters] + ([{"title": filters["title"]}] if "title" in filters and len(filters) > 1 else [])
+    for f in (t for t in tries if t):
+        items = _near_vector(index_class, query_vec, certainty=certainty, limit=limit, props=props,
+                             filters=f, with_vector=True)
+        if len(items) >= enough:
+            return items
+
+    ids = hierarchical_candidate_ids(index_class, query_vec)
+    items = _near_vector(index_class, query_vec, certainty=certainty, limit=limit, props=props,
+                         ids=ids, with_vector=True)
+    if ids is not None and len(items) < enough:
+        items = _near_vector(index_class, query_vec, certainty=certainty, limit=limit, props=props, with_vector=True)
+    return items
+
+def encode_query(user_query: str) -> np.ndarray:
+    """질의 임베딩. 디스크 임베딩 캐시 대신 프로세스 내 LRU 사용 → 요청 경로에서 sqlite 쓰기 없음."""
+    vec = query_vec_cache.get(user_query) if QUERY_CACHE_ENABLED else None
+    if vec is None:
+        vec = np.asarray(embed_model.encode(user_query, convert_to_numpy=True), dtype=np.float32)
+        vec.setflags(write=False)  # 캐시된 배열을 호출 측이 수정하지 않도록
+        if QUERY_CACHE_ENABLED:
+            query_vec_cache.put(user_query, vec)
+    return vec
+
+def ids_exist(index_class: str, ids: List[str]) -> bool:
+    """ids가 모두 현재 클래스에 남아 있는지 (청크 id는 내용 기반 uuid5 → 내용이 바뀌면 id도 바뀜)."""
+    ids = list(dict.fromkeys(i for i in ids if i))
+    return len(_get_by_ids(index_class, ids, [])) == len(ids)
+
+def _parse_hits(items: List[Dict[str, Any]]):
+    """near_vector 결과 → (ids_stage1[(id, distance)], id_list, vectors{id: vec})."""
     ids_stage1 = [(it["_additional"]["id"], it["_additional"].get("distance", None)) for it in items]
     id_list = [i for i, _ in ids_stage1]
-    return query_vec, ids_stage1, id_list
+    vectors = {
+        it["_additional"]["id"]: np.asarray(it["_additional"]["vector"], dtype=np.float32)
+        for it in items if it["_additional"].get("vector") is not None
+    }
+    return ids_stage1, id_list, vectors
     
 # ──────────────────────────────────────────────────────────────────────────────
 # 2) 리랭킹 (코사인 + ANN distance late-fusion) 및 폴백 판단
@@ -121,15 +373,8 @@ def fetch_candidates_by_ids(
     *,
     index_class: str = INDEX_CLASS
 ) -> List[Dict[str, Any]]:
-    """1차 후보 id들을 OR where로 본문 조회."""
-    if not id_list:
-        return []
-    
-    cands = client.query.get(
-        index_class,
-        ["content", "table_json", "_additional { id }"]
-    ).with_where(_build_where_ids(id_list)).with_limit(len(id_list)).do()["data"]["Get"][index_class]
-    return cands
+    """1차 후보 id들을 id where로 본문 조회."""
+    return _get_by_ids(index_class, id_list, ["content"])
 
 def rerank_with_late_fusion(
     query_vec: np.ndarray,
@@ -137,12 +382,18 @@ def rerank_with_late_fusion(
     candidates: List[Dict[str, Any]],
     *,
     alpha: float = LATE_FUSION_ALPHA,
-    topk: int = TOPK_FINAL
+    topk: int = TOPK_FINAL,
+    vectors: Dict[str, np.ndarray] = None,
+    keyword_scores: Dict[str, float] = None,
+    beta: float = KEYWORD_FUSION_BETA
 ) -> Tuple[List[str], float]:
     """
     코사인 유사도 + (정규화한) ANN distance의 late-fusion으로 재랭킹.
+    후보 벡터는 vectors(1차 검색 결과) → 문서에 실린 벡터 순으로 사용하고, 둘 다 없는 후보만 임베딩.
+    keyword_scores(BM25, 0~1)가 있으면 beta 비중으로 한 번 더 융합.
     반환: (top_ids, top_score)
     """
+    vectors = vectors or {}
 
     cand_texts, cand_ids = [], []
     for d in candidates:
@@ -155,15 +406,20 @@ def rerank_with_late_fusion(
     if not cand_texts:
         return [], 0.0
 
-    # 코사인 유사도
-    doc_vecs = embed_model.encode(cand_texts, convert_to_numpy=True)
-    q = torch.tensor(query_vec).unsqueeze(0)
-    d = torch.tensor(doc_vecs)
-    cos_scores = util.cos_sim(q, d)[0].cpu().numpy()  # [-1,1] → 나중에 [0,1]로 정규화
+    # 코사인 유사도 (저장 벡터 재사용)
+    by_id = _by_id(candidates)
+    doc_vecs = [vectors[cid] if cid in vectors else _doc_vector(by_id[cid]) for cid in cand_ids]
+    missing = [k for k, v in enumerate(doc_vecs) if v is None]
+    if missing:
+        enc = embed_cache.encode(embed_model, [cand_texts[k] for k in missing], readonly=True)
+        for k, v in zip(missing, enc):
+            doc_vecs[k] = v
+    cos_scores = _cos_matrix(np.asarray(query_vec)[None, :], np.stack(doc_vecs))[0]  # [-1,1] → 나중에 [0,1]로 정규화
 
     # HNSW distance → 유사도로 변환
+    # (1차 검색 밖에서 들어온 키워드 후보는 코사인 distance로 대체)
     dist_map = {i: (dist if dist is not None else 1.0) for i, dist in ids_stage1}
-    dists = np.array([dist_map.get(cid, 1.0) for cid in cand_ids])
+    dists = np.array([dist_map.get(cid, 1.0 - float(c)) for cid, c in zip(cand_ids, cos_scores)])
     if (dists.max() - dists.min()) < 1e-9:
         ann_sims = np.ones_like(dists)  # 모두 동일 값이면 동점 처리
     else:
@@ -174,6 +430,9 @@ def rerank_with_late_fusion(
 
     # late fusion
     fused = alpha * cos_norm + (1 - alpha) * ann_sims
+    if keyword_scores:
+        kw = np.array([keyword_scores.get(cid, 0.0) for cid in cand_ids])
+        fused = (1 - beta) * fused + beta * kw
     order = np.argsort(-fused)
     topk = min(topk, len(order))
     top_ids = [cand_ids[i] for i in order[:topk]]
@@ -189,13 +448,10 @@ def refine_near_vector_fallback(
     topk: int = TOPK_FINAL
 ) -> List[Dict[str, Any]]:
     """저신뢰 시, 동일 id 후보 범위에서 near_vector로 2차 리파인."""
-    final = client.query.get(
-        index_class,
-        ["title","chapter_title","section_heading","content","table_json","_additional { id distance }"]
-    ).with_where(_build_where_ids(id_list)) \
-    .with_near_vector({"vector": query_vec, "certainty": near_certainty}) \
-    .with_limit(topk).do()
-    return final["data"]["Get"][index_class]
+    final = _near_vector(
+        index_class, query_vec, certainty=near_certainty, limit=topk, props=DISPLAY_PROPS, ids=id_list
+    )
+    return attach_tables(final, index_class=index_class)
 
 def fetch_final_docs_in_order(
     top_ids: List[str],
@@ -206,20 +462,216 @@ def fetch_final_docs_in_order(
     if not top_ids:
         return []
 
-    final_res = client.query.get(
-        index_class,
-        ["title","chapter_title","section_heading","content","table_json","_additional { id distance }"]
-    ).with_where(_build_where_ids(top_ids)).with_limit(len(top_ids)).do()
-    temp_docs = final_res["data"]["Get"][index_class]
+    temp_docs = _get_by_ids(index_class, top_ids, DISPLAY_PROPS)
     bid = _by_id(temp_docs)
+    return attach_tables([bid[i] for i in top_ids if i in bid], index_class=index_class)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1~2) 단일 왕복 검색 (RETRIEVAL_MODE="single")
+# ──────────────────────────────────────────────────────────────────────────────
+def _single_pass_candidates(
+    user_query: str,
+    query_vec: np.ndarray,
+    *,
+    index_class: str,
+    near_certainty: float,
+    topk_stage1: int
+) -> Dict[str, Any]:
+    """near_vector 1회 + 키워드 후보 → 리랭킹 전 후보 묶음(items, ids_stage1, id_list, vectors, kw_scores, article_ids)."""
+    items = _stage1_near_vector(
+        index_class, query_vec, certainty=near_certainty, limit=topk_stage1, props=DISPLAY_PROPS,
+        user_query=user_query
+    )
+    ids_stage1, id_list, vectors = _parse_hits(items)
+
+    # 키워드 후보 중 벡터 후보에 없는 것만 추가 조회(저장 벡터로 distance를 직접 계산해 같은 기준으로 리랭킹)
+    kw_scores, article_ids = keyword_candidates(user_query, index_class=index_class)
+    extra = [i for i in dict.fromkeys(article_ids + list(kw_scores)) if i not in vectors]
+    if extra:
+        more = [d for d in _get_by_ids(index_class, extra, DISPLAY_PROPS, with_vector=True)
+                if (d.get("_additional") or {}).get("vector") is not None]
+        if more:
+            more_vecs = np.stack([np.asarray(d["_additional"]["vector"], dtype=np.float32) for d in more])
+            sims = _cos_matrix(np.asarray(query_vec)[None, :], more_vecs)[0]
+            for d, v, sim in zip(more, more_vecs, sims):
+                d["_additional"]["distance"] = float(1.0 - sim)
+                ids_stage1.append((d["_additional"]["id"], float(1.0 - sim)))
+                vectors[d["_additional"]["id"]] = v
+            items = items + more
+    return {
+        "items": items, "ids_stage1": ids_stage1, "id_list": id_list, "vectors": vectors,
+        "kw_scores": kw_scores, "article_ids": article_ids,
+    }
+
+def _rank_candidates(
+    query_vec: np.ndarray,
+    c: Dict[str, Any],
+    *,
+    topk_final: int,
+    alpha: float,
+    low_conf: float
+) -> Dict[str, Any]:
+    """후보 묶음 → late-fusion(+BM25) 순위, 조문 일치 고정, 저신뢰 시 distance 순 폴백."""
+    items, ids_stage1 = c["items"], c["ids_stage1"]
+    ranked, top_score = rerank_with_late_fusion(
+        query_vec, ids_stage1, items, alpha=alpha, topk=len(items),
+        vectors=c["vectors"], keyword_scores=c["kw_scores"]
+    )
+    top_ids = ranked[:topk_final]
+    bid = _by_id(items)
+    pos = {i: k for k, i in enumerate(ranked)}
+    exact = sorted((i for i in dict.fromkeys(c["article_ids"]) if i in bid),
+                   key=lambda i: pos.get(i, len(pos)))[:ARTICLE_EXACT_MAX]
+    fallback = not exact and ((not top_ids) or (top_score < low_conf))
+    if exact:
+        top_ids = promote_ids(top_ids, exact, topk_final)  # 조문 번호 질의는 조회표로 확정 → 폴백 없음
+    elif fallback:
+        by_dist = sorted(ids_stage1, key=lambda x: 1.0 if x[1] is None else x[1])
+        top_ids = [i for i, _ in by_dist[:topk_final]]
+    return {
+        "query_vec": query_vec,
+        "ids_stage1": ids_stage1,
+        "id_list": c["id_list"],
+        "vectors": c["vectors"],
+        "top_ids": top_ids,
+        "top_score": top_score,
+        "fallback": fallback,
+        "article_ids": exact,
+        "docs": [bid[i] for i in top_ids if i in bid],
+    }
+
+def retrieve_single_pass(
+    user_query: str,
+    *,
+    index_class: str = INDEX_CLASS,
+    near_certainty: float = NEAR_CERTAINTY,
+    topk_stage1: int = TOPK_STAGE1,
+    topk_final: int = TOPK_FINAL,
+    alpha: float = LATE_FUSION_ALPHA,
+    low_conf: float = LOW_CONF_FALLBACK,
+    query_vec: np.ndarray = None
+) -> Dict[str, Any]:
+    """
+    near_vector 1회로 id/distance/벡터/표시용 속성을 함께 받아 리랭킹·폴백을 로컬에서 처리.
+    - 폴백(refine_near_vector_fallback)은 같은 후보 범위에서 쿼리 벡터로 다시 near_vector 하는 것이므로
+      1차 결과를 distance 순으로 자른 것과 같음 → 추가 조회 없음
+    - table_json은 받지 않음(content에 표 평탄화 텍스트 포함). 원본 표가 필요하면 attach_tables로 지연 조회
+    - 키워드 인덱스가 있으면 BM25 점수를 융합하고, 조문 번호가 정확히 일치한 청크는 맨 앞에 고정
+    반환: query_vec, ids_stage1, id_list, vectors, top_ids, top_score, fallback, article_ids, docs
+    """
+    if query_vec is None:
+        query_vec = encode_query(user_query)
+    cands = _single_pass_candidates(
+        user_query, query_vec, index_class=index_class, near_certainty=near_certainty, topk_stage1=topk_stage1
+    )
+    return _rank_candidates(query_vec, cands, topk_final=topk_final, alpha=alpha, low_conf=low_conf)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 1~2') 통합 검색: 여러 클래스를 동시에 조회해 하나의 순위로 병합 (sub_topic="all")
+# - 질의 임베딩은 1번, 클래스별 near_vector(+키워드)는 스레드 풀에서 병렬 → 지연 ≈ 가장 느린 클래스
+# - 같은 임베딩 모델의 cosine distance라 클래스 간 비교 가능. 후보 전체를 모아 한 번에 late-fusion
+#   (ANN distance min-max 정규화도 전체 후보 기준)
+# - 각 문서에 index_class를 실어 표/재조회 시 원래 클래스를 찾음
+# ──────────────────────────────────────────────────────────────────────────────
+def retrieve_federated(
+    user_query: str,
+    *,
+    index_classes: List[str],
+    near_certainty: float = NEAR_CERTAINTY,
+    topk_stage1: int = TOPK_STAGE1,
+    topk_final: int = TOPK_FINAL,
+    alpha: float = LATE_FUSION_ALPHA,
+    low_conf: float = LOW_CONF_FALLBACK,
+    query_vec: np.ndarray = None
+) -> Dict[str, Any]:
+    """반환: retrieve_single_pass와 같은 키 + class_ms{클래스: 조회 ms}"""
+    if query_vec is None:
+        query_vec = encode_query(user_query)
+
+    def _one(cls):
+        t0 = time.perf_counter()
+        c = _single_pass_candidates(
+            user_query, query_vec, index_class=cls, near_certainty=near_certainty, topk_stage1=topk_stage1
+        )
+        for d in c["items"]:
+            d["index_class"] = cls
+        return cls, c, (time.perf_counter() - t0) * 1000.0
+
+    merged = {"items": [], "ids_stage1": [], "id_list": [], "vectors": {}, "kw_scores": {}, "article_ids": []}
+    class_ms = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(FEDERATED_MAX_WORKERS, len(index_classes)))) as ex:
+        for cls, c, ms in ex.map(_one, index_classes):  # 실패한 클래스가 있으면 예외 전파(부분 결과로 답하지 않음)
+            class_ms[cls] = round(ms, 1)
+            for k in ("items", "ids_stage1", "id_list", "article_ids"):
+                merged[k].extend(c[k])
+            merged["vectors"].update(c["vectors"])
+            merged["kw_scores"].update(c["kw_scores"])
+
+    out = _rank_candidates(query_vec, merged, topk_final=topk_final, alpha=alpha, low_conf=low_conf)
+    out["class_ms"] = class_ms
+    return out
+
+def fetch_final_docs_federated(top_ids: List[str], *, index_classes: List[str]) -> List[Dict[str, Any]]:
+    """여러 클래스에서 top_ids를 조회해 순서 복원 (각 문서에 index_class 표시, 표는 클래스별로 첨부)."""
+    if not top_ids:
+        return []
+    bid = {}
+    for cls in index_classes:
+        docs = _get_by_ids(cls, top_ids, DISPLAY_PROPS)
+        for d in attach_tables(docs, index_class=cls):
+            d["index_class"] = cls
+            bid[(d.get("_additional") or {}).get("id", "")] = d
     return [bid[i] for i in top_ids if i in bid]
-       
+
+def ids_exist_federated(index_classes: List[str], ids: List[str]) -> bool:
+    ids = list(dict.fromkeys(i for i in ids if i))
+    return sum(len(_get_by_ids(cls, ids, [])) for cls in index_classes) == len(ids)
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 2-1) 뉴스-문서 유사도 비교
 # ──────────────────────────────────────────────────────────────────────────────
-def get_filtered_news_for_docs(user_query: str, docs: list, *, max_keep: int = 5):
-    # 1) 뉴스 5개 수집
+NEWS_PREFETCH_WORKERS = 8     # 동시에 진행할 수 있는 뉴스 조회 수 (요청당 1건)
+NEWS_JOIN_TIMEOUT_SEC = 30.0  # 검색·요약이 끝난 뒤 뉴스를 더 기다리는 상한 → 넘으면 뉴스 없이 답변
+
+_news_pool = ThreadPoolExecutor(max_workers=NEWS_PREFETCH_WORKERS, thread_name_prefix="news")
+
+def _news_text(n: Dict[str, Any]) -> str:
+    return ((n.get("title") or "").strip() + "\n" + (n.get("contents") or "").strip()).strip()
+
+def fetch_news_with_vectors(user_query: str, *, max_keep: int = 5) -> Tuple[list, Optional[np.ndarray]]:
+    """뉴스 수집 + 제목·본문 임베딩 (비어 있지 않은 기사만, 기사 순서대로). 이미 본 기사는 저장된 벡터 사용."""
     news_articles = (search_realtime_news(user_query) or [])[:max_keep]
+    with_text = [n for n in news_articles if _news_text(n)]
+    if not with_text:
+        return news_articles, None
+    encode = lambda texts: embed_model.encode(texts, convert_to_numpy=True)
+    try:
+        news_vecs = get_news_store().vectors(with_text, model=embed_model.cache_name, encode=encode)
+    except Exception as e:
+        print(f"⚠️ news store read failed ({e}) → encode", flush=True)
+        news_vecs = encode([_news_text(n) for n in with_text])
+    return news_articles, news_vecs
+
+def prefetch_news(user_query: str, *, max_keep: int = 5):
+    """질의만으로 가능한 뉴스 조회/임베딩을 백그라운드로 시작 → Future[(기사, 벡터)]."""
+    return _news_pool.submit(fetch_news_with_vectors, user_query, max_keep=max_keep)
+
+def join_news(future, *, timeout: float = NEWS_JOIN_TIMEOUT_SEC) -> Tuple[list, Optional[np.ndarray]]:
+    """prefetch_news 결과 대기. 시간 초과/실패면 뉴스 없음."""
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        print(f"⚠️ news prefetch timed out after {timeout:.0f}s → answer without news", flush=True)
+    except Exception as e:
+        print(f"⚠️ news prefetch failed: {e}", flush=True)
+    return [], None
+
+def get_filtered_news_for_docs(user_query: str, docs: list, *, max_keep: int = 5, prefetched=None):
+    """prefetched=(기사, 벡터)가 있으면 뉴스 조회/임베딩 없이 문서-뉴스 매칭만 수행."""
+    # 1) 뉴스 5개 수집
+    news_articles, news_vecs = prefetched if prefetched is not None \
+        else fetch_news_with_vectors(user_query, max_keep=max_keep)
+    news_articles = news_articles[:max_keep]
 
     # 2) 비교 텍스트 준비 (빈 텍스트는 제외)
     # 문서 텍스트
@@ -233,9 +685,7 @@ def get_filtered_news_for_docs(user_query: str, docs: list, *, max_keep: int = 5
     # 뉴스 텍스트(제목+본문)
     news_texts, news_keep_idx = [], []
     for j, n in enumerate(news_articles):
-        title = (n.get("title") or "").strip()
-        body  = (n.get("contents") or "").strip()
-        combo = (title + "\n" + body).strip()
+        combo = _news_text(n)
         if combo:
             news_texts.append(combo)
             news_keep_idx.append(j)
@@ -258,26 +708,27 @@ def get_filtered_news_for_docs(user_query: str, docs: list, *, max_keep: int = 5
         return fallback, np.zeros((len(doc_texts), len(news_texts)), dtype=np.float32), news_block
 
     # 3) 임베딩 & 유사도 계산 [D x N]
-    # 문서 임베딩: 'vector' 있으면 사용, 없으면 해당 문서만 임베딩
+    # 문서 임베딩: 저장 벡터('vector' / _additional.vector) 있으면 사용, 없으면 해당 문서만 임베딩
     doc_vecs_list = []
     to_encode_texts, to_encode_pos = [], []
     for k, gi in enumerate(doc_keep_idx):
-        v = docs[gi].get("vector", None)
+        v = _doc_vector(docs[gi])
         if v is None:
             to_encode_pos.append(k)
             to_encode_texts.append(doc_texts[k])
             doc_vecs_list.append(None)
         else:
-            doc_vecs_list.append(torch.as_tensor(v, dtype=torch.float32, device=device))
+            doc_vecs_list.append(np.asarray(v, dtype=np.float32))
 
     if to_encode_texts:
-        enc = embed_model.encode(to_encode_texts, convert_to_tensor=True, device=device)
+        enc = embed_cache.encode(embed_model, to_encode_texts, readonly=True)
         for t_idx, k in enumerate(to_encode_pos):
             doc_vecs_list[k] = enc[t_idx]
 
-    doc_vecs = torch.stack(doc_vecs_list, dim=0)  # [D, dim]
-    news_vecs = embed_model.encode(news_texts, convert_to_tensor=True, device=device)
-    sim = util.cos_sim(doc_vecs, news_vecs).detach().cpu().numpy()  # (D, N)
+    doc_vecs = np.stack(doc_vecs_list, axis=0)  # [D, dim]
+    if news_vecs is None or len(news_vecs) != len(news_texts):
+        news_vecs = embed_model.encode(news_texts, convert_to_numpy=True)
+    sim = _cos_matrix(doc_vecs, news_vecs)  # (D, N)
 
     # 4) 문서별 argmax 뉴스 선택 → 점수 높은 매칭부터 중복 제거 (보충 없음)
     picks = []  # (doc_global_idx, news_global_idx, score)
@@ -314,58 +765,86 @@ def get_filtered_news_for_docs(user_query: str, docs: list, *, max_keep: int = 5
     return filtered_news, sim, news_block
 
 # ──────────────────────────────────────────────────────────────────────────────
-# 3) 검색 문서 요약 (Gemini)
+# 3) 검색 문서 요약 — 색인 시 저장한 summary 속성 우선(doc_summary.py), 없는 청크만 Gemini
 # ──────────────────────────────────────────────────────────────────────────────
+SUMMARY_CONCURRENCY = 4      # 동시 요약 호출 수 (1이면 기존처럼 순차)
+SUMMARY_TIMEOUT_SEC = 20.0   # 요약 호출 1건의 상한(호출이 시작된 시점부터) → 넘으면 추출 요약으로 대체
+
+def _summarize_one(doc: Dict[str, Any], model_name: str, max_output_tokens: int, temperature: float) -> str:
+    return generate_summary(genai_client, doc, model_name=model_name,
+                            max_output_tokens=max_output_tokens, temperature=temperature)
+
 def summarize_documents(
     docs: List[Dict[str, Any]],
     *,
-    model_name: str = "gemini-1.5-flash",
-    max_output_tokens: int = 200,
-    temperature: float = 0.4
+    model_name: str = SUMMARY_MODEL,
+    max_output_tokens: int = SUMMARY_MAX_OUTPUT_TOKENS,
+    temperature: float = SUMMARY_TEMPERATURE,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    timeout: float = SUMMARY_TIMEOUT_SEC,
+    query_vec=None
 ) -> Tuple[List[str], str]:
-    """각 문서를 간결 요약. (빈 텍스트는 스킵하지 않고 빈 요약으로라도 push 가능)"""
-    summaries: List[str] = []
-    for doc in docs:
-        doc_body = _extract_doc_text(doc)
-        summary_prompt = f"""
-다음은 축구 규정/지침 문서의 한 섹션입니다. 최종 답변에서 그대로 재사용할 수 있도록,
-**직접 명시된 조항 번호**를 찾아 간결 요약하세요.
-
-[문서 메타]
-- 문서명: {doc.get('title','').strip()}
-- 장/챕터: {doc.get('chapter_title','').strip()}
-- 섹션: {doc.get('section_heading','').strip()}
-
-[문서 본문]
-{doc_body}
-
-[작성 지침]
-1) 반드시 아래 "요약 형식"을 따르세요. 다른 형식/문구를 섞지 마세요.
-2) 요약은 **문서에 직접 나온 내용만** 사용하고, 없는 조항/수치/해석은 쓰지 마세요.
-3) **문서명**과 **조항 번호**는 반드시 포함하여 요약하세요.
-4) **조항 번호**는 원문 표기(예: "제14조", "제14조 제2항", "제14조의2", "부칙 제1조")를 그대로 사용하세요.
-5) 조항 번호가 여러 개면 **여러 줄**로 나누어 각각 요약하세요.
-6) 조항 번호가 본문에 **아예 없으면** `- (조항번호 없음): ...`으로 1줄 요약만 작성하세요.
-7) 각 줄은 **한 문장**으로 요약하고, 필요하면 괄호 안에 10~20자 이내의 짧은 원문 인용을 덧붙여 검증성을 높이세요(선택).
-
-[요약 형식]
-- [문서명][제oo조] 핵심 요지 한 문장. (선택: "짧은 원문 인용")
-- [상벌 규정][제oo조 제x항] 핵심 요지 한 문장.
-- (조항번호 없음): 문서 전체 요지 한 문장.
-
-""".strip()
-
-        out = genai_client.models.generate_content(
-            model=model_name,
-            contents=summary_prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=max_output_tokens,
-                temperature=temperature,
-            )
-        )
-        summaries.append(f"\n{(out.text or '').strip()}")
+    """
+    각 문서를 간결 요약. (빈 텍스트는 스킵하지 않고 빈 요약으로라도 push 가능)
+    - 색인 시 저장된 summary가 있으면 그대로 사용, 없는 문서만 LLM 호출
+    - concurrency개씩 동시에 호출, 결과는 docs 순서 그대로
+    - 호출마다 시작 시점부터 timeout초 (대기열에서 기다린 시간은 제외)
+    - 실패/시간 초과한 문서는 추출 요약(summarize_documents_fast와 같은 형식)으로 대체
+      시간 초과 호출은 취소할 수 없어 백그라운드에서 끝나고 결과는 버림
+      모든 워커가 시간 초과 호출에 묶이면 아직 시작 못 한 호출은 취소하고 추출 요약
+    """
+    texts = [(d.get("summary") or "").strip() for d in docs]
+    missing = [k for k, t in enumerate(texts) if not t]
+    failed: List[int] = []
+    if missing:
+        workers = max(1, min(concurrency, len(missing)))
+        started: Dict[int, float] = {}
+
+        def call(k):
+            started[k] = time.monotonic()
+            return _summarize_one(docs[k], model_name, max_output_tokens, temperature)
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+        pending = {k: pool.submit(call, k) for k in missing}
+        stuck = []  # 시간 초과했지만 아직 워커를 점유 중인 호출
+        while pending:
+            for k in [k for k, f in pending.items() if f.done()]:
+                fut = pending.pop(k)
+                try:
+                    texts[k] = fut.result()
+                except Exception as e:
+                    print(f"⚠️ summary failed for doc {k}: {e}", flush=True)
+                    failed.append(k)
+            now = time.monotonic()
+            for k in [k for k in pending if k in started and now - started[k] >= timeout]:
+                print(f"⚠️ summary timed out for doc {k}", flush=True)
+                stuck.append(pending.pop(k))
+                failed.append(k)
+            stuck = [f for f in stuck if not f.done()]
+            if pending and len(stuck) >= workers:
+                for k in [k for k, f in pending.items() if f.cancel()]:
+                    print(f"⚠️ summary skipped for doc {k} (all workers timed out)", flush=True)
+                    pending.pop(k)
+                    failed.append(k)
+            if not pending:
+                break
+            deadlines = [started[k] + timeout for k in pending if k in started]
+            # 점유 중인 호출이 끝나면 대기 중인 호출이 시작되므로 함께 기다림 (새 시작 시점 반영)
+            wait(list(pending.values()) + stuck, timeout=max(0.0, min(deadlines) - now) if deadlines else timeout,
+                 return_when=FIRST_COMPLETED)
+        pool.shutdown(wait=False, cancel_futures=True)
+    if failed:
+        failed.sort()
+        fallback, _ = summarize_documents_fast([docs[k] for k in failed], query_vec)
+        for k, t in zip(failed, fallback):
+            texts[k] = t.strip()
+    summaries = [f"\n{t}" for t in texts]
     return summaries, "\n\n".join(summaries)
 
+def summarize_documents_fast(docs: List[Dict[str, Any]], query_vec=None) -> Tuple[List[str], str]:
+    """빠른 모드: LLM 없이 조항 라벨 + 질의 유사 문장 추출 (문장 임베딩은 디스크 캐시 공유)."""
+    return extractive_summarize(docs, query_vec, encode=lambda texts: embed_cache.encode(embed_model, texts, readonly=True))
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 4) 최종 답변 생성 (Gemini)
 # ──────────────────────────────────────────────────────────────────────────────
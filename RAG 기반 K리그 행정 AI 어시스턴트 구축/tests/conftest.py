@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import types
+import zlib
+import tempfile
+import importlib
+
+import numpy as np
+import pytest
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 테스트 공용 설정
+# - 저장소 모듈은 index_artifacts/ 등 상대 경로를 쓰므로 임시 디렉터리에서 실행
+# - 설치되지 않은 외부 패키지(weaviate, torch, sentence_transformers, google.genai, openai, langgraph, tqdm)는
+#   네트워크/모델 없이 동작하는 테스트 대역으로 대체 (설치돼 있으면 실제 패키지 사용)
+# ──────────────────────────────────────────────────────────────────────────────
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(tempfile.mkdtemp(prefix="kleague-tests-"))
+
+FAKE_DIM = 64
+
+def fake_embed(texts):
+    """문자 bigram 해시 벡터(정규화) — 같은 텍스트는 같은 벡터, 겹치는 글자가 많을수록 가까움."""
+    single = isinstance(texts, str)
+    out = np.zeros((1 if single else len(texts), FAKE_DIM), dtype=np.float32)
+    for r, t in enumerate([texts] if single else texts):
+        t = t or " "
+        for i in range(max(1, len(t) - 1)):
+            out[r, zlib.crc32(t[i:i + 2].encode("utf-8")) % FAKE_DIM] += 1.0
+    out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+    return out[0] if single else out
+
+def _missing(name: str) -> bool:
+    try:
+        importlib.import_module(name)
+        return False
+    except Exception:
+        return True
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    sys.modules[name] = mod
+    return mod
+
+class _Unavailable:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, item):
+        raise RuntimeError("external service is not available in tests")
+
+if _missing("weaviate"):
+    import uuid
+    wv = _module("weaviate", Client=_Unavailable)
+    wv.util = _module("weaviate.util", generate_uuid5=lambda x, *a: str(uuid.uuid5(uuid.NAMESPACE_DNS, str(x))))
+    wv.exceptions = _module("weaviate.exceptions", UnexpectedStatusCodeException=Exception,
+                            ObjectAlreadyExistsException=Exception)
+
+if _missing("tqdm"):
+    _module("tqdm", tqdm=lambda it=None, **kw: it)
+
+if _missing("openai"):
+    _module("openai", OpenAI=_Unavailable)
+
+if _missing("google.genai"):
+    google = sys.modules.get("google") or _module("google")
+    google.genai = _module("google.genai", Client=_Unavailable)
+    google.genai.types = _module("google.genai.types", GenerateContentConfig=lambda **kw: kw)
+
+if _missing("torch"):
+    _module("torch", device=lambda d: d, cuda=types.SimpleNamespace(is_available=lambda: False))
+
+if _missing("sentence_transformers"):
+    class _FakeSentenceTransformer:
+        max_seq_length = 128
+        tokenizer = None
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def to(self, device):
+            return self
+
+        def get_sentence_embedding_dimension(self):
+            return FAKE_DIM
+
+        def encode(self, sentences, **kwargs):
+            return fake_embed(sentences)
+
+    _module("sentence_transformers", SentenceTransformer=_FakeSentenceTransformer)
+
+if _missing("langgraph"):
+    END = "__end__"
+
+    class _Compiled:
+        def __init__(self, g):
+            self.g = g
+
+        def invoke(self, state):
+            s, node = dict(state), self.g.entry
+            while node != END:
+                s = self.g.nodes[node](s) or s
+                if node in self.g.cond:
+                    fn, mapping = self.g.cond[node]
+                    node = mapping[fn(s)]
+                else:
+                    node = self.g.edges[node]
+            return s
+
+    class _StateGraph:
+        """langgraph.graph.StateGraph의 순차 실행 대역 (add_node/add_edge/add_conditional_edges)."""
+        def __init__(self, _schema):
+            self.nodes, self.edges, self.cond, self.entry = {}, {}, {}, None
+
+        def add_node(self, name, fn):
+            self.nodes[name] = fn
+
+        def add_edge(self, a, b):
+            self.edges[a] = b
+
+        def add_conditional_edges(self, a, fn, mapping):
+            self.cond[a] = (fn, mapping)
+
+        def set_entry_point(self, name):
+            self.entry = name
+
+        def compile(self):
+            return _Compiled(self)
+
+    _module("langgraph")
+    _module("langgraph.graph", StateGraph=_StateGraph, END=END)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 작은 로컬 스냅샷 (local_index.export_snapshot과 같은 파일 구성)
+# ──────────────────────────────────────────────────────────────────────────────
+def write_snapshot(alias: str, class_name: str, chunks, *, root: str = None):
+    """chunks: [{"id", "title", "chapter_title", "section_heading", "content"}] → 스냅샷 디렉터리."""
+    from local_index import LOCAL_INDEX_DIR
+    path = os.path.join(root or LOCAL_INDEX_DIR, alias)
+    os.makedirs(path, exist_ok=True)
+    vecs = fake_embed([f"{c['title']} {c['section_heading']} {c['content']}" for c in chunks])
+    np.save(os.path.join(path, "vectors.npy"), vecs.astype(np.float16))
+    with open(os.path.join(path, "meta.jsonl"), "w", encoding="utf-8") as f:
+        for c in chunks:
+            f.write(json.dumps(c, ensure_ascii=False) + "\n")
+    with open(os.path.join(path, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    with open(os.path.join(path, "info.json"), "w", encoding="utf-8") as f:
+        json.dump({"alias": alias, "class": class_name, "count": len(chunks), "dim": FAKE_DIM,
+                   "dtype": "float16", "exported_at": f"t{len(chunks)}"}, f)
+    return path
+
+TEST_CLASS = "K_test_v20250101000000"
+
+SAMPLE_CHUNKS = [
+    {"id": f"00000000-0000-0000-0000-{i:012d}", "title": t, "chapter_title": ch,
+     "section_heading": sh, "content": body, "table_id": ""}
+    for i, (t, ch, sh, body) in enumerate([
+        ("선수 등록 규정", "제1장 총칙", "제1조(목적)", "이 규정은 선수 등록 절차를 정함을 목적으로 한다."),
+        ("선수 등록 규정", "제2장 등록", "제5조(등록 기간)", "선수 등록은 매 시즌 정해진 등록 기간 안에 하여야 한다."),
+        ("선수 등록 규정", "제2장 등록", "제6조(외국인 선수)", "외국인 선수는 구단당 다섯 명까지 등록할 수 있다."),
+        ("상벌 규정", "제1장 총칙", "제1조(목적)", "이 규정은 징계와 포상의 기준을 정함을 목적으로 한다."),
+        ("상벌 규정", "제3장 징계", "제14조(퇴장)", "경기 중 퇴장당한 선수는 다음 경기에 출전할 수 없다."),
+        ("상벌 규정", "제3장 징계", "제15조(제재금)", "폭력 행위를 한 선수에게 제재금을 부과한다."),
+        ("경기 규정", "제4장 경기", "제20조(경기 시간)", "경기 시간은 전후반 각 45분으로 한다."),
+        ("경기 규정", "제4장 경기", "제21조(교체)", "선수 교체는 한 경기에 다섯 명까지 할 수 있다."),
+    ])
+]
+
+@pytest.fixture
+def local_backend(monkeypatch, tmp_path):
+    """SEARCH_BACKEND='local' + 작은 스냅샷 (alias K_test → 버전 클래스 TEST_CLASS)."""
+    import local_index
+    import search_answer
+    monkeypatch.chdir(tmp_path)
+    write_snapshot("K_test", TEST_CLASS, SAMPLE_CHUNKS)
+    monkeypatch.setattr(local_index, "_store", None)
+    monkeypatch.setattr(search_answer, "SEARCH_BACKEND", "local")
+    search_answer.retrieval_cache.clear()
+    return TEST_CLASS
+
+@pytest.fixture
+def qa_graph(local_backend, monkeypatch):
+    """K_test 스냅샷으로 QA 그래프 실행 (LLM/뉴스 호출은 대역, 최종 답변 = 프롬프트 그대로)."""
+    import graph_pipeline
+    from answer_cache import answer_cache
+    monkeypatch.setitem(graph_pipeline.TOPIC_CONFIG, "test", {"index_class": "K_test", "system_hint": ""})
+    monkeypatch.setattr(graph_pipeline, "summarize_documents",
+                        lambda docs, **kw: ([f"\n{d['content']}" for d in docs], "\n".join(d["content"] for d in docs)))
+    monkeypatch.setattr(graph_pipeline, "prefetch_news", lambda *a, **kw: None)
+    monkeypatch.setattr(graph_pipeline, "get_filtered_news_for_docs", lambda *a, **kw: ([], 0.0, ""))
+    monkeypatch.setattr(graph_pipeline, "generate_final_answer_text_qa", lambda prompt: prompt)
+    answer_cache.clear()
+    yield lambda q, history="": graph_pipeline.graph_generate_answer(q, "qa", "test", history_summary=history)
+    answer_cache.clear()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 적재(make_DB) 테스트용: 메모리 Weaviate 대역 + data 폴더 작성
+# ──────────────────────────────────────────────────────────────────────────────
+class FakeWeaviate:
+    """make_DB/index_alias가 쓰는 v3 클라이언트 일부 (schema, data_object, batch.delete_objects, query.get)."""
+    def __init__(self):
+        self.classes = {}   # class → {"schema": dict, "objects": {uuid: (props, vector)}}
+        self.fail_when = None  # 이 문자열을 content에 포함한 객체는 create 실패
+        self.schema = types.SimpleNamespace(
+            get=self._schema_get, create_class=self._create_class, delete_class=self._delete_class,
+            property=types.SimpleNamespace(create=lambda cls, prop: self.classes[cls]["schema"]
+                                           .setdefault("properties", []).append(prop)),
+        )
+        self.data_object = types.SimpleNamespace(
+            get_by_id=self._get_by_id, exists=lambda uuid, class_name: uuid in self._objects(class_name),
+            create=self._create, replace=self._replace, delete=lambda uuid, class_name: self._objects(class_name)
+            .pop(uuid, None), update=self._update,
+        )
+        self.batch = types.SimpleNamespace(delete_objects=self._delete_objects)
+        self.query = types.SimpleNamespace(get=self._query_get)
+
+    def _schema_get(self, class_name=None):
+        if class_name is not None:
+            return self.classes[class_name]["schema"]
+        return {"classes": [c["schema"] for c in self.classes.values()]}
+
+    def _create_class(self, schema):
+        if schema["class"] in self.classes:
+            raise Exception(f"class '{schema['class']}' already exists")
+        self.classes[schema["class"]] = {"schema": dict(schema), "objects": {}}
+
+    def _delete_class(self, class_name):
+        self.classes.pop(class_name, None)
+
+    def _objects(self, class_name):
+        return self.classes[class_name]["objects"] if class_name in self.classes else {}
+
+    def _get_by_id(self, uuid, class_name):
+        hit = self._objects(class_name).get(uuid)
+        return {"id": uuid, "properties": dict(hit[0])} if hit else None
+
+    def _create(self, data_object, class_name, uuid, vector=None):
+        if self.fail_when and self.fail_when in (data_object.get("content") or ""):
+            raise RuntimeError("write timeout")
+        objects = self._objects(class_name)
+        if uuid in objects:
+            from weaviate.exceptions import ObjectAlreadyExistsException
+            raise ObjectAlreadyExistsException(uuid)
+        objects[uuid] = (dict(data_object), vector)
+
+    def _replace(self, data_object, class_name, uuid, vector=None):
+        if self.fail_when and self.fail_when in (data_object.get("content") or ""):
+            raise RuntimeError("write timeout")
+        self._objects(class_name)[uuid] = (dict(data_object), vector)
+
+    def _update(self, props, class_name, uuid):
+        self._objects(class_name)[uuid][0].update(props)
+
+    def _delete_objects(self, class_name, where):
+        for uuid in where["valueTextArray"]:
+            self._objects(class_name).pop(uuid, None)
+
+    def _query_get(self, class_name, props):
+        """with_additional/with_limit/with_after(id 순 커서) 지원."""
+        opts = {"limit": None, "after": None, "additional": []}
+
+        def do():
+            rows = []
+            for uid, (obj, vec) in sorted(self._objects(class_name).items()):
+                if opts["after"] is not None and uid <= opts["after"]:
+                    continue
+                row = {p: obj.get(p) for p in props}
+                if opts["additional"]:
+                    row["_additional"] = {"id": uid, **({"vector": vec} if "vector" in opts["additional"] else {})}
+                rows.append(row)
+            return {"data": {"Get": {class_name: rows[:opts["limit"]]}}}
+
+        q = types.SimpleNamespace(do=do)
+        q.with_limit = lambda n: opts.update(limit=n) or q
+        q.with_after = lambda uid: opts.update(after=uid) or q
+        q.with_additional = lambda names: opts.update(additional=list(names)) or q
+        return q
+
+    def contents(self, class_name):
+        return sorted(o[0].get("content") or "" for o in self._objects(class_name).values())
+
+@pytest.fixture
+def fake_weaviate(monkeypatch, tmp_path):
+    """make_DB.client를 FakeWeaviate로 교체 (개별 create/replace 경로, 스냅샷 내보내기 끔)."""
+    import make_DB
+    import index_alias
+    monkeypatch.chdir(tmp_path)
+    fake = FakeWeaviate()
+    monkeypatch.setattr(make_DB, "client", fake)
+    monkeypatch.setattr(make_DB, "EXPORT_LOCAL_SNAPSHOT", False)
+    monkeypatch.setattr(index_alias, "_resolve_cache", {})
+    return fake
+
+INGEST_KWARGS = dict(use_batch=False, parse_workers=1, gc_grace=0, use_embed_cache=False)
+
+def write_rules(root, folder, docs):
+    """docs: {파일명: {"title", "sections": [(heading, 본문 또는 contents 리스트)]}} → data_root/folder/*.json"""
+    path = root / folder
+    path.mkdir(parents=True, exist_ok=True)
+    for name, doc in docs.items():
+        sections = [{"heading": h, "contents": body if isinstance(body, list) else [body]}
+                    for h, body in doc["sections"]]
+        data = {"title": doc["title"], "chapters": [{"title": "제1장", "sections": sections}]}
+        (path / name).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return path
@@ -0,0 +1,17 @@
+from answer_cache import answer_cache
+
+def test_same_question_without_history_is_cached(qa_graph):
+    first = qa_graph("외국인 선수는 몇 명까지 등록할 수 있나요")
+    second = qa_graph("외국인 선수는 몇 명까지 등록할 수 있나요")
+    assert not first["from_cache"]
+    assert second["from_cache"]
+
+def test_follow_up_with_different_history_is_not_shared(qa_graph):
+    follow_up = "그럼 선수는 몇 명까지 등록할 수 있나요?"
+    a = qa_graph(follow_up, "사용자는 외국인 선수 등록 한도를 물었다.")
+    b = qa_graph(follow_up, "사용자는 한 경기 선수 교체 횟수를 물었다.")
+    assert not a["from_cache"] and not b["from_cache"]
+    assert "외국인 선수 등록 한도" in a["final_answer"]
+    assert "선수 교체 횟수" in b["final_answer"]
+    assert "외국인 선수 등록 한도" not in b["final_answer"]
+    assert answer_cache.stats()["entries"] == 0   # 후속 질문 답변은 저장하지 않음
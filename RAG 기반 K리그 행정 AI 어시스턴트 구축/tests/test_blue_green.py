@@ -0,0 +1,57 @@
+import time
+
+import index_alias
+import make_DB
+from conftest import INGEST_KWARGS, write_rules
+
+RULES = {"a.json": {"title": "선수 등록 규정", "sections": [
+    ("제1조(목적)", "이 규정은 선수 등록 절차를 정한다."),
+    ("제2조(등록 기간)", "등록 기간은 시즌 개막 전까지로 한다."),
+]}}
+
+def _versions(fake):
+    return sorted(c for c in fake.classes if index_alias.alias_of(c) == "Rules")
+
+def test_version_names_do_not_collide_within_a_second():
+    names = {index_alias.new_version_name("Rules") for _ in range(50)}
+    assert len(names) == 50
+    assert all(index_alias.alias_of(n) == "Rules" for n in names)
+    assert index_alias.alias_of("Rules_v20250101000000") == "Rules"  # 이전 형식도 인식
+
+def test_stale_versions_keep_classes_other_aliases_point_to(fake_weaviate):
+    for c in ["Rules", "Rules_v20250101000000", "Rules_v20250102000000"]:
+        make_DB._ensure_class(c)
+    index_alias.set_alias(fake_weaviate, "Rules", "Rules_v20250102000000")
+    index_alias.set_alias(fake_weaviate, "Archive", "Rules")  # 포인터 도입 전 클래스를 다른 alias가 직접 사용
+    assert index_alias.stale_versions(fake_weaviate, "Rules") == ["Rules_v20250101000000"]
+
+def test_failed_rebuild_keeps_serving_version(fake_weaviate, tmp_path):
+    data = tmp_path / "data"
+    write_rules(data, "rules", RULES)
+    make_DB.build_index(data_root=str(data), **INGEST_KWARGS)
+    live = index_alias.get_alias_target(fake_weaviate, "Rules")
+    manifest = make_DB.load_manifest()
+
+    fake_weaviate.fail_when = "등록 기간"
+    report = make_DB.build_index(data_root=str(data), **INGEST_KWARGS)
+    assert report["total"]["objects_failed"] == 1
+    assert index_alias.get_alias_target(fake_weaviate, "Rules") == live  # 포인터 전환 안 함
+    assert _versions(fake_weaviate) == [live]                            # 실패한 새 버전은 버림
+    assert make_DB.load_manifest() == manifest
+    assert len(fake_weaviate.contents(live)) == 2
+
+def test_old_version_is_dropped_by_next_build_without_waiting(fake_weaviate, tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    write_rules(data, "rules", RULES)
+    kwargs = dict(INGEST_KWARGS, gc_grace=3600)
+    monkeypatch.setattr(time, "sleep", lambda s: (_ for _ in ()).throw(AssertionError("build_index slept")))
+    make_DB.build_index(data_root=str(data), **kwargs)
+    first = index_alias.get_alias_target(fake_weaviate, "Rules")
+    make_DB.build_index(data_root=str(data), **kwargs)
+    second = index_alias.get_alias_target(fake_weaviate, "Rules")
+    assert second != first
+    assert _versions(fake_weaviate) == sorted([first, second])  # 유예 시간 안이라 이전 버전 유지
+
+    assert make_DB.drop_old_versions(grace=0) == [first]        # 다음 실행/--gc에서 정리
+    assert _versions(fake_weaviate) == [second]
+    assert index_alias.table_class_name(first) not in fake_weaviate.classes
@@ -0,0 +1,14 @@
+import make_DB
+from conftest import INGEST_KWARGS, write_rules
+
+RULES = {"a.json": {"title": "선수 등록 규정", "sections": [("제1조(목적)", "이 규정은 선수 등록 절차를 정한다.")]}}
+
+def test_invalid_folder_names_are_skipped(fake_weaviate, tmp_path):
+    write_rules(tmp_path / "data", "rules", RULES)
+    write_rules(tmp_path / "data", "선수 규정", RULES)
+    make_DB.build_index(data_root=str(tmp_path / "data"), **INGEST_KWARGS)
+
+    built = [c for c in fake_weaviate.classes if c.startswith("Rules_v")]
+    assert len(built) == 2  # 청크 클래스 + 표 클래스
+    assert all(c.startswith(("Rules", "IndexAlias")) for c in fake_weaviate.classes)
+    assert set(make_DB.load_manifest()) == {"Rules"}
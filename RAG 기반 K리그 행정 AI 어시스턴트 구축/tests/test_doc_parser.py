@@ -0,0 +1,22 @@
+import importlib.util
+import sys
+
+import pytest
+
+import doc_parser
+from conftest import write_rules
+
+DOCS = {"a.json": {"title": "선수 등록 규정", "sections": [
+    ("제1조(목적)", "이 규정은 선수 등록 절차를 정한다."),
+    ("제2조(등록 한도)", ["① 구단은 외국인 선수를 다섯 명까지 등록할 수 있다.", "② 등록 기간은 시즌 전이다."]),
+]}}
+
+def test_streaming_path_matches_json_load(tmp_path):
+    path = str(write_rules(tmp_path, "rules", DOCS) / "a.json")
+    assert list(doc_parser.stream_file_chunks("Rules", path)) == doc_parser.file_chunks("Rules", path)
+
+def test_missing_ijson_fails_at_import(monkeypatch):
+    monkeypatch.setitem(sys.modules, "ijson", None)  # 설치되지 않은 것처럼
+    spec = importlib.util.spec_from_file_location("doc_parser_without_ijson", doc_parser.__file__)
+    with pytest.raises(ImportError):
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
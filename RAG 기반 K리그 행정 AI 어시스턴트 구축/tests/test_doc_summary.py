@@ -0,0 +1,80 @@
+import pytest
+
+import doc_summary
+import search_answer
+from conftest import SAMPLE_CHUNKS
+
+CLS = "K_test_v20250101000000"
+NEXT_CLS = "K_test_v20250102000000"
+PROPS = ["title", "chapter_title", "section_heading", "content", "table_id"]
+
+@pytest.fixture
+def llm(fake_weaviate, monkeypatch):
+    """요약 LLM 대역 (호출한 청크 본문 기록, fail_on이 본문에 있으면 실패)."""
+    calls = {"contents": [], "fail_on": None}
+
+    def fake_generate(client, doc, **kw):
+        calls["contents"].append(doc["content"])
+        if calls["fail_on"] and calls["fail_on"] in doc["content"]:
+            raise RuntimeError("quota")
+        return f"- [{doc['title']}][{doc['section_heading']}] 요약"
+
+    monkeypatch.setattr(doc_summary, "generate_summary", fake_generate)
+    monkeypatch.setattr(doc_summary.time, "sleep", lambda s: None)
+    return calls
+
+def _load(fake, class_name, chunks, **extra):
+    fake._create_class({"class": class_name, "properties": [{"name": p} for p in PROPS]})
+    for c in chunks:
+        fake.data_object.create({p: c[p] for p in PROPS} | extra, class_name, c["id"])
+
+def _summaries(fake, class_name):
+    return {u: o[0].get("summary") for u, o in fake._objects(class_name).items()}
+
+def _run(fake, class_name, **kw):
+    return doc_summary.summarize_class(fake, class_name, genai_client=object(), rpm=0, **kw)
+
+def test_summaries_are_replayed_from_journal_after_reingest(fake_weaviate, llm):
+    _load(fake_weaviate, CLS, SAMPLE_CHUNKS[:3])
+    fake_weaviate.data_object.update({"summary": "기존 요약"}, CLS, SAMPLE_CHUNKS[0]["id"])
+    stats = _run(fake_weaviate, CLS)
+    assert (stats["stored"], stats["generated"]) == (1, 2)
+    assert all(_summaries(fake_weaviate, CLS).values())
+
+    # 블루/그린 재적재: 새 클래스에는 summary가 없지만 같은 청크는 LLM 없이 복원, 바뀐 청크만 새로 생성
+    changed = dict(SAMPLE_CHUNKS[2], content="외국인 선수는 구단당 여섯 명까지 등록할 수 있다.")
+    _load(fake_weaviate, NEXT_CLS, SAMPLE_CHUNKS[:2] + [changed])
+    llm["contents"].clear()
+    stats = _run(fake_weaviate, NEXT_CLS)
+    assert (stats["replayed"], stats["generated"]) == (1, 2)
+    # 첫 청크는 저널 밖에서 저장된 요약이라 새로 생성, 두 번째는 복원, 세 번째는 본문이 바뀌어 생성
+    assert llm["contents"] == [SAMPLE_CHUNKS[0]["content"], changed["content"]]
+
+def test_limit_and_failures_leave_work_for_next_run(fake_weaviate, llm):
+    _load(fake_weaviate, CLS, SAMPLE_CHUNKS[:4])
+    llm["fail_on"] = SAMPLE_CHUNKS[0]["content"]
+    stats = _run(fake_weaviate, CLS, limit=2)
+    assert (stats["generated"], stats["failed"], stats["pending"]) == (1, 1, 2)
+    assert llm["contents"].count(SAMPLE_CHUNKS[0]["content"]) == doc_summary.SUMMARY_MAX_RETRIES + 1
+
+    llm["fail_on"] = None
+    stats = _run(fake_weaviate, CLS)
+    assert (stats["stored"], stats["generated"], stats["pending"]) == (1, 3, 0)
+
+def test_journal_skips_truncated_last_line(tmp_path):
+    journal = doc_summary.SummaryJournal("K_test", root=str(tmp_path))
+    journal.append("a", "d1", "요약 A")
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"id": "b", "dig')                                  # 중단으로 잘린 줄
+    reopened = doc_summary.SummaryJournal("K_test", root=str(tmp_path))
+    assert reopened.get("a", "d1") == "요약 A"
+    assert reopened.get("a", "other-digest") is None                 # 프롬프트가 바뀌면 재사용 안 함
+    assert reopened.get("b", "d2") is None
+
+def test_stored_summaries_skip_the_llm_at_query_time(monkeypatch):
+    calls = []
+    monkeypatch.setattr(search_answer, "_summarize_one", lambda doc, *a: calls.append(doc["id"]) or "LLM 요약")
+    docs = [dict(SAMPLE_CHUNKS[0], summary="저장된 요약"), dict(SAMPLE_CHUNKS[1])]
+    summaries, _ = search_answer.summarize_documents(docs, concurrency=1, timeout=5)
+    assert calls == [SAMPLE_CHUNKS[1]["id"]]
+    assert "저장된 요약" in summaries[0] and "LLM 요약" in summaries[1]
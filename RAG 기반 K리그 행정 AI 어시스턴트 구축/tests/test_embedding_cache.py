@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+import pytest
+
+import search_answer
+from conftest import FAKE_DIM, fake_embed
+from embedding_cache import EmbeddingCache
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, **kw):
+        self.calls.append(texts)
+        return np.stack([fake_embed(t) for t in texts]) if not isinstance(texts, str) else fake_embed(texts)
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache("test-model", FAKE_DIM, cache_dir=str(tmp_path))
+
+def _last_used(cache):
+    return dict(cache._db.execute("SELECT key, last_used FROM entries").fetchall())
+
+def test_readonly_encode_does_not_write(cache):
+    model = CountingModel()
+    cache.encode(model, ["제1조 목적"])
+    before = _last_used(cache)
+
+    out = cache.encode(model, ["제1조 목적", "외국인 선수는 몇 명까지?"], readonly=True)
+    assert np.allclose(out, np.stack([fake_embed("제1조 목적"), fake_embed("외국인 선수는 몇 명까지?")]))
+    assert _last_used(cache) == before        # last_used 갱신 없음, 미스도 기록 안 함
+    assert model.calls[-1] == ["외국인 선수는 몇 명까지?"]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+def test_hit_counters_are_consistent_across_threads(cache):
+    model = CountingModel()
+    cache.encode(model, ["공유 문장"])
+    threads = [threading.Thread(target=lambda: [cache.encode(model, ["공유 문장"], readonly=True)
+                                                for _ in range(200)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.stats()["hits"] == 800
+
+def test_encode_query_stays_in_memory(monkeypatch):
+    def no_disk(*a, **kw):
+        raise AssertionError("query path touched the disk embedding cache")
+
+    for name in ("get_many", "peek_many", "put_many", "encode"):
+        monkeypatch.setattr(search_answer.embed_cache, name, no_disk)
+    model = CountingModel()
+    monkeypatch.setattr(search_answer, "embed_model", model)
+    search_answer.query_vec_cache.clear()
+
+    q = "퇴장당한 선수는 다음 경기에 나올 수 있나요"
+    first = search_answer.encode_query(q)
+    second = search_answer.encode_query(q)
+    assert len(model.calls) == 1
+    assert np.allclose(first, fake_embed(q)) and second is first
+    assert not first.flags.writeable
@@ -0,0 +1,61 @@
+import numpy as np
+
+from fast_summary import extractive_summarize, labeled_sentences
+
+HIT, MISS = np.array([1.0, 0.0], dtype=np.float32), np.array([0.0, 1.0], dtype=np.float32)
+
+def _encode_marking(word, seen=None):
+    """word가 든 문장만 질의 벡터(HIT)와 같은 방향."""
+    def encode(texts):
+        if seen is not None:
+            seen.extend(texts)
+        return np.stack([HIT if word in t else MISS for t in texts])
+    return encode
+
+def test_paragraph_marks_become_labels():
+    content = ("① 구단은 외국인 선수를 다섯 명까지 등록할 수 있다.\n"
+               "② 아시아 쿼터 선수는 한 명을 추가로 등록할 수 있다.\n"
+               "제3항 등록 기간은 연맹이 정한다.")
+    assert [label for label, _ in labeled_sentences("제14조(외국인 선수)", content)] == [
+        "제14조 제1항", "제14조 제2항", "제14조 제3항"]
+
+def test_supplementary_provisions_reset_the_article():
+    content = ("제14조의2(임대) 임대 선수는 원소속 구단과의 경기에 나올 수 없다.\n"
+               "부칙\n"
+               "이 규정은 공포한 날부터 시행한다.\n"
+               "제2조(경과조치) 종전 규정으로 등록한 선수는 유효하다.")
+    assert labeled_sentences("제14조(등록)", content) == [
+        ("제14조의2", "제14조의2(임대) 임대 선수는 원소속 구단과의 경기에 나올 수 없다."),
+        ("", "이 규정은 공포한 날부터 시행한다."),                 # 부칙 뒤에는 이전 조문 번호를 달지 않음
+        ("부칙 제2조", "제2조(경과조치) 종전 규정으로 등록한 선수는 유효하다."),
+    ]
+
+def test_stored_summary_does_not_shift_sentence_scores():
+    docs = [
+        {"title": "상벌 규정", "section_heading": "제1조", "summary": "- [상벌 규정][제1조] 저장된 요약",
+         "content": "정답처럼 보이는 저장 문서 문장이다. 저장 문서의 두 번째 문장이다."},
+        {"title": "선수 등록 규정", "section_heading": "제5조",
+         "content": "첫 번째 일반 문장이다. 두 번째 일반 문장이다. 세 번째 정답 문장이다."},
+    ]
+    seen = []
+    summaries, _ = extractive_summarize(docs, HIT, encode=_encode_marking("정답", seen), per_doc=1)
+    assert summaries[0].strip() == "- [상벌 규정][제1조] 저장된 요약"
+    assert summaries[1].strip() == "- [선수 등록 규정][제5조] 세 번째 정답 문장이다."
+    assert not any("저장 문서" in s for s in seen)   # 저장된 요약이 있는 문서는 임베딩하지 않음
+
+def test_without_query_vector_uses_leading_sentences():
+    docs = [{"title": "경기 규정", "section_heading": "",
+             "content": "경기 시간은 전후반 각 45분이다. 하프타임은 15분이다. 세 번째 정답 문장이다."}]
+    expected = ["- (조항번호 없음): 경기 시간은 전후반 각 45분이다.", "- (조항번호 없음): 하프타임은 15분이다."]
+    for kwargs in ({"encode": _encode_marking("정답")}, {}):
+        summaries, block = extractive_summarize(docs, None, **kwargs)
+        assert summaries[0].strip().splitlines() == expected
+        assert block == summaries[0]
+
+def test_scoring_failure_falls_back_to_leading_sentences():
+    def broken(texts):
+        raise RuntimeError("model unavailable")
+
+    docs = [{"title": "경기 규정", "section_heading": "제20조", "content": "앞 문장은 이것이다. 뒤 정답 문장이다."}]
+    summaries, _ = extractive_summarize(docs, HIT, encode=broken, per_doc=1)
+    assert summaries[0].strip() == "- [경기 규정][제20조] 앞 문장은 이것이다."
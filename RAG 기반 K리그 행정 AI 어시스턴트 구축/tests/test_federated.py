@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+import search_answer
+from conftest import SAMPLE_CHUNKS, write_snapshot
+
+AFC_CHUNKS = [
+    {"id": f"00000000-0000-0000-0003-{i:012d}", "title": "AFC 챔피언스리그 규정", "chapter_title": "제2장 참가",
+     "section_heading": h, "content": body, "table_id": ""}
+    for i, (h, body) in enumerate([
+        ("제7조(참가 자격)", "AFC 클럽 라이선스를 취득한 구단만 대회에 참가할 수 있다."),
+        ("제8조(선수 명단)", "구단은 대회 선수 명단에 외국인 선수를 여섯 명까지 올릴 수 있다."),
+        ("제9조(경고 누적)", "대회 중 경고 두 장이 누적된 선수는 다음 경기에 출전할 수 없다."),
+    ])
+]
+QUERIES = ["외국인 선수는 몇 명까지 등록할 수 있나요", "AFC 클럽 라이선스 참가 자격", "경고 누적 출전 정지"]
+CLASSES = ["K_test", "Afc"]
+
+@pytest.fixture
+def two_classes(local_backend):
+    write_snapshot("Afc", "Afc_v20250101000000", AFC_CHUNKS)
+    write_snapshot("Union", "Union_v20250101000000", SAMPLE_CHUNKS + AFC_CHUNKS)  # 비교용 단일 클래스
+    return CLASSES
+
+def _kw(**extra):
+    return dict(near_certainty=0.0, topk_stage1=len(SAMPLE_CHUNKS) + len(AFC_CHUNKS), topk_final=4, **extra)
+
+def test_merged_ranking_matches_one_combined_class(two_classes):
+    for q in QUERIES:
+        fed = search_answer.retrieve_federated(q, index_classes=two_classes, **_kw())
+        one = search_answer.retrieve_single_pass(q, index_class="Union", **_kw())
+        assert fed["top_ids"] == one["top_ids"]   # 전체 후보 기준으로 정규화한 하나의 순위
+        assert set(fed["class_ms"]) == set(two_classes)
+        origin = {c["id"]: "K_test" for c in SAMPLE_CHUNKS} | {c["id"]: "Afc" for c in AFC_CHUNKS}
+        assert all(d["index_class"] == origin[d["_additional"]["id"]] for d in fed["docs"])
+    top = search_answer.retrieve_federated(QUERIES[1], index_classes=two_classes, **_kw())["docs"][0]
+    assert top["index_class"] == "Afc"
+
+def test_classes_are_searched_concurrently_with_one_embedding(two_classes, monkeypatch):
+    encoded = []
+    encode_query = search_answer.encode_query
+    monkeypatch.setattr(search_answer, "encode_query", lambda q: encoded.append(q) or encode_query(q))
+    near_vector = search_answer._near_vector
+
+    def slow_near_vector(*a, **kw):
+        time.sleep(0.3)
+        return near_vector(*a, **kw)
+
+    monkeypatch.setattr(search_answer, "_near_vector", slow_near_vector)
+    t0 = time.monotonic()
+    search_answer.retrieve_federated(QUERIES[0], index_classes=two_classes, **_kw())
+    assert time.monotonic() - t0 < 0.55           # 합이 아니라 가장 느린 클래스 기준
+    assert encoded == [QUERIES[0]]
+
+def test_failing_class_fails_the_search(two_classes, monkeypatch):
+    near_vector = search_answer._near_vector
+
+    def broken(index_class, *a, **kw):
+        if index_class == "Afc":
+            raise RuntimeError("class unavailable")
+        return near_vector(index_class, *a, **kw)
+
+    monkeypatch.setattr(search_answer, "_near_vector", broken)
+    with pytest.raises(RuntimeError):              # 부분 결과로 답하지 않음
+        search_answer.retrieve_federated(QUERIES[0], index_classes=two_classes, **_kw())
+
+def test_fetch_final_docs_federated_keeps_order(two_classes):
+    ids = [AFC_CHUNKS[1]["id"], SAMPLE_CHUNKS[2]["id"], AFC_CHUNKS[0]["id"]]
+    docs = search_answer.fetch_final_docs_federated(ids, index_classes=two_classes)
+    assert [d["_additional"]["id"] for d in docs] == ids
+    assert [d["index_class"] for d in docs] == ["Afc", "K_test", "Afc"]
+    assert search_answer.ids_exist_federated(two_classes, ids)
+    assert not search_answer.ids_exist_federated(two_classes, ids + ["00000000-0000-0000-0009-000000000000"])
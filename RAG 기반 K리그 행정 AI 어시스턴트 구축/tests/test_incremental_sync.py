@@ -0,0 +1,48 @@
+import make_DB
+from conftest import write_rules
+
+CLS = "Rules_v20250101000000"
+UPSERTER = dict(use_batch=False, embed_batch_size=8, batch_size=8, num_workers=1, use_embed_cache=False)
+REG = {"title": "선수 등록 규정", "sections": [("제1조", "선수 등록 절차를 정한다."), ("제2조", "등록 기간은 시즌 전이다.")]}
+
+def _sync(root, prev):
+    return make_DB._sync_class("Rules", CLS, "rules", prev, data_root=str(root),
+                               upserter_kwargs=UPSERTER, parse_workers=1)
+
+def test_ref_counter_keeps_shared_ids_until_last_release():
+    refs = make_DB._RefCounter([["x", "y"], ["y"]])
+    refs.release(["x", "y"])
+    assert refs.garbage() == {"x"}
+    refs.acquire("x")
+    refs.release(["y"])
+    assert refs.garbage() == {"y"}
+
+def test_sync_class_applies_only_the_delta(fake_weaviate, tmp_path):
+    make_DB._ensure_class(CLS)
+    folder = write_rules(tmp_path, "rules", {"a.json": REG, "copy.json": REG})
+
+    files, inserted, deleted, failed = _sync(tmp_path, {})
+    assert (inserted, deleted, failed) == (2, 0, 0)      # 두 파일이 같은 청크 → 1번만 적재
+    assert files["a.json"]["chunks"] == files["copy.json"]["chunks"]
+
+    # 변경 없음 → 아무것도 하지 않음
+    files, inserted, deleted, _ = _sync(tmp_path, files)
+    assert (inserted, deleted) == (0, 0)
+
+    # 같은 청크를 가진 파일 하나가 사라져도 다른 파일이 참조하면 삭제하지 않음
+    (folder / "copy.json").unlink()
+    files, inserted, deleted, _ = _sync(tmp_path, files)
+    assert (inserted, deleted) == (0, 0) and set(files) == {"a.json"}
+    assert len(fake_weaviate.contents(CLS)) == 2
+
+    # 섹션 1개만 수정 → 그 청크만 새로 적재, 이전 청크는 삭제
+    write_rules(tmp_path, "rules", {"a.json": {**REG, "sections": [REG["sections"][0], ("제2조", "등록 기간은 1월이다.")]}})
+    files, inserted, deleted, _ = _sync(tmp_path, files)
+    assert (inserted, deleted) == (1, 1)
+    assert fake_weaviate.contents(CLS) == ["등록 기간은 1월이다.", "선수 등록 절차를 정한다."]
+
+    # 마지막 파일 삭제 → 청크 전부 삭제
+    (folder / "a.json").unlink()
+    files, inserted, deleted, _ = _sync(tmp_path, files)
+    assert files == {} and deleted == 2
+    assert fake_weaviate.contents(CLS) == []
@@ -0,0 +1,52 @@
+import json
+import types
+
+import make_DB
+
+UPSERTER = dict(use_batch=False, embed_batch_size=8, batch_size=8, num_workers=1, use_embed_cache=False)
+
+def _write_rules(root):
+    folder = root / "rules"
+    folder.mkdir(parents=True)
+    for name, sections in [("a.json", ["외국인 선수는 다섯 명까지 등록한다.", "등록 기간은 시즌 전이다."]),
+                           ("b.json", ["퇴장당한 선수는 다음 경기에 나올 수 없다."])]:
+        doc = {"title": name, "chapters": [{"title": "제1장", "sections": [
+            {"heading": f"제{i}조", "contents": [text]} for i, text in enumerate(sections, 1)
+        ]}]}
+        (folder / name).write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+
+class _FakeObjects:
+    def __init__(self, fail_when=None):
+        self.fail_when = fail_when
+        self.created = {}
+
+    def create(self, data_object, class_name, uuid, vector):
+        if self.fail_when and self.fail_when in (data_object.get("content") or ""):
+            raise RuntimeError("write timeout")
+        self.created[uuid] = data_object
+
+    replace = create
+
+def test_failed_chunks_are_retried_on_next_run(monkeypatch, tmp_path):
+    _write_rules(tmp_path)
+    objects = _FakeObjects(fail_when="등록 기간")
+    monkeypatch.setattr(make_DB, "client", types.SimpleNamespace(data_object=objects))
+
+    files, inserted, _, failed = make_DB._sync_class(
+        "K_test", "K_test_v20250101000000", "rules", {},
+        data_root=str(tmp_path), upserter_kwargs=UPSERTER, parse_workers=1
+    )
+    assert (inserted, failed) == (2, 1)
+    assert files["a.json"]["sha256"] is None                  # 다음 실행에서 다시 처리
+    assert len(files["a.json"]["chunks"]) == 1                 # 실패 청크는 매니페스트에 없음
+    assert files["b.json"]["sha256"] is not None
+
+    objects.fail_when = None
+    files2, inserted2, deleted2, failed2 = make_DB._sync_class(
+        "K_test", "K_test_v20250101000000", "rules", files,
+        data_root=str(tmp_path), upserter_kwargs=UPSERTER, parse_workers=1
+    )
+    assert (inserted2, deleted2, failed2) == (1, 0, 0)         # 실패했던 청크만 다시 적재
+    assert files2["a.json"]["sha256"] is not None
+    assert len(files2["a.json"]["chunks"]) == 2
+    assert len(objects.created) == 3
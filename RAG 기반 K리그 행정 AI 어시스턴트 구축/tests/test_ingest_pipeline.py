@@ -0,0 +1,102 @@
+import threading
+import types
+from concurrent.futures import Future
+
+import pytest
+
+import make_DB
+from conftest import write_rules
+
+CLS = "Rules_v20250101000000"
+DOCS = {f"{n}.json": {"title": f"규정 {n}", "sections": [
+    (f"제{i}조", f"{n} 규정 제{i}조 본문: 선수 {i}명까지 등록한다.") for i in range(1, 6)
+]} for n in "abcd"}
+BATCH = dict(use_batch=True, embed_batch_size=3, batch_size=4, num_workers=2, queue_size=1, use_embed_cache=False)
+SYNC = dict(use_batch=False, embed_batch_size=3, batch_size=4, num_workers=1, use_embed_cache=False)
+
+class _Batch:
+    """with client.batch as batch: batch.add_data_object(...) → fake_weaviate에 바로 적재."""
+    def __init__(self, fake):
+        self.add_data_object = lambda **kw: fake._replace(**kw)
+
+    def configure(self, **kw):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+@pytest.fixture
+def batch_clients(fake_weaviate, monkeypatch):
+    """쓰기 스레드가 만드는 weaviate.Client 대역 (만든 스레드 기록)."""
+    made = []
+
+    def client_factory(url):
+        made.append(threading.get_ident())
+        return types.SimpleNamespace(batch=_Batch(fake_weaviate))
+
+    monkeypatch.setattr(make_DB.weaviate, "Client", client_factory)
+    make_DB._ensure_class(CLS)
+    return made
+
+def _sync(tmp_path, upserter, parse_workers=1, prev=None):
+    return make_DB._sync_class("Rules", CLS, "rules", prev or {}, data_root=str(tmp_path / "data"),
+                               upserter_kwargs=upserter, parse_workers=parse_workers)
+
+def test_batch_pipeline_matches_sync_path(fake_weaviate, batch_clients, tmp_path):
+    write_rules(tmp_path / "data", "rules", DOCS)
+    files, inserted, _, failed = _sync(tmp_path, BATCH)
+    assert (inserted, failed) == (20, 0)
+    assert len(set(batch_clients)) == 2                  # 쓰기 스레드마다 자기 클라이언트
+    batched = fake_weaviate.contents(CLS)
+
+    make_DB._delete_class(CLS)
+    make_DB._ensure_class(CLS)
+    files_sync, inserted_sync, _, _ = _sync(tmp_path, SYNC)
+    assert inserted_sync == 20
+    assert fake_weaviate.contents(CLS) == batched
+    assert files == files_sync
+
+def test_failed_embed_batch_is_left_for_retry(fake_weaviate, batch_clients, tmp_path, monkeypatch):
+    write_rules(tmp_path / "data", "rules", {"a.json": DOCS["a.json"]})
+    encode = make_DB.embed_model.encode
+
+    def flaky_encode(texts, **kw):
+        if any("제4조" in t for t in texts):
+            raise RuntimeError("OOM")
+        return encode(texts, **kw)
+
+    monkeypatch.setattr(make_DB.embed_model, "encode", flaky_encode)
+    files, inserted, _, failed = _sync(tmp_path, BATCH)
+    assert (inserted, failed) == (3, 2)                  # 3개씩 묶인 두 번째 배치(제4·5조)만 실패
+    assert files["a.json"]["sha256"] is None
+    assert len(files["a.json"]["chunks"]) == 3
+
+def test_prepared_files_keep_order_and_bound_inflight(tmp_path):
+    write_rules(tmp_path / "data", "rules", DOCS)
+    paths = sorted(str(p) for p in (tmp_path / "data" / "rules").glob("*.json"))
+
+    class CountingPool:
+        submitted = 0
+
+        def submit(self, fn, *args, **kwargs):
+            CountingPool.submitted += 1
+            fut = Future()
+            fut.set_result(fn(*args, **kwargs))
+            return fut
+
+    seen = []
+    for k, res in enumerate(make_DB._prepared_files(CountingPool(), "Rules", paths, {}, max_inflight=2), 1):
+        assert CountingPool.submitted <= k + 1           # 앞 단계는 최대 max_inflight개까지만 앞서감
+        seen.append(res["path"])
+    assert seen == paths
+
+def test_parse_pool_gives_same_manifest(fake_weaviate, tmp_path):
+    write_rules(tmp_path / "data", "rules", DOCS)
+    make_DB._ensure_class(CLS)
+    pooled = _sync(tmp_path, SYNC, parse_workers=2)
+    make_DB._delete_class(CLS)
+    make_DB._ensure_class(CLS)
+    assert _sync(tmp_path, SYNC, parse_workers=1) == pooled
@@ -0,0 +1,53 @@
+import pytest
+
+import keyword_index
+import search_answer
+from conftest import SAMPLE_CHUNKS, fake_embed, write_snapshot
+
+def _chunk(n, title, heading, content):
+    return {"id": f"00000000-0000-0000-0002-{n:012d}", "title": title, "chapter_title": "제3장",
+            "section_heading": heading, "content": content, "table_id": ""}
+
+ART_14 = _chunk(1, "선수 등록 규정", "제14조(등록 기간)",
+                "제14조(등록 기간)\n① 선수 등록은 시즌 개막 전까지 한다.\n② 추가 등록은 여름 이적 기간에 한다.")
+ART_14_2 = _chunk(2, "선수 등록 규정", "제14조의2(임대 선수)", "제14조의2(임대 선수) 임대 선수는 원소속 구단과의 경기에 나올 수 없다.")
+ART_14_PENALTY = _chunk(3, "상벌 규정", "제14조(제재금)", "제14조(제재금) 폭력 행위에는 제재금을 부과한다.")
+ART_15 = _chunk(4, "선수 등록 규정", "제15조(등록 말소)", "제15조(등록 말소) 제14조에 따라 등록된 선수가 은퇴하면 등록을 말소한다.")
+CHUNKS = SAMPLE_CHUNKS[:4] + SAMPLE_CHUNKS[6:] + [ART_14, ART_14_2, ART_14_PENALTY, ART_15]  # 상벌 규정 제14·15조 대체
+
+@pytest.fixture
+def kw(local_backend, monkeypatch):
+    write_snapshot("K_test", local_backend, CHUNKS)
+    monkeypatch.setattr(keyword_index, "_cache", {})
+    keyword_index.build_keyword_index("K_test")
+    return keyword_index.get_keyword_index(local_backend)
+
+def test_article_lookup_distinguishes_sub_articles(kw):
+    assert kw.article_lookup("제14조의2 임대 선수") == [ART_14_2["id"]]
+    plain = kw.article_lookup("제14조")
+    assert set(plain) == {ART_14["id"], ART_14_PENALTY["id"]}    # 제14조의2, 본문 속 인용(제15조)은 제외
+    assert kw.article_lookup("선수 등록 규정 14조") == [ART_14["id"]]  # 규정명이 다른 같은 번호 조문은 버림
+    assert kw.article_lookup("제14조 ②") == [ART_14["id"]]
+    assert kw.article_lookup("제99조") == []
+
+def test_bm25_matches_words_with_particles(kw):
+    assert kw.search("임대선수의 경기 출전", topk=1)[0][0] == ART_14_2["id"]
+    assert kw.search("폭력행위에 대한 제재금", topk=1)[0][0] == ART_14_PENALTY["id"]
+
+def test_rank_candidates_promotes_exact_article():
+    items = [{"_additional": {"id": f"id{i}", "distance": 0.1 * i}, "content": f"본문 {i}"} for i in range(4)]
+    qv = fake_embed("본문 0")
+    c = {"items": items, "ids_stage1": [(d["_additional"]["id"], d["_additional"]["distance"]) for d in items],
+         "id_list": [d["_additional"]["id"] for d in items],
+         "vectors": {d["_additional"]["id"]: fake_embed(d["content"]) for d in items},
+         "kw_scores": {}, "article_ids": ["id3", "missing"]}
+    r = search_answer._rank_candidates(qv, c, topk_final=2, alpha=0.6, low_conf=2.0)
+    assert r["top_ids"] == ["id3", "id0"]      # 조문 일치는 맨 앞, 나머지는 리랭킹 순서
+    assert r["article_ids"] == ["id3"]          # 후보에 없는 id는 무시
+    assert not r["fallback"]                    # 조문 일치가 있으면 저신뢰 폴백 안 함
+
+def test_single_pass_puts_sub_article_first(kw, local_backend):
+    r = search_answer.retrieve_single_pass("제14조의2", index_class=local_backend, near_certainty=0.0,
+                                           topk_stage1=4, topk_final=3)
+    assert r["top_ids"][0] == ART_14_2["id"]
+    assert ART_14["id"] not in r["article_ids"]
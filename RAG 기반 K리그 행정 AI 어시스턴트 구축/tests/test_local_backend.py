@@ -0,0 +1,19 @@
+import numpy as np
+
+import search_answer
+from conftest import SAMPLE_CHUNKS
+
+def test_local_doc_vector_matches_weaviate_shape(local_backend):
+    idx = search_answer.local_index.get_store().index_for(local_backend)
+    doc = idx.get([SAMPLE_CHUNKS[0]["id"]], ["title"], with_vector=True)[0]
+    assert isinstance(doc["_additional"]["vector"], list)
+
+def test_retrieve_single_pass_on_local_snapshot(local_backend):
+    r = search_answer.retrieve_single_pass(
+        "외국인 선수는 구단당 몇 명까지 등록할 수 있나요", index_class=local_backend, near_certainty=0.0
+    )
+    assert r["docs"], "local backend returned no documents"
+    assert r["top_ids"][0] == SAMPLE_CHUNKS[2]["id"]
+    assert set(r["vectors"]) == set(r["id_list"])
+    assert all(isinstance(v, np.ndarray) for v in r["vectors"].values())
+    assert r["docs"][0]["title"] == "선수 등록 규정"
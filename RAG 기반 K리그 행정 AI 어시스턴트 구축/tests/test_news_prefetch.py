@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+import graph_pipeline
+
+@pytest.fixture
+def news_pool(qa_graph, monkeypatch):
+    """워커 1개짜리 뉴스 풀: 첫 조회는 release 전까지 진행 중, 이후 조회는 대기열에 남음."""
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    started = []
+
+    def prefetch(query, **kw):
+        fut = pool.submit(release.wait, 5)
+        started.append(fut)
+        return fut
+
+    monkeypatch.setattr(graph_pipeline, "prefetch_news", prefetch)
+    yield qa_graph, release, started
+    release.set()
+    pool.shutdown(wait=True)
+
+def test_queued_news_is_cancelled_when_retrieval_fails(news_pool, monkeypatch):
+    ask, release, started = news_pool
+    blocker = graph_pipeline.prefetch_news("다른 요청")  # 워커 점유 → 이번 요청의 조회는 시작 전
+
+    def broken(*a, **kw):
+        raise RuntimeError("search backend down")
+
+    monkeypatch.setattr(graph_pipeline, "retrieve_single_pass", broken)
+    with pytest.raises(RuntimeError):
+        ask("외국인 선수는 몇 명까지 등록할 수 있나요")
+    assert started[-1] is not blocker and started[-1].cancelled()
+
+def test_running_news_is_detached_when_summary_fails(news_pool, monkeypatch):
+    ask, release, started = news_pool
+
+    def broken(*a, **kw):
+        raise RuntimeError("summary failed")  # 요약 실패 시점에는 뉴스 조회가 아직 진행 중
+
+    monkeypatch.setattr(graph_pipeline, "summarize_documents", broken)
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError):
+        ask("외국인 선수는 몇 명까지 등록할 수 있나요")
+    assert time.monotonic() - t0 < 1.0                  # 진행 중인 조회를 기다리지 않음
+    fut = started[0]
+    assert not fut.done() and graph_pipeline._discard_news in fut._done_callbacks
+
+    release.set()
+    fut.result(timeout=5)
+    assert not fut.cancelled()
+
+def test_detached_news_error_is_swallowed():
+    fut = Future()
+    assert fut.set_running_or_notify_cancel()           # 진행 중 → 취소할 수 없음
+    graph_pipeline._release_news([fut])
+    assert not fut.cancelled()
+    fut.set_exception(RuntimeError("news api down"))  # 콜백이 예외를 꺼내 버림 (호출 측으로 전파 없음)
@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import fake_embed
+from news_search import NewsStore
+
+ARTICLES = [
+    {"url": "https://news.example/1", "title": "K리그 외국인 선수 확대", "contents": "내년부터 외국인 선수 한도가 늘어난다."},
+    {"url": "https://news.example/2", "title": "퇴장 징계 강화", "contents": "연맹이 퇴장 선수 징계를 강화했다."},
+    {"url": "", "title": "URL 없는 기사", "contents": "본문으로만 구분하는 기사."},
+]
+
+class CountingEncode:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return fake_embed(list(texts))
+
+@pytest.fixture
+def store(tmp_path):
+    return NewsStore(str(tmp_path / "news.sqlite"))
+
+def _embedding(store, url):
+    return store._db.execute("SELECT embedding FROM articles WHERE key = ?", (url,)).fetchone()[0]
+
+def test_upsert_dedups_by_url(store):
+    dup = dict(ARTICLES[0], url="  https://news.example/1 ", title="같은 기사 다른 제목")
+    out = store.upsert(ARTICLES + [dup, dict(ARTICLES[2])])
+    assert out == ARTICLES                           # 응답 순서 유지, 같은 URL/같은 본문은 1번만
+    store.upsert(ARTICLES[:2])
+    stats = store.stats()
+    assert (stats["articles"], stats["new_articles"], stats["seen_articles"]) == (3, 3, 2)
+
+def test_text_change_clears_embedding(store):
+    encode = CountingEncode()
+    store.upsert(ARTICLES)
+    store.vectors(ARTICLES, model="m", encode=encode)
+    assert _embedding(store, ARTICLES[0]["url"]) is not None
+
+    edited = dict(ARTICLES[0], contents="외국인 선수 한도 확대가 보류됐다.")
+    store.upsert([edited])
+    assert _embedding(store, ARTICLES[0]["url"]) is None
+    encode.texts.clear()
+    store.vectors([edited, ARTICLES[1]], model="m", encode=encode)
+    assert len(encode.texts) == 1 and "보류" in encode.texts[0]  # 바뀐 기사만 다시 인코딩
+
+def test_second_vectors_call_does_not_reencode(store, tmp_path):
+    encode = CountingEncode()
+    first = store.vectors(ARTICLES, model="m", encode=encode)
+    assert len(encode.texts) == 3
+    second = store.vectors(ARTICLES, model="m", encode=encode)
+    assert len(encode.texts) == 3 and (second == first).all()
+    assert (store.stats()["embed_hits"], store.stats()["embed_misses"]) == (3, 3)
+
+    reopened = NewsStore(str(tmp_path / "news.sqlite"))   # 프로세스 재시작 후에도 재사용
+    reopened.vectors(ARTICLES, model="m", encode=encode)
+    assert len(encode.texts) == 3
+    reopened.vectors(ARTICLES, model="other-model", encode=encode)
+    assert len(encode.texts) == 6                          # 임베딩 모델이 바뀌면 다시 인코딩
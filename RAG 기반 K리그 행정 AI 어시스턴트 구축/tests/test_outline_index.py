@@ -0,0 +1,50 @@
+from functools import partialmethod
+
+import pytest
+
+import outline_index
+import search_answer
+from conftest import SAMPLE_CHUNKS
+
+QUERIES = [
+    "외국인 선수는 구단당 몇 명까지 등록할 수 있나요",
+    "퇴장당한 선수는 다음 경기에 나올 수 있나요",
+    "선수 교체는 몇 명까지 가능한가요",
+    "폭력 행위 제재금",
+]
+
+@pytest.fixture
+def outline(local_backend, monkeypatch):
+    """K_test 스냅샷의 계층 인덱스 (문서 1개 → 장 1개 → 절 2개로 좁혀 실제로 후보를 줄임)."""
+    monkeypatch.setattr(outline_index, "_cache", {})
+    outline_index.build_outline_index("K_test")
+    monkeypatch.setattr(outline_index.OutlineIndex, "candidate_ids",
+                        partialmethod(outline_index.OutlineIndex.candidate_ids,
+                                      top_docs=1, top_chapters=1, top_sections=2))
+    monkeypatch.setattr(search_answer, "TOPK_FINAL", 1)  # 후보가 적어도 전체 재검색으로 빠지지 않게
+    return local_backend
+
+def _top_id(index_class, query):
+    search_answer.retrieval_cache.clear()
+    r = search_answer.retrieve_single_pass(query, index_class=index_class, near_certainty=0.0,
+                                           topk_stage1=4, topk_final=1)
+    return r["top_ids"][0]
+
+def test_outline_disabled_below_min_chunks(outline):
+    qv = search_answer.encode_query(QUERIES[0])
+    assert search_answer.hierarchical_candidate_ids(outline, qv) is None  # 8청크 < 2000
+
+def test_outline_descent_matches_flat_search(outline, monkeypatch):
+    flat = {q: _top_id(outline, q) for q in QUERIES}
+
+    monkeypatch.setattr(search_answer, "OUTLINE_MIN_CHUNKS", 1)
+    searched = []
+    near_vector = search_answer._near_vector
+    monkeypatch.setattr(search_answer, "_near_vector",
+                        lambda *a, **kw: searched.append(kw.get("ids")) or near_vector(*a, **kw))
+    for q in QUERIES:
+        ids = search_answer.hierarchical_candidate_ids(outline, search_answer.encode_query(q))
+        assert ids is not None and len(ids) < len(SAMPLE_CHUNKS)
+        searched.clear()
+        assert _top_id(outline, q) == flat[q]
+        assert searched == [ids]  # 계층 후보 안에서만 검색 (전체 재검색 없음)
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+import query_cache
+from query_cache import VersionedLRUCache, normalize_query
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+def test_entry_misses_after_index_version_changes():
+    cache = VersionedLRUCache("t")
+    cache.put("q", "answer", "K_test_v1#1")
+    assert cache.get("q", "K_test_v1#1") == "answer"
+    assert cache.get("q", "K_test_v2#2") is None   # 재색인 후 이전 결과 버림
+    assert cache.get("q", "K_test_v1#1") is None   # 버린 항목은 되살아나지 않음
+    assert cache.stats()["stale"] == 1
+
+def test_entry_expires_after_ttl(clock):
+    cache = VersionedLRUCache("t", ttl=10)
+    cache.put("q", "answer")
+    clock[0] += 9.9
+    assert cache.get("q") == "answer"
+    clock[0] += 0.2
+    assert cache.get("q") is None
+    assert cache.stats()["expired"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VersionedLRUCache("t", max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1                     # a를 최근 사용으로
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+def test_normalize_query_and_registry(monkeypatch):
+    monkeypatch.setattr(query_cache, "_registry", dict(query_cache._registry))
+    assert normalize_query("  외국인 선수   몇 명？ ") == normalize_query("외국인 선수 몇 명")
+    assert query_cache.get_cache("test_registry") is query_cache.get_cache("test_registry")
+    assert "test_registry" in query_cache.cache_stats()
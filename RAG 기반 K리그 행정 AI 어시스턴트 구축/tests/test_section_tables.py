@@ -0,0 +1,58 @@
+import json
+
+import doc_parser
+import make_DB
+import search_answer
+from conftest import write_rules
+
+CLS = "Rules_v20250101000000"
+TABLE = [{"구분": "외국인 선수", "인원": "5명"}, {"구분": "아시아 쿼터", "인원": "1명"}]
+BODY = " ".join(f"제{i}항 구단은 등록 기간 안에 선수 명단을 제출한다." for i in range(1, 9))
+
+def _rules(with_table=True):
+    contents = [BODY] + ([{"table": TABLE}] if with_table else [])
+    return {"a.json": {"title": "선수 등록 규정", "sections": [("제5조(등록 인원)", contents)]}}
+
+def _sync(tmp_path, prev):
+    return make_DB._sync_class("Rules", CLS, "rules", prev, data_root=str(tmp_path / "data"),
+                               upserter_kwargs=dict(use_batch=False, embed_batch_size=8, batch_size=8,
+                                                    num_workers=1, use_embed_cache=False),
+                               parse_workers=1)
+
+def test_table_is_stored_once_per_section(fake_weaviate, tmp_path, monkeypatch):
+    monkeypatch.setattr(doc_parser, "CHUNK_MAX_CHARS", 80)
+    monkeypatch.setattr(doc_parser, "CHUNK_OVERLAP_CHARS", 10)
+    write_rules(tmp_path / "data", "rules", _rules())
+    make_DB._ensure_class(CLS)
+    files, inserted, _, _ = _sync(tmp_path, {})
+
+    chunks = [props for props, _ in fake_weaviate._objects(CLS).values()]
+    tables = fake_weaviate._objects(make_DB.table_class_name(CLS))
+    assert inserted == len(chunks) > 2
+    assert len(tables) == 1 and files["a.json"]["tables"] == list(tables)
+    assert {c["table_id"] for c in chunks} == set(tables)        # 모든 청크가 같은 표를 가리킴
+    assert all("table_json" not in c for c in chunks)
+    assert json.loads(next(iter(tables.values()))[0]["table_json"]) == [TABLE]
+    assert any("외국인 선수" in c["content"] for c in chunks)       # 표 텍스트는 임베딩 본문에 유지
+
+    write_rules(tmp_path / "data", "rules", _rules(with_table=False))
+    files, _, _, _ = _sync(tmp_path, files)
+    assert files["a.json"]["tables"] == []
+    assert not fake_weaviate._objects(make_DB.table_class_name(CLS))  # 사라진 표는 삭제
+
+def test_attach_tables_fetches_each_table_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(search_answer, "_get_tables",
+                        lambda cls, ids: calls.append(list(ids)) or {i: f"[{i}]" for i in ids})
+    docs = [{"table_id": "t1"}, {"table_id": "t1"}, {"table_id": ""}, {"table_id": "t2"}]
+    search_answer.attach_tables(docs, index_class=CLS)
+    assert calls == [["t1", "t2"]]
+    assert [d.get("table_json") for d in docs] == ["[t1]", "[t1]", None, "[t2]"]
+
+def test_attach_tables_falls_back_to_content(monkeypatch):
+    def broken(cls, ids):
+        raise RuntimeError("table class missing")
+
+    monkeypatch.setattr(search_answer, "_get_tables", broken)
+    docs = [{"table_id": "t1", "content": "본문"}]
+    assert search_answer.attach_tables(docs, index_class=CLS) == [{"table_id": "t1", "content": "본문"}]
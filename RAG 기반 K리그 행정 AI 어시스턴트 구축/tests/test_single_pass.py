@@ -0,0 +1,53 @@
+import pytest
+
+import search_answer
+from conftest import SAMPLE_CHUNKS
+
+QUERIES = [
+    "외국인 선수는 구단당 몇 명까지 등록할 수 있나요",
+    "퇴장당한 선수는 다음 경기에 나올 수 있나요",
+    "선수 교체는 몇 명까지 가능한가요",
+]
+K = 3
+
+@pytest.fixture
+def calls(local_backend, monkeypatch):
+    """_near_vector/_get_by_ids 호출 기록 (Weaviate 왕복 횟수)."""
+    log = []
+    for name in ("_near_vector", "_get_by_ids"):
+        fn = getattr(search_answer, name)
+        monkeypatch.setattr(search_answer, name,
+                            lambda *a, _fn=fn, _name=name, **kw: log.append(_name) or _fn(*a, **kw))
+    return log
+
+def _legacy(index_class, query, low_conf):
+    qv, ids_stage1, id_list, vectors = search_answer.stage1_retrieve(
+        query, index_class=index_class, near_certainty=0.0, topk=len(SAMPLE_CHUNKS))
+    cands = search_answer.fetch_candidates_by_ids(id_list, index_class=index_class)
+    top_ids, top_score = search_answer.rerank_with_late_fusion(qv, ids_stage1, cands, topk=K, vectors=vectors)
+    if top_score < low_conf:
+        docs = search_answer.refine_near_vector_fallback(id_list, qv, index_class=index_class, near_certainty=0.0,
+                                                         topk=K)
+        return [d["_additional"]["id"] for d in docs]
+    return top_ids
+
+def _single(index_class, query, low_conf):
+    return search_answer.retrieve_single_pass(query, index_class=index_class, near_certainty=0.0,
+                                              topk_stage1=len(SAMPLE_CHUNKS), topk_final=K, low_conf=low_conf)
+
+@pytest.mark.parametrize("low_conf", [0.0, 2.0])  # 2.0 = 항상 저신뢰 폴백
+def test_single_pass_matches_legacy_with_one_request(local_backend, calls, low_conf):
+    for q in QUERIES:
+        expected = _legacy(local_backend, q, low_conf)
+        calls.clear()
+        r = _single(local_backend, q, low_conf)
+        assert calls == ["_near_vector"]               # 검색·본문·벡터를 한 번에 (폴백도 추가 조회 없음)
+        assert r["fallback"] == (low_conf > 1.0)
+        assert r["top_ids"] == expected
+        assert [d["_additional"]["id"] for d in r["docs"]] == expected
+        assert all(d["content"] and "table_json" not in d for d in r["docs"])
+
+def test_qa_graph_retrieves_in_one_request(qa_graph, calls):
+    out = qa_graph(QUERIES[1])
+    assert calls == ["_near_vector"]
+    assert "다음 경기" in out["final_answer"]
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+import search_answer
+from conftest import SAMPLE_CHUNKS
+
+@pytest.fixture
+def slow_client(monkeypatch):
+    """첫 문서 요약만 멈추는 요약 호출 대역 (나머지는 0.35초)."""
+    release = threading.Event()
+
+    def fake_summarize_one(doc, *args):
+        if doc["id"] == SAMPLE_CHUNKS[0]["id"]:
+            release.wait(5)
+            return "late"
+        time.sleep(0.35)
+        return f"- [{doc['title']}][{doc['section_heading']}] LLM 요약"
+
+    monkeypatch.setattr(search_answer, "_summarize_one", fake_summarize_one)
+    yield
+    release.set()
+
+def test_timeout_is_per_call_and_falls_back_to_extractive(slow_client):
+    docs = [dict(c) for c in SAMPLE_CHUNKS[:5]]
+    t0 = time.monotonic()
+    summaries, _ = search_answer.summarize_documents(docs, concurrency=2, timeout=0.4)
+    elapsed = time.monotonic() - t0
+
+    # 대기열에서 기다린 호출(세 번째 이후)도 시작 시점부터 0.4초를 받아 LLM 요약 사용
+    assert all("LLM 요약" in s for s in summaries[1:])
+    # 멈춘 호출은 그 문서만 추출 요약으로 대체
+    assert "late" not in summaries[0]
+    assert summaries[0].strip().startswith(f"- [{docs[0]['title']}][제1조]")
+    assert elapsed < 2.5
+
+def test_all_workers_stuck_skips_queued_calls(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(search_answer, "_summarize_one", lambda doc, *a: release.wait(5) and "late")
+    docs = [dict(c) for c in SAMPLE_CHUNKS[:3]]
+    t0 = time.monotonic()
+    try:
+        summaries, _ = search_answer.summarize_documents(docs, concurrency=1, timeout=0.2)
+    finally:
+        release.set()
+    assert time.monotonic() - t0 < 1.0
+    assert all(s.strip().startswith("- [") for s in summaries)
@@ -0,0 +1,59 @@
+import pytest
+
+import search_answer
+import title_filter
+from title_filter import name_variants
+
+QUERY = "상벌 규정 제3장 징계에서 폭력 행위 제재금은?"
+
+@pytest.fixture
+def titles(local_backend, monkeypatch):
+    monkeypatch.setattr(title_filter, "_cache", {})
+    title_filter.build_title_dict("K_test")
+    filters_used = []
+    near_vector = search_answer._near_vector
+    monkeypatch.setattr(search_answer, "_near_vector",
+                        lambda *a, **kw: filters_used.append(kw.get("filters")) or near_vector(*a, **kw))
+    return filters_used
+
+def test_name_variants_drop_season_org_and_numbering():
+    variants = name_variants("2024 시즌 한국프로축구연맹 선수 등록 규정(개정)")
+    assert "선수등록규정" in variants
+    assert "제2장등록" in name_variants("제2장 등록") and "등록" not in name_variants("제2장 등록")  # 너무 짧은 변형 제외
+
+def test_parse_finds_title_and_chapter(titles):
+    td = title_filter.get_title_dict("K_test")
+    assert td.parse(QUERY) == {"title": ["상벌 규정"], "chapter_title": ["제3장 징계"]}
+    assert td.parse("K리그 선수등록규정에 따르면?") == {"title": ["선수 등록 규정"]}
+    assert td.parse("외국인 선수는 몇 명까지?") == {}
+
+@pytest.mark.parametrize("topk_final, expected_filters, expected_titles", [
+    (2, [{"title": ["상벌 규정"], "chapter_title": ["제3장 징계"]}], {"상벌 규정"}),
+    (3, [{"title": ["상벌 규정"], "chapter_title": ["제3장 징계"]}, {"title": ["상벌 규정"]}], {"상벌 규정"}),
+    (4, [{"title": ["상벌 규정"], "chapter_title": ["제3장 징계"]}, {"title": ["상벌 규정"]}, None], None),
+])
+def test_prefilter_relaxes_until_enough_results(titles, local_backend, monkeypatch, topk_final, expected_filters,
+                                                 expected_titles):
+    monkeypatch.setattr(search_answer, "TOPK_FINAL", topk_final)
+    qv = search_answer.encode_query(QUERY)
+    items = search_answer._stage1_near_vector(local_backend, qv, certainty=0.0, limit=8, props=["title"],
+                                              user_query=QUERY)
+    assert titles == expected_filters    # 규정명+장 → 규정명 → 전체 순으로 완화
+    if expected_titles:
+        assert {d["title"] for d in items} == expected_titles
+    else:
+        assert len(items) == 8
+
+def test_prefilter_can_be_disabled(titles, local_backend, monkeypatch):
+    monkeypatch.setattr(search_answer, "METADATA_PREFILTER", False)
+    assert search_answer.query_metadata_filters(local_backend, QUERY) == {}
+
+def test_where_filter_shape():
+    where = search_answer._build_where(ids=["a"], filters={"title": ["상벌 규정", "경기 규정"]})
+    assert where == {"operator": "And", "operands": [
+        {"path": ["id"], "operator": "ContainsAny", "valueTextArray": ["a"]},
+        {"operator": "Or", "operands": [
+            {"path": ["title"], "operator": "Equal", "valueText": "상벌 규정"},
+            {"path": ["title"], "operator": "Equal", "valueText": "경기 규정"},
+        ]},
+    ]}
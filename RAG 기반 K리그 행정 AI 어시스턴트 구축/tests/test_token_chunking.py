@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+import doc_parser
+import index_alias
+import make_DB
+from conftest import INGEST_KWARGS, write_rules
+
+class WordTokenizer:
+    """공백 단위 토크나이저 대역 (offset_mapping 지원)."""
+    name_or_path = "words"
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        spans = [m.span() for m in re.finditer(r"\S+", text)]
+        out = {"input_ids": list(range(len(spans)))}
+        if return_offsets_mapping:
+            out["offset_mapping"] = spans
+        return out
+
+@pytest.fixture
+def words(monkeypatch):
+    monkeypatch.setattr(doc_parser, "_tokenizer", WordTokenizer())
+    monkeypatch.setattr(doc_parser, "_max_tokens", 12)
+    monkeypatch.setattr(doc_parser, "_overlap_tokens", 4)
+
+def _tokens(text):
+    return doc_parser.count_tokens(text)
+
+def test_articles_are_packed_without_splitting(words):
+    text = ("제1조(목적) 이 규정은 선수 등록 절차를 정한다.\n"
+            "제2조(정의) 선수란 구단에 등록된 자를 말하며 제14조에 따라 관리한다.\n"
+            "부칙 이 규정은 공포한 날부터 시행한다.")
+    chunks = doc_parser.split_text(text)
+    assert chunks == [
+        "제1조(목적) 이 규정은 선수 등록 절차를 정한다.",
+        "제2조(정의) 선수란 구단에 등록된 자를 말하며 제14조에 따라 관리한다.",  # 문장 중간 인용은 경계 아님
+        "부칙 이 규정은 공포한 날부터 시행한다.",
+    ]
+    short = "① 외국인 선수는 다섯 명까지.\n② 아시아 쿼터는 한 명."
+    assert doc_parser.split_text(short) == [short]  # 예산 안이면 조문 여러 개를 한 청크로
+
+def test_long_article_is_split_by_sentence_with_overlap(words):
+    sents = [f"제3조 문장{i} 구단은 명단을 낸다." if i == 0 else f"문장{i} 구단은 명단을 낸다." for i in range(6)]
+    chunks = doc_parser.split_text(" ".join(sents))
+    assert len(chunks) > 1
+    assert all(_tokens(c) <= 12 for c in chunks)
+    for a, b in zip(chunks, chunks[1:]):
+        assert a.split(". ")[-1].rstrip(".") in b  # 직전 청크 마지막 문장이 다음 청크 앞에 겹침
+
+def test_oversized_sentence_is_cut_into_source_windows(words):
+    text = " ".join(f"단어{i}" for i in range(30))
+    chunks = doc_parser.split_text(text)
+    assert all(_tokens(c) <= 12 and c in text for c in chunks)  # 원문을 그대로 잘라냄
+    assert chunks[0].startswith("단어0") and chunks[-1].endswith("단어29")
+
+def test_chunker_change_forces_blue_green_rebuild(fake_weaviate, tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    write_rules(data, "rules", {"a.json": {"title": "규정", "sections": [("제1조", "선수 등록 절차를 정한다.")]}})
+    make_DB.build_index(data_root=str(data), **INGEST_KWARGS)
+    first = index_alias.get_alias_target(fake_weaviate, "Rules")
+    assert make_DB.load_manifest()["Rules"]["chunker"] == doc_parser.chunker_signature()
+
+    monkeypatch.setattr(doc_parser, "CHUNK_MAX_CHARS", 600)
+    make_DB.build_index(incremental=True, data_root=str(data), **INGEST_KWARGS)
+    assert index_alias.get_alias_target(fake_weaviate, "Rules") != first  # 증분 대신 새 버전
+    assert make_DB.load_manifest()["Rules"]["chunker"] == "chars:600:200"
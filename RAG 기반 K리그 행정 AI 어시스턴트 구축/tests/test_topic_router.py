@@ -0,0 +1,61 @@
+import pytest
+
+import graph_pipeline
+import search_answer
+import topic_router
+from conftest import write_snapshot
+
+EN_CHUNKS = [
+    {"id": f"00000000-0000-0000-0001-{i:012d}", "title": "FIFA Regulations", "chapter_title": "Chapter 1",
+     "section_heading": h, "content": body, "table_id": ""}
+    for i, (h, body) in enumerate([
+        ("Article 5", "Each club may register up to five foreign players per season."),
+        ("Article 9", "A player sent off shall be suspended for the next match."),
+    ])
+]
+QUESTION = "외국인 선수 등록 한도"
+TRANSLATED = "Each club may register how many foreign players"
+
+@pytest.fixture
+def routed(local_backend, monkeypatch):
+    """K_test(한국어) + International(영어) 스냅샷으로 라우터 빌드, 번역은 고정 문장으로 대체."""
+    write_snapshot("International", "International_v20250101000000", EN_CHUNKS)
+    topic_router.build_router(["K_test", "International"])
+    monkeypatch.setattr(topic_router, "_cache", {})
+    monkeypatch.setattr(graph_pipeline, "TOPIC_CONFIG", {
+        "test": {"index_class": "K_test", "system_hint": ""},
+        "international": {"index_class": "International", "system_hint": ""},
+    })
+    calls = []
+
+    def fake_translate(q, *, index_class=search_answer.INDEX_CLASS):
+        if not search_answer.needs_translation(index_class):
+            return q
+        calls.append(q)
+        return TRANSLATED
+
+    monkeypatch.setattr(graph_pipeline, "normalize_query_for_stage1", fake_translate)
+    monkeypatch.setattr(search_answer, "normalize_query_for_stage1", fake_translate)
+    return calls
+
+def test_router_scores_translated_topics_with_translated_vector(routed):
+    router = topic_router.get_router()
+    qv = search_answer.encode_query(QUESTION)
+    # 원문(한국어) 벡터로는 영어 클래스와 거의 겹치지 않음
+    assert router.scores(qv, ["K_test", "International"])[0][0] == "K_test"
+
+    s = graph_pipeline.node_route_topic({"user_query": QUESTION})
+    assert s["routed_topics"] == ["international"]
+    assert s["translation"]["query"] == TRANSLATED
+
+    s = graph_pipeline.node_pretranslate(s)  # 라우팅 때 만든 번역/벡터 재사용
+    assert s["user_query"] == TRANSLATED
+    assert routed == [QUESTION]
+
+def test_evaluate_router_uses_runtime_input(routed):
+    res = topic_router.evaluate_router(
+        [{"query": QUESTION, "sub_topic": "international"}],
+        {"test": "K_test", "international": "International"}, margin=0.0
+    )
+    assert res["top1_accuracy"] == 1.0
+    assert res["translated_rate"] == 1.0
@@ -0,0 +1,133 @@
+import os
+import re
+import json
+import argparse
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import index_alias
+from local_index import LOCAL_INDEX_DIR
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 규정명/장 제목 사전 → 질의 메타데이터 필터
+# - 색인 시 local_index 스냅샷의 title / chapter_title 값으로 사전 생성
+#     index_artifacts/title_dict/<Alias>.json : {"titles": {원문: [변형...]}, "chapters": {...}}
+# - 변형: 공백·문장부호 제거 + 소문자, 괄호 내용/연도·시즌 표기/"제N장" 같은 번호/앞의 기관명 제거본
+# - 질의도 같은 방식으로 정규화해 변형이 부분 문자열로 들어 있으면 일치
+#   ("선수 등록 규정에서…" → title = "선수등록규정") → near_vector의 where 사전 필터로 사용
+# ──────────────────────────────────────────────────────────────────────────────
+TITLE_DICT_DIR = os.path.join("index_artifacts", "title_dict")
+TITLE_MIN_KEY_LEN = 4   # 이보다 짧은 변형(예: '총칙')은 흔해서 오탐 → 사용 안 함
+TITLE_ORG_PREFIXES = ("한국프로축구연맹", "대한축구협회", "k리그", "kleague", "kfa", "afc", "fifa")  # 질의에서 자주 생략
+
+_NON_WORD = re.compile(r"[\W_]+")
+_PAREN = re.compile(r"[\(\[\{（【][^\)\]\}）】]*[\)\]\}）】]")
+_SEASON = re.compile(r"\b(?:19|20)\d{2}(?:\s*[/\-~]\s*\d{2,4})?\s*(?:년도?|시즌|season|edition)?", re.I)
+_NUMBERING = re.compile(r"^\s*(?:제\s*\d+\s*(?:편|장|절)|chapter\s+[\divxlc]+|part\s+[\divxlc]+|[\divxlc]+\s*[\.\)])\s*", re.I)
+
+def normalize_text(text: str) -> str:
+    """비교용 정규화: NFKC + 소문자 + 공백/문장부호 제거."""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+def name_variants(name: str) -> List[str]:
+    raw = unicodedata.normalize("NFKC", name or "")
+    forms = [raw, _PAREN.sub(" ", raw)]
+    forms += [_SEASON.sub(" ", f) for f in forms]
+    forms += [_NUMBERING.sub("", f) for f in forms]
+    out = [normalize_text(f) for f in forms]
+    for v in list(out):
+        while True:
+            org = next((p for p in TITLE_ORG_PREFIXES if v.startswith(p)), None)
+            if not org:
+                break
+            v = v[len(org):]
+            out.append(v)
+    return [v for v in dict.fromkeys(out) if len(v) >= TITLE_MIN_KEY_LEN]
+
+def build_title_dict(alias: str, *, snapshot_dir: str = LOCAL_INDEX_DIR, out_dir: str = TITLE_DICT_DIR) -> str:
+    """local_index 스냅샷의 title/chapter_title 값으로 사전 저장."""
+    alias = index_alias.normalize_alias(alias)
+    titles, chapters = set(), set()
+    with open(os.path.join(snapshot_dir, alias, "meta.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            m = json.loads(line)
+            if m.get("title"):
+                titles.add(m["title"])
+            if m.get("chapter_title"):
+                chapters.add(m["chapter_title"])
+
+    data = {
+        "alias": alias,
+        "titles": {t: name_variants(t) for t in sorted(titles)},
+        "chapters": {c: name_variants(c) for c in sorted(chapters)},
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{alias}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    print(f"📖 title dict '{alias}': {len(titles)} titles, {len(chapters)} chapters", flush=True)
+    return path
+
+def _matches(nq: str, names: Dict[str, List[str]]) -> List[str]:
+    """질의에 변형이 들어 있는 이름. 더 긴 일치에 포함되는 짧은 일치(상위 개념 이름)는 제외."""
+    hits = []
+    for name, variants in names.items():
+        best = max((v for v in variants if v in nq), key=len, default=None)
+        if best:
+            hits.append((name, best))
+    keys = [k for _, k in hits]
+    return [name for name, k in hits if not any(k != o and k in o for o in keys)]
+
+class TitleDict:
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.titles: Dict[str, List[str]] = data["titles"]
+        self.chapters: Dict[str, List[str]] = data["chapters"]
+
+    def parse(self, query: str) -> Dict[str, List[str]]:
+        """질의에서 찾은 {속성: [값...]} (title / chapter_title). 없으면 {}."""
+        nq = normalize_text(query)
+        filters = {}
+        titles = _matches(nq, self.titles)
+        if titles:
+            filters["title"] = titles
+        chapters = _matches(nq, self.chapters)
+        if chapters:
+            filters["chapter_title"] = chapters
+        return filters
+
+_cache: Dict[str, Tuple[float, TitleDict]] = {}
+_cache_lock = threading.Lock()
+
+def get_title_dict(class_or_alias: str, *, root: str = TITLE_DICT_DIR) -> Optional[TitleDict]:
+    """실제 클래스명이나 alias로 사전 조회(파일이 바뀌면 다시 읽음). 없으면 None."""
+    alias = index_alias.alias_of(class_or_alias)
+    path = os.path.join(root, f"{alias}.json")
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _cache_lock:
+        hit = _cache.get(alias)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    d = TitleDict(path)
+    with _cache_lock:
+        _cache[alias] = (mtime, d)
+    return d
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local_index 스냅샷 → 규정명/장 제목 사전 빌드")
+    parser.add_argument("aliases", nargs="*", help="빌드할 alias (기본: 스냅샷이 있는 alias 전체)")
+    args = parser.parse_args()
+    aliases = args.aliases or sorted(
+        d for d in os.listdir(LOCAL_INDEX_DIR)
+        if os.path.exists(os.path.join(LOCAL_INDEX_DIR, d, "info.json"))
+    )
+    for a in aliases:
+        build_title_dict(a)
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import index_alias
+from local_index import LOCAL_INDEX_DIR
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 임베딩 기반 소주제 라우터 (sub_topic이 없거나 "auto"일 때)
+# - 색인 시: local_index 스냅샷 벡터로 alias별 프로토타입(구면 k-means 중심 ROUTER_PROTOTYPES개) 계산
+#     index_artifacts/router/router.npz (alias별 프로토타입 행렬) + router.json (alias, 청크 수, 생성 시각)
+# - 질의 시: 이미 계산한 질의 벡터와 프로토타입 코사인 → alias별 최고점 → 1위(차이가 작으면 1·2위 통합 검색)
+#   번역 후 검색하는 주제(국제)가 상위 2위 안이면 그 주제만 번역문 벡터로 다시 채점 (rank_query)
+#   → 각 주제를 실제 검색에 쓰일 질의 벡터로 비교, 번역은 그 경우에만 1회 (pretranslate에서 재사용)
+# - 평가: python topic_router.py --eval labeled.jsonl  ({"query": ..., "sub_topic": "k_league"} 줄 단위)
+# ──────────────────────────────────────────────────────────────────────────────
+ROUTER_DIR = os.path.join("index_artifacts", "router")
+ROUTER_PROTOTYPES = 8        # alias별 프로토타입 수 (1이면 단순 중심 벡터)
+ROUTER_KMEANS_ITERS = 15
+ROUTER_SAMPLE_ROWS = 20000   # k-means에 쓰는 최대 행 수(alias별)
+ROUTER_MARGIN = 0.03         # 1·2위 점수 차가 이보다 작으면 두 클래스를 함께 검색
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    return v / np.clip(np.linalg.norm(v, axis=-1, keepdims=True), 1e-12, None)
+
+def _prototypes(vectors: np.ndarray, k: int, *, iters: int = ROUTER_KMEANS_ITERS, seed: int = 0) -> np.ndarray:
+    """정규화 벡터의 구면 k-means 중심 (행 수가 k 이하면 평균 1개)."""
+    x = _normalize(np.asarray(vectors, dtype=np.float32))
+    if len(x) <= k or k <= 1:
+        return _normalize(x.mean(axis=0, keepdims=True))
+    rng = np.random.default_rng(seed)
+    if len(x) > ROUTER_SAMPLE_ROWS:
+        x = x[rng.choice(len(x), ROUTER_SAMPLE_ROWS, replace=False)]
+    centers = x[rng.choice(len(x), k, replace=False)]
+    for _ in range(iters):
+        assign = np.argmax(x @ centers.T, axis=1)
+        for j in range(k):
+            members = x[assign == j]
+            if len(members):
+                centers[j] = members.mean(axis=0)
+        centers = _normalize(centers)
+    return centers
+
+def build_router(aliases: Optional[List[str]] = None, *, snapshot_dir: str = LOCAL_INDEX_DIR,
+                 out_dir: str = ROUTER_DIR, k: int = ROUTER_PROTOTYPES) -> str:
+    """스냅샷이 있는 alias(기본: 전체)의 프로토타입을 계산해 저장."""
+    if aliases is None:
+        aliases = sorted(
+            d for d in os.listdir(snapshot_dir)
+            if os.path.exists(os.path.join(snapshot_dir, d, "info.json"))
+        )
+    protos, info = {}, {}
+    for alias in (index_alias.normalize_alias(a) for a in aliases):
+        vecs = np.load(os.path.join(snapshot_dir, alias, "vectors.npy"), mmap_mode="r")
+        if not len(vecs):
+            continue
+        protos[alias] = _prototypes(vecs, k)
+        info[alias] = {"chunks": int(len(vecs)), "prototypes": int(len(protos[alias]))}
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, "router.tmp.npz")
+    np.savez(tmp, **protos)
+    os.replace(tmp, os.path.join(out_dir, "router.npz"))
+    with open(os.path.join(out_dir, "router.json"), "w", encoding="utf-8") as f:
+        json.dump({"built_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "classes": info}, f, ensure_ascii=False, indent=2)
+    print(f"🧭 topic router: {len(protos)} classes × ≤{k} prototypes → {out_dir}", flush=True)
+    return out_dir
+
+class TopicRouter:
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.protos: Dict[str, np.ndarray] = {a: data[a] for a in data.files}
+
+    def scores(self, query_vec, aliases: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """alias별 최고 프로토타입 코사인, 내림차순."""
+        q = _normalize(np.asarray(query_vec, dtype=np.float32).ravel())
+        wanted = [index_alias.normalize_alias(a) for a in aliases] if aliases else list(self.protos)
+        out = [(a, float(np.max(self.protos[a] @ q))) for a in wanted if a in self.protos]
+        return sorted(out, key=lambda x: -x[1])
+
+    def route(self, query_vec, aliases: Optional[List[str]] = None, *,
+              margin: float = ROUTER_MARGIN) -> List[str]:
+        """검색할 alias 목록(1개, 또는 1·2위가 근소하면 2개). 라우터에 없는 alias만 있으면 []."""
+        return pick_topics(self.scores(query_vec, aliases), margin=margin)
+
+def pick_topics(ranked: List[Tuple[str, float]], *, margin: float = ROUTER_MARGIN) -> List[str]:
+    if len(ranked) >= 2 and ranked[0][1] - ranked[1][1] < margin:
+        return [ranked[0][0], ranked[1][0]]
+    return [ranked[0][0]] if ranked else []
+
+def rank_query(router: TopicRouter, query_vec, aliases: List[str], *,
+               translated_aliases: Sequence[str] = (),
+               translate: Optional[Callable[[], Optional[np.ndarray]]] = None) -> List[Tuple[str, float]]:
+    """
+    원문 벡터로 채점 후, 번역 대상 alias가 상위 2위 안이면 translate()(번역문 벡터, 번역 안 되면 None)로
+    그 alias들만 다시 채점. graph_pipeline.node_route_topic과 evaluate_router가 같은 기준으로 사용.
+    """
+    ranked = router.scores(query_vec, aliases)
+    wanted = {index_alias.normalize_alias(a) for a in translated_aliases}
+    if translate is None or not any(a in wanted for a, _ in ranked[:2]):
+        return ranked
+    tv = translate()
+    if tv is None:
+        return ranked
+    rescored = [(a, sc) for a, sc in ranked if a not in wanted] + router.scores(tv, sorted(wanted))
+    return sorted(rescored, key=lambda x: -x[1])
+
+_cache: Dict[str, Tuple[float, TopicRouter]] = {}
+_cache_lock = threading.Lock()
+
+def get_router(root: str = ROUTER_DIR) -> Optional[TopicRouter]:
+    """router.npz가 없으면 None (파일이 바뀌면 다시 읽음)."""
+    path = os.path.join(root, "router.npz")
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _cache_lock:
+        hit = _cache.get(path)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    router = TopicRouter(path)
+    with _cache_lock:
+        _cache[path] = (mtime, router)
+    return router
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 정확도 평가 (라벨: TOPIC_CONFIG 키 또는 alias)
+# ──────────────────────────────────────────────────────────────────────────────
+def evaluate_router(samples: List[Dict[str, str]], topic_aliases: Dict[str, str], *,
+                    margin: float = ROUTER_MARGIN) -> Dict[str, object]:
+    """질의 시와 같은 입력으로 평가: search_answer.encode_query 벡터 + 번역 주제는 번역문 벡터 (rank_query)."""
+    from search_answer import encode_query, needs_translation, normalize_query_for_stage1
+
+    router = get_router()
+    if router is None:
+        raise SystemExit(f"❌ no router under {ROUTER_DIR} (python topic_router.py --build)")
+
+    aliases = [index_alias.normalize_alias(a) for a in topic_aliases.values()]
+    translated = [a for a in aliases if needs_translation(a)]
+    top1 = top2 = two_way = translated_n = 0
+    confusion: Dict[str, Dict[str, int]] = {}
+    for s in samples:
+        gold = index_alias.normalize_alias(topic_aliases.get(s["sub_topic"], s["sub_topic"]))
+
+        def translate(q=s["query"]):
+            nonlocal translated_n
+            tq = normalize_query_for_stage1(q, index_class=translated[0])
+            if tq == q:
+                return None
+            translated_n += 1
+            return encode_query(tq)
+
+        scored = rank_query(router, encode_query(s["query"]), aliases,
+                            translated_aliases=translated, translate=translate)
+        ranked = [a for a, _ in scored]
+        routed = pick_topics(scored, margin=margin)
+        top1 += bool(ranked) and ranked[0] == gold
+        top2 += gold in ranked[:2]
+        two_way += len(routed) > 1
+        row = confusion.setdefault(gold, {})
+        row[ranked[0] if ranked else "-"] = row.get(ranked[0] if ranked else "-", 0) + 1
+    n = max(len(samples), 1)
+    return {
+        "samples": len(samples), "top1_accuracy": round(top1 / n, 3), "top2_accuracy": round(top2 / n, 3),
+        "two_class_rate": round(two_way / n, 3), "translated_rate": round(translated_n / n, 3),
+        "margin": margin, "confusion": confusion,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="소주제 라우터 빌드/평가")
+    parser.add_argument("--build", action="store_true", help="local_index 스냅샷으로 프로토타입 재계산")
+    parser.add_argument("--eval", help='라벨 파일(jsonl: {"query": ..., "sub_topic": ...})')
+    parser.add_argument("--margin", type=float, default=ROUTER_MARGIN)
+    args = parser.parse_args()
+
+    if args.build:
+        build_router()
+    if args.eval:
+        from graph_pipeline import TOPIC_CONFIG
+        with open(args.eval, "r", encoding="utf-8") as f:
+            samples = [json.loads(line) for line in f if line.strip()]
+        res = evaluate_router(samples, {t: c["index_class"] for t, c in TOPIC_CONFIG.items()}, margin=args.margin)
+        print(f"🧭 routing: top1 {res['top1_accuracy']:.1%}, top2 {res['top2_accuracy']:.1%}, "
+              f"two-class {res['two_class_rate']:.1%} (n={res['samples']})")
+        print(json.dumps(res["confusion"], ensure_ascii=False, indent=2))